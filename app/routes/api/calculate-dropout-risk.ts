@@ -39,95 +39,69 @@ export default createRoute(async (c) => {
     let processed = 0
     let errors = 0
 
-    for (const student of students) {
-      try {
-        // Calculate persona based on available data
-        let persona = "Average" // Default persona
-        
-        // Calculate current CGPA from test scores
-        const currentCGPA = student.testScores.length > 0 
-          ? student.testScores.reduce((sum, score) => sum + score.score, 0) / student.testScores.length / 10
-          : 7.0
-
-        // Get current semester score
-        const currentSemesterScore = student.testScores.length > 0 
-          ? student.testScores[0].score 
-          : 75.0
-
-        // Calculate previous CGPA and score
-        const previousCGPA = student.testScores.length > 1 
-          ? student.testScores.slice(1).reduce((sum, score) => sum + score.score, 0) / (student.testScores.length - 1) / 10
-          : currentCGPA - 0.3
-
-        const previousScore = student.testScores.length > 1 
-          ? student.testScores[1].score 
-          : currentSemesterScore - 3.0
-
-        // Count backlogs
-        const totalBacklogs = student.backlogs.length
-        const previousBacklogs = Math.max(0, totalBacklogs - 1)
-
-        // Determine persona based on performance (using Python backend accepted values)
-        // Python backend accepts: ['Average', 'Fast learners', 'Good', 'Slow learners']
-        if (currentCGPA >= 8.5 && currentSemesterScore >= 85) {
-          persona = "Fast learners"
-        } else if (currentCGPA >= 7.5 && currentSemesterScore >= 75) {
-          persona = "Good"
-        } else if (currentCGPA >= 6.5 && currentSemesterScore >= 65) {
-          persona = "Average"
-        } else {
-          persona = "Slow learners"
-        }
+    // Send every student's raw records in one call; the Python backend derives
+    // the model inputs (CGPA, scores, backlogs, persona) and scores them together
+    const pending = students
+
+    // Call Python backend API once for the whole cohort
+    let predictions = []
+    let modelVersion = null
+    if (pending.length > 0) {
+      console.log(`Calling Python records API for ${pending.length} students`)
+
+      const response = await fetch('http://localhost:8000/predict/records?probability_format=float', {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+          students: pending.map((student) => ({
+            studentId: student.studentId,
+            testScores: student.testScores,
+            backlogs: student.backlogs,
+            attendance: student.attendance
+          }))
+        })
+      })
 
-        // Validate persona before sending to Python API
-        const validPersonas = ['Average', 'Fast learners', 'Good', 'Slow learners']
-        if (!validPersonas.includes(persona)) {
-          throw new Error(`Invalid persona '${persona}'. Must be one of: ${validPersonas.join(', ')}`)
-        }
+      if (!response.ok) {
+        const errorText = await response.text()
+        throw new Error(`Python API error: ${response.status} - ${errorText}`)
+      }
 
-        // Prepare data for Python API
-        const requestData = {
-          studentID: student.studentId,
-          persona: persona,
-          Current_CGPA: Math.round(currentCGPA * 100) / 100,
-          Total_Backlogs: totalBacklogs,
-          Semester_Score: Math.round(currentSemesterScore * 100) / 100,
-          Previous_CGPA: Math.round(previousCGPA * 100) / 100,
-          Previous_Backlogs: previousBacklogs,
-          Previous_Score: Math.round(previousScore * 100) / 100
-        }
+      const responseText = await response.text()
+      let batchResult
+      try {
+        batchResult = JSON.parse(responseText)
+      } catch (parseError) {
+        throw new Error(`Failed to parse Python API response: ${responseText}`)
+      }
 
-        // Call Python backend API
-        console.log(`Calling Python API for student ${student.studentId} with data:`, requestData)
-        
-        const response = await fetch('http://localhost:8000/predict', {
-          method: 'POST',
-          headers: {
-            'Content-Type': 'application/json',
-          },
-          body: JSON.stringify(requestData)
-        })
+      if (!Array.isArray(batchResult.results)) {
+        throw new Error(`Python API error: ${batchResult.error || responseText}`)
+      }
+      predictions = batchResult.results
+      modelVersion = batchResult.model_version || null
+    }
 
-        if (!response.ok) {
-          const errorText = await response.text()
-          throw new Error(`Python API error: ${response.status} - ${errorText}`)
-        }
+    for (let i = 0; i < pending.length; i++) {
+      const student = pending[i]
+      try {
+        const predictionResult = predictions[i] || {}
+        console.log(`Python API result for ${student.studentId}:`, predictionResult)
 
-        const responseText = await response.text()
-        console.log(`Raw Python API response for ${student.studentId}:`, responseText)
-        
-        let predictionResult
-        try {
-          predictionResult = JSON.parse(responseText)
-        } catch (parseError) {
-          throw new Error(`Failed to parse Python API response: ${responseText}`)
+        if (predictionResult.error) {
+          throw new Error(`Python API error: ${predictionResult.error}`)
         }
-        
-        console.log(`Parsed Python API response for ${student.studentId}:`, predictionResult)
+
+        // Inputs the backend derived from the raw records
+        const requestData = predictionResult.inputs || {}
+        const persona = requestData.persona
 
         // Create or update risk flag in database
         const riskLevel = predictionResult.risk_flag || 'Unknown'
-        const probability = parseFloat(predictionResult.dropout_risk_probability || '0')
+        // Requested as a float, so no string round trip
+        const probability = Number(predictionResult.dropout_risk_probability ?? 0)
 
         console.log(`Processing risk for ${student.studentId}: riskLevel=${riskLevel}, probability=${probability}`)
 
@@ -170,6 +144,7 @@ export default createRoute(async (c) => {
           riskLevel: riskLevel,
           probability: probability,
           persona: persona,
+          modelVersion: modelVersion,
           calculatedData: requestData
         })
 
@@ -192,6 +167,7 @@ export default createRoute(async (c) => {
       totalStudents: students.length,
       processed: processed,
       errors: errors,
+      modelVersion: modelVersion,
       results: results
     })
 
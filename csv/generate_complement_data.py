@@ -2,279 +2,330 @@
 """
 Generate Complement Data for EduPulse CSV Files
 Creates new synthetic data that doesn't exist in the original dataset
+
+New student IDs are reserved in one vectorized step from the free IDs of a
+configurable range (id_range, id_width), and every table is generated for a
+whole chunk of students at once with numpy draws. Each chunk is appended to
+its file (CSV, or Parquet/Arrow with --format) as it is produced, so memory
+does not grow with the number of students. Chunk i draws from a Generator derived from the seed and i (see
+sharding.py), so a given seed and chunk size always give the same files.
 """
 
+import argparse
+import os
 import pandas as pd
-import random
-import string
-from datetime import datetime, timedelta
+import numpy as np
+from datetime import datetime
 from pathlib import Path
 import json
 
+from sharding import master_seed, shard_rng
+from table_writer import DEFAULT_CHUNK_SIZE, FORMATS, TableWriters
+
+FIRST_NAMES = ['Arjun', 'Priya', 'Rahul', 'Sneha', 'Vikram', 'Anita', 'Rohan', 'Kavya',
+               'Amit', 'Neha', 'Sanjay', 'Pooja', 'Rajesh', 'Meera', 'Kiran', 'Divya']
+LAST_NAMES = ['Sharma', 'Gupta', 'Singh', 'Patel', 'Kumar', 'Agarwal', 'Jain', 'Reddy',
+              'Iyer', 'Nair', 'Chopra', 'Malhotra', 'Verma', 'Yadav', 'Mishra', 'Tiwari']
+CITIES = ['Mumbai', 'Delhi', 'Bangalore', 'Chennai', 'Kolkata', 'Pune', 'Hyderabad', 'Ahmedabad']
+STREETS = ['MG Road', 'Park Street', 'Brigade Road', 'Commercial Street', 'Mall Road']
+MONTHS = [f"2024-{month:02d}" for month in range(1, 13)]
+TEST_TYPES = ['Quiz_1', 'Quiz_2', 'Quiz_3', 'Midterm', 'Final', 'Assignment']
+PROJECT_TITLES = [
+    'AI-Based Recommendation System',
+    'IoT Smart Home Automation',
+    'Blockchain Voting System',
+    'Machine Learning Stock Predictor',
+    'Web-based Learning Platform',
+    'Mobile App for Healthcare',
+    'Data Analytics Dashboard',
+    'Cybersecurity Framework'
+]
+RESEARCH_AREAS = [
+    'Machine Learning',
+    'Computer Vision',
+    'Natural Language Processing',
+    'Cybersecurity',
+    'Data Mining',
+    'Software Engineering'
+]
+
+def allocate_ids(existing_ids, count, prefix='E', id_range=(5000, 9999), width=4, rng=None):
+    """
+    Reserve `count` IDs numbered id_range[0]..id_range[1] that are not in
+    existing_ids, formatted as prefix + number zero-padded to width.
+
+    Without rng the lowest free numbers are taken (a contiguous block apart
+    from existing IDs); with rng they are sampled without replacement. Either
+    way it is a few vectorized steps over the existing IDs instead of a retry
+    loop per ID, and the result is sorted.
+    """
+    low, high = id_range
+    existing = pd.Series(list(existing_ids), dtype=object).astype(str)
+    numbered = existing[existing.str.startswith(prefix)].str[len(prefix):]
+    numbered = numbered[numbered.str.isdigit()]
+    numbers = numbered.astype(np.int64)
+    # Only an ID spelled exactly as we would format it can collide
+    numbers = numbers[numbers.astype(str).str.zfill(width) == numbered]
+    taken = np.unique(numbers[(numbers >= low) & (numbers <= high)].to_numpy())
+
+    free = high - low + 1 - len(taken)
+    if count > free:
+        raise ValueError(f"Only {free} free IDs from {prefix}{low:0{width}d} to {prefix}{high:0{width}d} "
+                         f"but {count} were requested; widen id_range (and id_width)")
+
+    # The k-th free number (from 0) is low + k plus the taken numbers at or below it
+    ranks = np.arange(count) if rng is None else np.sort(rng.choice(free, count, replace=False))
+    free_below_taken = taken - low - np.arange(len(taken))
+    ids = low + ranks + np.searchsorted(free_below_taken, ranks, side='right')
+    return (prefix + pd.Series(ids, dtype=np.int64).astype(str).str.zfill(width)).tolist()
+
+def pick(rng, values, size):
+    """Draw `size` items uniformly from values"""
+    return np.asarray(values, dtype=object)[rng.integers(0, len(values), size)]
+
+def randint(rng, low, high, size):
+    """Integers between low and high inclusive, like random.randint"""
+    return rng.integers(low, high + 1, size)
+
+def digits(numbers):
+    """Integers as an object array of strings, ready to concatenate"""
+    return np.asarray(numbers).astype(str).astype(object)
+
+def random_dates(rng, size, start_year=2000, end_year=2005):
+    """Random 'YYYY-MM-DD' dates from the start of start_year to the end of end_year"""
+    start = np.datetime64(f'{start_year}-01-01', 'D')
+    days = (np.datetime64(f'{end_year}-12-31', 'D') - start).astype(int)
+    return (start + rng.integers(0, days, size)).astype(str).astype(object)
+
+def sample_each(rng, counts, population):
+    """
+    For each row i draw counts[i] distinct positions out of range(population),
+    like random.sample per row. Returns (row, position) arrays, grouped by row.
+    """
+    order = np.argsort(rng.random((len(counts), population)), axis=1)
+    taken = np.arange(population) < counts[:, None]
+    return np.repeat(np.arange(len(counts)), counts), order[taken]
+
+def subset(rng, student_ids, count):
+    """A random subset of count students, kept in ID order"""
+    return student_ids[np.sort(rng.choice(len(student_ids), count, replace=False))]
+
 class ComplementDataGenerator:
-    def __init__(self, original_dir, filtered_dir, output_dir):
+    def __init__(self, original_dir, filtered_dir, output_dir, seed=None,
+                 id_prefix='E', id_range=(5000, 9999), id_width=4, sample_ids=True):
         self.original_dir = Path(original_dir)
         self.filtered_dir = Path(filtered_dir)
         self.output_dir = Path(output_dir)
         self.new_students = []
         self.departments = ['CS', 'IT', 'ECE', 'ME', 'CE', 'EE', 'AI', 'DS']
         self.courses = ['PHY101', 'MATH201', 'CS301', 'IT401', 'ECE501', 'ME601', 'CSET240', 'CSET243']
-        
-    def generate_student_id(self, existing_ids):
-        """Generate a new unique student ID"""
-        while True:
-            new_id = f"E{random.randint(5000, 9999)}"
-            if new_id not in existing_ids:
-                return new_id
-    
-    def generate_email(self, student_id):
-        """Generate email from student ID"""
-        return f"{student_id.lower()}@university.edu"
-    
-    def generate_phone(self):
-        """Generate random phone number"""
-        return str(random.randint(1000000000, 9999999999))
-    
-    def generate_date(self, start_year=2000, end_year=2005):
-        """Generate random date"""
-        start_date = datetime(start_year, 1, 1)
-        end_date = datetime(end_year, 12, 31)
-        time_between = end_date - start_date
-        days_between = time_between.days
-        random_days = random.randrange(days_between)
-        return (start_date + timedelta(days=random_days)).strftime('%Y-%m-%d')
-    
-    def generate_name(self):
+        self.seed = master_seed(seed)
+        self.rng = np.random.default_rng(self.seed)
+        # New IDs are id_prefix + a free number in id_range, zero-padded to id_width,
+        # sampled across the range or (sample_ids=False) the lowest free ones
+        self.id_prefix = id_prefix
+        self.id_range = id_range
+        self.id_width = id_width
+        self.sample_ids = sample_ids
+
+    def allocate_student_ids(self, count, existing_ids=None):
+        """Reserve count new unique student IDs and add them to new_students"""
+        if existing_ids is None:
+            existing_ids = self.get_existing_student_ids()
+        student_ids = allocate_ids(set(existing_ids).union(self.new_students), count, self.id_prefix,
+                                   self.id_range, self.id_width, self.rng if self.sample_ids else None)
+        self.new_students.extend(student_ids)
+        return student_ids
+
+    def generate_email(self, student_ids):
+        """Generate emails from student IDs"""
+        return pd.Series(student_ids, dtype=object).str.lower().to_numpy(dtype=object) + '@university.edu'
+
+    def generate_phone(self, rng, size):
+        """Generate random phone numbers"""
+        return digits(randint(rng, 1000000000, 9999999999, size))
+
+    def generate_name(self, rng, size):
         """Generate random Indian names"""
-        first_names = ['Arjun', 'Priya', 'Rahul', 'Sneha', 'Vikram', 'Anita', 'Rohan', 'Kavya', 
-                      'Amit', 'Neha', 'Sanjay', 'Pooja', 'Rajesh', 'Meera', 'Kiran', 'Divya']
-        last_names = ['Sharma', 'Gupta', 'Singh', 'Patel', 'Kumar', 'Agarwal', 'Jain', 'Reddy',
-                     'Iyer', 'Nair', 'Chopra', 'Malhotra', 'Verma', 'Yadav', 'Mishra', 'Tiwari']
-        return f"{random.choice(first_names)} {random.choice(last_names)}"
-    
-    def generate_address(self):
-        """Generate random Indian address"""
-        cities = ['Mumbai', 'Delhi', 'Bangalore', 'Chennai', 'Kolkata', 'Pune', 'Hyderabad', 'Ahmedabad']
-        streets = ['MG Road', 'Park Street', 'Brigade Road', 'Commercial Street', 'Mall Road']
-        return f"{random.randint(1, 999)}, {random.choice(streets)}, {random.choice(cities)}-{random.randint(100000, 999999)}"
-    
+        return pick(rng, FIRST_NAMES, size) + ' ' + pick(rng, LAST_NAMES, size)
+
+    def generate_address(self, rng, size):
+        """Generate random Indian addresses"""
+        return (digits(randint(rng, 1, 999, size)) + ', ' + pick(rng, STREETS, size) + ', '
+                + pick(rng, CITIES, size) + '-' + digits(randint(rng, 100000, 999999, size)))
+
     def get_existing_student_ids(self):
         """Get all existing student IDs from original data"""
         existing_ids = set()
-        
+
         # Check original students file
         original_students = self.original_dir / "students_comprehensive_reduced_stratified.csv"
         if original_students.exists():
-            df = pd.read_csv(original_students)
+            df = pd.read_csv(original_students, usecols=['studentId'])
             existing_ids.update(df['studentId'].tolist())
-        
+
         # Check filtered students file
         filtered_students = self.filtered_dir / "students_comprehensive_reduced_stratified.csv"
         if filtered_students.exists():
-            df = pd.read_csv(filtered_students)
+            df = pd.read_csv(filtered_students, usecols=['studentId'])
             existing_ids.update(df['studentId'].tolist())
-        
+
         return existing_ids
-    
-    def generate_students_data(self, num_students=10):
+
+    def _ids_and_rng(self, student_ids, rng):
+        student_ids = self.new_students if student_ids is None else student_ids
+        return np.asarray(student_ids, dtype=object), self.rng if rng is None else rng
+
+    def generate_students_data(self, student_ids=None, rng=None):
         """Generate new students data"""
-        existing_ids = self.get_existing_student_ids()
-        students_data = []
-        
-        print(f"📝 Generating {num_students} new students...")
-        
-        for i in range(num_students):
-            student_id = self.generate_student_id(existing_ids)
-            existing_ids.add(student_id)
-            self.new_students.append(student_id)
-            
-            student = {
-                'studentId': student_id,
-                'name': self.generate_name(),
-                'email': self.generate_email(student_id),
-                'dob': self.generate_date(),
-                'currentSemester': random.randint(1, 8),
-                'department': random.choice(self.departments),
-                'phone': self.generate_phone(),
-                'batchId': f"{random.choice(self.departments)}{random.randint(2020, 2024)}{random.choice(['A', 'B', 'C'])}",
-                'parentName': self.generate_name(),
-                'parentEmail': f"parent{random.randint(1000, 9999)}@example.com",
-                'parentPhone': self.generate_phone(),
-                'address': self.generate_address()
-            }
-            students_data.append(student)
-        
-        return pd.DataFrame(students_data)
-    
-    def generate_attendance_data(self):
+        student_ids, rng = self._ids_and_rng(student_ids, rng)
+        n = len(student_ids)
+
+        return pd.DataFrame({
+            'studentId': student_ids,
+            'name': self.generate_name(rng, n),
+            'email': self.generate_email(student_ids),
+            'dob': random_dates(rng, n),
+            'currentSemester': randint(rng, 1, 8, n),
+            'department': pick(rng, self.departments, n),
+            'phone': self.generate_phone(rng, n),
+            'batchId': pick(rng, self.departments, n) + digits(randint(rng, 2020, 2024, n)) + pick(rng, ['A', 'B', 'C'], n),
+            'parentName': self.generate_name(rng, n),
+            'parentEmail': 'parent' + digits(randint(rng, 1000, 9999, n)) + '@example.com',
+            'parentPhone': self.generate_phone(rng, n),
+            'address': self.generate_address(rng, n)
+        })
+
+    def student_courses(self, student_ids, rng):
+        """3-6 distinct courses per student, as parallel (student, course) arrays"""
+        rows, positions = sample_each(rng, randint(rng, 3, 6, len(student_ids)), len(self.courses))
+        return student_ids[rows], np.asarray(self.courses, dtype=object)[positions]
+
+    def generate_attendance_data(self, student_ids=None, rng=None):
         """Generate attendance data for new students"""
-        attendance_data = []
-        
-        print("📊 Generating attendance data...")
-        
-        for student_id in self.new_students:
-            # Generate attendance for multiple courses and months
-            for course in random.sample(self.courses, random.randint(3, 6)):
-                for month in range(1, 13):
-                    if random.random() > 0.3:  # 70% chance of having attendance record
-                        attendance_data.append({
-                            'studentId': student_id,
-                            'courseId': course,
-                            'month': f"2024-{month:02d}",
-                            'attendancePercent': round(random.uniform(50, 95), 1)
-                        })
-        
-        return pd.DataFrame(attendance_data)
-    
-    def generate_test_scores_data(self):
+        student_ids, rng = self._ids_and_rng(student_ids, rng)
+
+        # Generate attendance for multiple courses and months
+        students, courses = self.student_courses(student_ids, rng)
+        pairs, months = np.nonzero(rng.random((len(students), len(MONTHS))) > 0.3)  # 70% chance of having attendance record
+
+        return pd.DataFrame({
+            'studentId': students[pairs],
+            'courseId': courses[pairs],
+            'month': np.asarray(MONTHS, dtype=object)[months],
+            'attendancePercent': np.round(rng.uniform(50, 95, len(pairs)), 1)
+        })
+
+    def generate_test_scores_data(self, student_ids=None, rng=None):
         """Generate test scores data for new students"""
-        test_data = []
-        test_types = ['Quiz_1', 'Quiz_2', 'Quiz_3', 'Midterm', 'Final', 'Assignment']
-        
-        print("📝 Generating test scores data...")
-        
-        for student_id in self.new_students:
-            for course in random.sample(self.courses, random.randint(3, 6)):
-                for test_type in random.sample(test_types, random.randint(3, 5)):
-                    test_data.append({
-                        'studentId': student_id,
-                        'courseId': course,
-                        'testType': test_type,
-                        'testDate': self.generate_date(2024, 2025),
-                        'score': round(random.uniform(20, 95), 1)
-                    })
-        
-        return pd.DataFrame(test_data)
-    
-    def generate_fee_payments_data(self):
+        student_ids, rng = self._ids_and_rng(student_ids, rng)
+
+        students, courses = self.student_courses(student_ids, rng)
+        pairs, test_types = sample_each(rng, randint(rng, 3, 5, len(students)), len(TEST_TYPES))
+        n = len(pairs)
+
+        return pd.DataFrame({
+            'studentId': students[pairs],
+            'courseId': courses[pairs],
+            'testType': np.asarray(TEST_TYPES, dtype=object)[test_types],
+            'testDate': random_dates(rng, n, 2024, 2025),
+            'score': np.round(rng.uniform(20, 95, n), 1)
+        })
+
+    def generate_fee_payments_data(self, student_ids=None, rng=None):
         """Generate fee payments data for new students"""
-        fee_data = []
-        
-        print("💰 Generating fee payments data...")
-        
-        for student_id in self.new_students:
-            # Generate 2-4 fee payments per student
-            for i in range(random.randint(2, 4)):
-                fee_data.append({
-                    'studentId': student_id,
-                    'feeType': random.choice(['Tuition', 'Hostel', 'Library', 'Lab', 'Exam']),
-                    'amount': random.randint(5000, 50000),
-                    'dueDate': self.generate_date(2024, 2025),
-                    'paidDate': self.generate_date(2024, 2025) if random.random() > 0.2 else '',
-                    'status': random.choice(['Paid', 'Pending', 'Overdue'])
-                })
-        
-        return pd.DataFrame(fee_data)
-    
-    def generate_backlogs_data(self):
+        student_ids, rng = self._ids_and_rng(student_ids, rng)
+
+        # Generate 2-4 fee payments per student
+        students = np.repeat(student_ids, randint(rng, 2, 4, len(student_ids)))
+        n = len(students)
+
+        return pd.DataFrame({
+            'studentId': students,
+            'feeType': pick(rng, ['Tuition', 'Hostel', 'Library', 'Lab', 'Exam'], n),
+            'amount': randint(rng, 5000, 50000, n),
+            'dueDate': random_dates(rng, n, 2024, 2025),
+            'paidDate': np.where(rng.random(n) > 0.2, random_dates(rng, n, 2024, 2025), ''),
+            'status': pick(rng, ['Paid', 'Pending', 'Overdue'], n)
+        })
+
+    def generate_backlogs_data(self, student_ids=None, rng=None):
         """Generate backlogs data for new students"""
-        backlog_data = []
-        
-        print("⚠️ Generating backlogs data...")
-        
-        for student_id in self.new_students:
-            # 30% chance of having backlogs
-            if random.random() < 0.3:
-                for i in range(random.randint(1, 3)):
-                    backlog_data.append({
-                        'studentId': student_id,
-                        'courseId': random.choice(self.courses),
-                        'semester': random.randint(1, 6),
-                        'attempts': random.randint(1, 3),
-                        'cleared': random.choice([True, False])
-                    })
-        
-        return pd.DataFrame(backlog_data)
-    
-    def generate_projects_data(self):
+        student_ids, rng = self._ids_and_rng(student_ids, rng)
+
+        # 30% chance of having backlogs, 1-3 of them
+        with_backlogs = student_ids[rng.random(len(student_ids)) < 0.3]
+        students = np.repeat(with_backlogs, randint(rng, 1, 3, len(with_backlogs)))
+        n = len(students)
+
+        return pd.DataFrame({
+            'studentId': students,
+            'courseId': pick(rng, self.courses, n),
+            'semester': randint(rng, 1, 6, n),
+            'attempts': randint(rng, 1, 3, n),
+            'cleared': rng.random(n) < 0.5
+        })
+
+    def generate_projects_data(self, student_ids=None, rng=None):
         """Generate projects data for new students"""
-        project_data = []
-        project_titles = [
-            'AI-Based Recommendation System',
-            'IoT Smart Home Automation',
-            'Blockchain Voting System',
-            'Machine Learning Stock Predictor',
-            'Web-based Learning Platform',
-            'Mobile App for Healthcare',
-            'Data Analytics Dashboard',
-            'Cybersecurity Framework'
-        ]
-        
-        print("🚀 Generating projects data...")
-        
-        for student_id in self.new_students:
-            # 60% chance of having a project
-            if random.random() < 0.6:
-                project_data.append({
-                    'studentId': student_id,
-                    'projectTitle': random.choice(project_titles),
-                    'supervisorId': f"T{random.randint(1000, 9999)}",
-                    'startDate': self.generate_date(2023, 2024),
-                    'endDate': self.generate_date(2024, 2025),
-                    'status': random.choice(['Active', 'Completed', 'Suspended'])
-                })
-        
-        return pd.DataFrame(project_data)
-    
-    def generate_phd_supervision_data(self):
+        student_ids, rng = self._ids_and_rng(student_ids, rng)
+
+        # 60% chance of having a project
+        students = student_ids[rng.random(len(student_ids)) < 0.6]
+        n = len(students)
+
+        return pd.DataFrame({
+            'studentId': students,
+            'projectTitle': pick(rng, PROJECT_TITLES, n),
+            'supervisorId': 'T' + digits(randint(rng, 1000, 9999, n)),
+            'startDate': random_dates(rng, n, 2023, 2024),
+            'endDate': random_dates(rng, n, 2024, 2025),
+            'status': pick(rng, ['Active', 'Completed', 'Suspended'], n)
+        })
+
+    def generate_phd_supervision_data(self, student_ids=None, rng=None):
         """Generate PhD supervision data"""
-        phd_data = []
-        research_areas = [
-            'Machine Learning',
-            'Computer Vision',
-            'Natural Language Processing',
-            'Cybersecurity',
-            'Data Mining',
-            'Software Engineering'
-        ]
-        
-        print("🎓 Generating PhD supervision data...")
-        
+        student_ids, rng = self._ids_and_rng(student_ids, rng)
+
         # Only 10% of students might be PhD candidates
-        phd_students = random.sample(self.new_students, max(1, len(self.new_students) // 10))
-        
-        for student_id in phd_students:
-            phd_data.append({
-                'studentId': student_id,
-                'researchTitle': f"Advanced Study in {random.choice(research_areas)}",
-                'supervisorId': f"T{random.randint(1000, 9999)}",
-                'researchArea': random.choice(research_areas),
-                'startDate': self.generate_date(2022, 2023),
-                'expectedCompletion': self.generate_date(2025, 2027),
-                'status': random.choice(['Ongoing', 'Completed', 'Discontinued'])
-            })
-        
-        return pd.DataFrame(phd_data)
-    
-    def generate_fellowships_data(self):
+        students = subset(rng, student_ids, max(1, len(student_ids) // 10))
+        n = len(students)
+
+        return pd.DataFrame({
+            'studentId': students,
+            'researchTitle': 'Advanced Study in ' + pick(rng, RESEARCH_AREAS, n),
+            'supervisorId': 'T' + digits(randint(rng, 1000, 9999, n)),
+            'researchArea': pick(rng, RESEARCH_AREAS, n),
+            'startDate': random_dates(rng, n, 2022, 2023),
+            'expectedCompletion': random_dates(rng, n, 2025, 2027),
+            'status': pick(rng, ['Ongoing', 'Completed', 'Discontinued'], n)
+        })
+
+    def generate_fellowships_data(self, student_ids=None, rng=None):
         """Generate fellowships data"""
-        fellowship_data = []
-        
-        print("💼 Generating fellowships data...")
-        
+        student_ids, rng = self._ids_and_rng(student_ids, rng)
+
         # Only 15% of students might have fellowships
-        fellowship_students = random.sample(self.new_students, max(1, len(self.new_students) // 7))
-        
-        for student_id in fellowship_students:
-            fellowship_data.append({
-                'studentId': student_id,
-                'fellowshipType': random.choice(['Full Time', 'Part Time']),
-                'amount': random.randint(15000, 35000),
-                'startDate': self.generate_date(2023, 2024),
-                'endDate': self.generate_date(2024, 2025),
-                'status': random.choice(['Active', 'Completed', 'Terminated'])
-            })
-        
-        return pd.DataFrame(fellowship_data)
-    
-    def run(self, num_students=10):
-        """Generate all complement data"""
+        students = subset(rng, student_ids, max(1, len(student_ids) // 7))
+        n = len(students)
+
+        return pd.DataFrame({
+            'studentId': students,
+            'fellowshipType': pick(rng, ['Full Time', 'Part Time'], n),
+            'amount': randint(rng, 15000, 35000, n),
+            'startDate': random_dates(rng, n, 2023, 2024),
+            'endDate': random_dates(rng, n, 2024, 2025),
+            'status': pick(rng, ['Active', 'Completed', 'Terminated'], n)
+        })
+
+    def run(self, num_students=10, chunk_size=DEFAULT_CHUNK_SIZE, file_format='csv'):
+        """Generate all complement data, chunk_size students at a time, as csv, parquet or arrow files"""
         print("🚀 Starting complement data generation...")
-        
+
         # Create output directory
         self.output_dir.mkdir(exist_ok=True)
         print(f"✓ Created output directory: {self.output_dir}")
-        
+
         # Generate all data types
         data_generators = {
             'students_comprehensive_reduced_stratified.csv': self.generate_students_data,
@@ -286,34 +337,35 @@ class ComplementDataGenerator:
             'phd_supervision_comprehensive_reduced_stratified.csv': self.generate_phd_supervision_data,
             'fellowships_comprehensive_reduced_stratified.csv': self.generate_fellowships_data
         }
-        
-        # Generate students first
-        students_df = self.generate_students_data(num_students)
-        students_file = self.output_dir / 'students_comprehensive_reduced_stratified.csv'
-        students_df.to_csv(students_file, index=False)
-        print(f"✓ Generated {students_file.name} with {len(students_df)} records")
-        
-        # Generate other data types
-        for filename, generator_func in data_generators.items():
-            if filename != 'students_comprehensive_reduced_stratified.csv':
-                df = generator_func()
-                output_file = self.output_dir / filename
-                df.to_csv(output_file, index=False)
-                print(f"✓ Generated {filename} with {len(df)} records")
-        
+
+        # Reserve every new ID in one step, then generate the tables chunk by chunk
+        print(f"🎲 Seed: {self.seed}")
+        student_ids = np.asarray(self.allocate_student_ids(num_students), dtype=object)
+        with TableWriters(self.output_dir, file_format=file_format) as writers:
+            for shard, start in enumerate(range(0, num_students, chunk_size)):
+                chunk_ids = student_ids[start:start + chunk_size]
+                print(f"📝 Generating new students {start + 1}-{start + len(chunk_ids)}...")
+                rng = shard_rng(self.seed, shard)
+                for filename, generator_func in data_generators.items():
+                    writers.write(filename, generator_func(chunk_ids, rng))
+
+        for filename in data_generators:
+            print(f"✓ Generated {os.path.basename(writers.path(filename))} with {writers.rows(filename)} records")
+
         # Generate summary
         summary = {
             'generation_timestamp': datetime.now().isoformat(),
+            'seed': self.seed,
             'num_new_students': len(self.new_students),
             'new_student_ids': self.new_students,
             'output_directory': str(self.output_dir),
-            'files_generated': list(data_generators.keys())
+            'files_generated': [os.path.basename(writers.path(filename)) for filename in data_generators]
         }
-        
+
         summary_file = self.output_dir / 'generation_summary.json'
         with open(summary_file, 'w') as f:
             json.dump(summary, f, indent=2)
-        
+
         print(f"\n🎉 Complement data generation completed!")
         print(f"📂 Generated files in: {self.output_dir}")
         print(f"👥 Created {len(self.new_students)} new students")
@@ -321,15 +373,27 @@ class ComplementDataGenerator:
 
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description="Generate complement students and their records")
+    parser.add_argument('--format', choices=FORMATS, default='csv',
+                        help="Output file format; parquet and arrow need pyarrow")
+    args = parser.parse_args()
+
     # Configuration
     original_dir = "/home/aditya/SIH/edu-pulse/csv/final"
     filtered_dir = "/home/aditya/SIH/edu-pulse/csv/new_csv"
     output_dir = "/home/aditya/SIH/edu-pulse/csv/complement_data"
     num_students = 10
-    
+    chunk_size = DEFAULT_CHUNK_SIZE
+    seed = None
+    # New IDs are E5000-E9999; for more than a few thousand new students
+    # widen both, e.g. id_range = (10000, 999999) with id_width = 6
+    id_range = (5000, 9999)
+    id_width = 4
+
     # Generate complement data
-    generator = ComplementDataGenerator(original_dir, filtered_dir, output_dir)
-    generator.run(num_students)
+    generator = ComplementDataGenerator(original_dir, filtered_dir, output_dir, seed,
+                                        id_range=id_range, id_width=id_width)
+    generator.run(num_students, chunk_size, args.format)
 
 if __name__ == "__main__":
     main()
@@ -2,36 +2,67 @@
 """
 Script to generate and add missing data fields to CSV files for comprehensive student data.
 This script will create realistic random data for all missing fields to match the target JSON format.
+
+Students are processed in shards (--chunk-size) and each table is appended
+to its CSV shard by shard, so memory does not grow with the number of
+students. Every shard draws from its own numpy Generator and Faker seed
+derived from --seed and the shard index (see sharding.py), so shards can
+run on several processes (--workers) and still give byte-identical files.
+
+A shard holds every row of its students, so --ndjson can also write each
+student as one nested document (see student_export.py) without reading
+the CSVs back.
 """
 
+import argparse
 import pandas as pd
-import numpy as np
-import random
 from datetime import datetime, timedelta
+from functools import partial
 import os
 import json
 from faker import Faker
 
+from sharding import master_seed, run_shards, shard_faker_seed, shard_rng
+from student_export import encode_documents, shard_paths, student_documents
+from table_writer import DEFAULT_CHUNK_SIZE, FORMATS, TableWriters, encode_frame, output_name
+
 # Initialize Faker for generating realistic data
 fake = Faker('en_IN')  # Using Indian locale for realistic Indian data
 
-def generate_student_basic_info(student_ids):
+# Output file for each table
+OUTPUT_FILES = {
+    'students': 'students_comprehensive.csv',
+    'attendance': 'attendance_comprehensive.csv',
+    'test_scores': 'test_scores_comprehensive.csv',
+    'backlogs': 'backlogs_comprehensive.csv',
+    'fee_payments': 'fee_payments_comprehensive.csv',
+    'projects': 'projects_comprehensive.csv',
+    'phd_supervision': 'phd_supervision_comprehensive.csv',
+    'fellowships': 'fellowships_comprehensive.csv'
+}
+
+def pick(rng, values):
+    """Generator counterpart of random.choice"""
+    return values[rng.integers(len(values))]
+
+def randint(rng, low, high):
+    """Generator counterpart of random.randint, inclusive of high"""
+    return int(rng.integers(low, high + 1))
+
+def sample(rng, values, k):
+    """Generator counterpart of random.sample"""
+    return [values[i] for i in rng.choice(len(values), k, replace=False)]
+
+def generate_student_basic_info(student_ids, rng):
     """Generate basic student information"""
     students = []
     departments = ['CSE', 'ECE', 'ME', 'CE', 'EEE', 'IT', 'AI', 'DS']
     current_year = datetime.now().year
     
     for student_id in student_ids:
-        # Extract numeric part from student ID (e.g., E0001 -> 1)
-        numeric_id = int(student_id[1:]) if student_id.startswith('E') else random.randint(1, 9999)
-        
-        # Generate consistent data based on student ID
-        random.seed(numeric_id)
-        np.random.seed(numeric_id)
-        
-        dept = random.choice(departments)
-        admission_year = random.choice([2020, 2021, 2022, 2023, 2024])
-        current_semester = min(8, (current_year - admission_year) * 2 + random.choice([1, 2]))
+        dept = pick(rng, departments)
+        admission_year = pick(rng, [2020, 2021, 2022, 2023, 2024])
+        current_semester = min(8, (current_year - admission_year) * 2 + pick(rng, [1, 2]))
         
         student = {
             'studentId': student_id,
@@ -41,7 +72,7 @@ def generate_student_basic_info(student_ids):
             'currentSemester': current_semester,
             'department': dept,
             'phone': fake.phone_number()[:10],  # Ensure 10 digits
-            'batchId': f"{dept}{admission_year}{random.choice(['A', 'B', 'C'])}",
+            'batchId': f"{dept}{admission_year}{pick(rng, ['A', 'B', 'C'])}",
             'parentName': fake.name(),
             'parentEmail': fake.email(),
             'parentPhone': fake.phone_number()[:10],
@@ -51,22 +82,20 @@ def generate_student_basic_info(student_ids):
     
     return students
 
-def generate_attendance_data(student_ids, course_ids):
+def generate_student_courses(student_ids, course_ids, rng):
+    """Each student's 3-4 courses, shared by their attendance and test scores"""
+    return [sample(rng, course_ids, randint(rng, 3, min(4, len(course_ids)))) for _ in student_ids]
+
+def generate_attendance_data(student_ids, student_courses, rng):
     """Generate monthly attendance data"""
     attendance_data = []
     months = ['2024-01', '2024-02', '2024-03', '2024-04', '2024-05', '2024-06',
               '2024-07', '2024-08', '2024-09', '2024-10', '2024-11', '2024-12']
     
-    for student_id in student_ids:
-        numeric_id = int(student_id[1:]) if student_id.startswith('E') else random.randint(1, 9999)
-        random.seed(numeric_id)
-        
-        # Each student has attendance for 3-4 courses
-        student_courses = random.sample(course_ids, random.randint(3, min(4, len(course_ids))))
-        
-        for course_id in student_courses:
-            for month in random.sample(months, random.randint(6, 10)):  # 6-10 months of data
-                attendance_percent = round(random.uniform(60, 100), 1)
+    for student_id, courses in zip(student_ids, student_courses):
+        for course_id in courses:
+            for month in sample(rng, months, randint(rng, 6, 10)):  # 6-10 months of data
+                attendance_percent = round(rng.uniform(60, 100), 1)
                 attendance_data.append({
                     'studentId': student_id,
                     'courseId': course_id,
@@ -76,21 +105,16 @@ def generate_attendance_data(student_ids, course_ids):
     
     return attendance_data
 
-def generate_test_scores(student_ids, course_ids):
+def generate_test_scores(student_ids, student_courses, rng):
     """Generate test score data"""
     test_data = []
     test_types = ['Quiz_1', 'Quiz_2', 'Quiz_3', 'Midterm', 'Final']
     
-    for student_id in student_ids:
-        numeric_id = int(student_id[1:]) if student_id.startswith('E') else random.randint(1, 9999)
-        random.seed(numeric_id)
-        
-        student_courses = random.sample(course_ids, random.randint(3, min(4, len(course_ids))))
-        
-        for course_id in student_courses:
+    for student_id, courses in zip(student_ids, student_courses):
+        for course_id in courses:
             for test_type in test_types:
                 test_date = fake.date_between(start_date='-1y', end_date='today').strftime('%Y-%m-%d')
-                score = round(random.uniform(20, 100), 1)
+                score = round(rng.uniform(20, 100), 1)
                 test_data.append({
                     'studentId': student_id,
                     'courseId': course_id,
@@ -101,22 +125,19 @@ def generate_test_scores(student_ids, course_ids):
     
     return test_data
 
-def generate_backlogs(student_ids, course_ids):
+def generate_backlogs(student_ids, course_ids, rng):
     """Generate backlog data"""
     backlog_data = []
     
     for student_id in student_ids:
-        numeric_id = int(student_id[1:]) if student_id.startswith('E') else random.randint(1, 9999)
-        random.seed(numeric_id)
-        
         # 30% chance of having backlogs
-        if random.random() < 0.3:
-            num_backlogs = random.randint(1, 3)
-            backlog_courses = random.sample(course_ids, min(num_backlogs, len(course_ids)))
+        if rng.random() < 0.3:
+            num_backlogs = randint(rng, 1, 3)
+            backlog_courses = sample(rng, course_ids, min(num_backlogs, len(course_ids)))
             
             for course_id in backlog_courses:
-                attempts = random.randint(1, 4)
-                cleared = random.choice([True, False]) if attempts > 1 else False
+                attempts = randint(rng, 1, 4)
+                cleared = pick(rng, [True, False]) if attempts > 1 else False
                 backlog_data.append({
                     'studentId': student_id,
                     'courseId': course_id,
@@ -126,21 +147,18 @@ def generate_backlogs(student_ids, course_ids):
     
     return backlog_data
 
-def generate_fee_payments(student_ids):
+def generate_fee_payments(student_ids, rng):
     """Generate fee payment data"""
     fee_data = []
     
     for student_id in student_ids:
-        numeric_id = int(student_id[1:]) if student_id.startswith('E') else random.randint(1, 9999)
-        random.seed(numeric_id)
-        
         # Generate 4-8 fee payments (semester fees)
-        for i in range(random.randint(4, 8)):
+        for i in range(randint(rng, 4, 8)):
             due_date = fake.date_between(start_date='-2y', end_date='+6m')
             
             # 80% chance of being paid
-            if random.random() < 0.8:
-                paid_date = due_date + timedelta(days=random.randint(-5, 30))
+            if rng.random() < 0.8:
+                paid_date = due_date + timedelta(days=randint(rng, -5, 30))
                 status = 'Paid'
                 due_months = max(0, (paid_date - due_date).days // 30)
             else:
@@ -154,12 +172,12 @@ def generate_fee_payments(student_ids):
                 'paidDate': paid_date.strftime('%Y-%m-%d') if paid_date else '',
                 'status': status,
                 'dueMonths': due_months,
-                'amount': random.choice([50000, 75000, 100000, 125000])  # Semester fee amounts
+                'amount': pick(rng, [50000, 75000, 100000, 125000])  # Semester fee amounts
             })
     
     return fee_data
 
-def generate_projects(student_ids):
+def generate_projects(student_ids, rng):
     """Generate project data"""
     project_data = []
     project_titles = [
@@ -170,17 +188,14 @@ def generate_projects(student_ids):
     ]
     
     for student_id in student_ids:
-        numeric_id = int(student_id[1:]) if student_id.startswith('E') else random.randint(1, 9999)
-        random.seed(numeric_id)
-        
         # 70% chance of having projects
-        if random.random() < 0.7:
-            num_projects = random.randint(1, 3)
+        if rng.random() < 0.7:
+            num_projects = randint(rng, 1, 3)
             
             for i in range(num_projects):
-                title = random.choice(project_titles)
+                title = pick(rng, project_titles)
                 start_date = fake.date_between(start_date='-1y', end_date='today')
-                status = random.choice(['Active', 'Completed', 'On Hold'])
+                status = pick(rng, ['Active', 'Completed', 'On Hold'])
                 
                 project_data.append({
                     'studentId': student_id,
@@ -188,12 +203,12 @@ def generate_projects(student_ids):
                     'description': f"Comprehensive {title.lower()} implementation with modern technologies",
                     'startDate': start_date.strftime('%Y-%m-%d'),
                     'status': status,
-                    'supervisorId': f"T{random.randint(1001, 1050)}"  # Teacher ID
+                    'supervisorId': f"T{randint(rng, 1001, 1050)}"  # Teacher ID
                 })
     
     return project_data
 
-def generate_phd_supervision(student_ids):
+def generate_phd_supervision(student_ids, rng):
     """Generate PhD supervision data (for PhD students only)"""
     phd_data = []
     research_areas = [
@@ -203,49 +218,43 @@ def generate_phd_supervision(student_ids):
     ]
     
     for student_id in student_ids:
-        numeric_id = int(student_id[1:]) if student_id.startswith('E') else random.randint(1, 9999)
-        random.seed(numeric_id)
-        
         # Only 5% chance of being PhD student
-        if random.random() < 0.05:
+        if rng.random() < 0.05:
             start_date = fake.date_between(start_date='-3y', end_date='-1y')
-            expected_end = start_date + timedelta(days=random.randint(1095, 1825))  # 3-5 years
+            expected_end = start_date + timedelta(days=randint(rng, 1095, 1825))  # 3-5 years
             
             phd_data.append({
                 'studentId': student_id,
-                'title': f"Research in {random.choice(research_areas)}",
-                'researchArea': random.choice(research_areas),
+                'title': f"Research in {pick(rng, research_areas)}",
+                'researchArea': pick(rng, research_areas),
                 'startDate': start_date.strftime('%Y-%m-%d'),
                 'expectedEnd': expected_end.strftime('%Y-%m-%d'),
-                'supervisorId': f"T{random.randint(1001, 1020)}",  # Senior faculty
-                'status': random.choice(['Ongoing', 'Completed', 'Discontinued'])
+                'supervisorId': f"T{randint(rng, 1001, 1020)}",  # Senior faculty
+                'status': pick(rng, ['Ongoing', 'Completed', 'Discontinued'])
             })
     
     return phd_data
 
-def generate_fellowships(student_ids):
+def generate_fellowships(student_ids, rng):
     """Generate fellowship data"""
     fellowship_data = []
     fellowship_types = ['Full Time', 'Part Time', 'Research', 'Teaching Assistant']
     
     for student_id in student_ids:
-        numeric_id = int(student_id[1:]) if student_id.startswith('E') else random.randint(1, 9999)
-        random.seed(numeric_id)
-        
         # 15% chance of having fellowship
-        if random.random() < 0.15:
-            fellowship_type = random.choice(fellowship_types)
+        if rng.random() < 0.15:
+            fellowship_type = pick(rng, fellowship_types)
             
             # Amount based on type
             if fellowship_type == 'Full Time':
-                amount = random.randint(25000, 35000)
+                amount = randint(rng, 25000, 35000)
             elif fellowship_type == 'Part Time':
-                amount = random.randint(12000, 18000)
+                amount = randint(rng, 12000, 18000)
             else:
-                amount = random.randint(15000, 25000)
+                amount = randint(rng, 15000, 25000)
             
             start_date = fake.date_between(start_date='-1y', end_date='today')
-            duration = random.choice([6, 12, 18, 24])  # months
+            duration = pick(rng, [6, 12, 18, 24])  # months
             
             fellowship_data.append({
                 'studentId': student_id,
@@ -253,18 +262,75 @@ def generate_fellowships(student_ids):
                 'amount': amount,
                 'duration': duration,
                 'startDate': start_date.strftime('%Y-%m-%d'),
-                'status': random.choice(['Active', 'Completed', 'Terminated'])
+                'status': pick(rng, ['Active', 'Completed', 'Terminated'])
             })
     
     return fellowship_data
 
-def create_comprehensive_csv_files():
+def generate_chunk(student_ids, course_ids, rng):
+    """Generate every table for one chunk of students, as lists of records"""
+    student_courses = generate_student_courses(student_ids, course_ids, rng)
+    return {
+        'students': generate_student_basic_info(student_ids, rng),
+        'attendance': generate_attendance_data(student_ids, student_courses, rng),
+        'test_scores': generate_test_scores(student_ids, student_courses, rng),
+        'backlogs': generate_backlogs(student_ids, course_ids, rng),
+        'fee_payments': generate_fee_payments(student_ids, rng),
+        'projects': generate_projects(student_ids, rng),
+        'phd_supervision': generate_phd_supervision(student_ids, rng),
+        'fellowships': generate_fellowships(student_ids, rng)
+    }
+
+# Rows of each nested list kept in sample_student_structure.json
+SAMPLE_ROWS = {
+    'attendance': 3,
+    'testScores': 3,
+    'backlogs': 2,
+    'feePayments': 3,
+    'projects': 2,
+    'phdSupervision': 1,
+    'fellowships': 1
+}
+
+def sample_structure(documents):
+    """The first student document with a few of their rows from each table"""
+    sample = next(iter(documents), {})
+    return {key: value[:SAMPLE_ROWS[key]] if key in SAMPLE_ROWS else value for key, value in sample.items()}
+
+def generate_shard(shard, student_ids, course_ids, seed, ndjson_shards=0, file_format='csv'):
+    """
+    Generate and render one shard from its own Generator and Faker seed, so
+    the result is the same whichever process builds it. Returns the encoded
+    tables, the NDJSON text of each output file when ndjson_shards is set,
+    and for the first shard the sample JSON structure.
+    """
+    rng = shard_rng(seed, shard)
+    fake.seed_instance(shard_faker_seed(seed, shard))
+    tables = generate_chunk(student_ids, course_ids, rng)
+    # Tables without any rows are not written, as before
+    encoded = {table: encode_frame(pd.DataFrame(records), file_format) for table, records in tables.items() if records}
+    # A shard holds every row of its students, so it nests into complete documents
+    documents = list(student_documents(tables)) if ndjson_shards else []
+    ndjson = encode_documents(documents, ndjson_shards) if ndjson_shards else []
+    sample = None
+    if shard == 0:
+        if not documents:
+            # Only the sample is needed: nest just the shard's first student
+            first = {row['studentId'] for row in tables['students'][:1]}
+            documents = student_documents({table: [row for row in rows if row['studentId'] in first]
+                                           for table, rows in tables.items()})
+        sample = sample_structure(documents)
+    return encoded, ndjson, sample
+
+def create_comprehensive_csv_files(chunk_size=DEFAULT_CHUNK_SIZE, num_students=1000, seed=None, workers=1,
+                                   ndjson=None, ndjson_shards=1, file_format='csv'):
     """Main function to create all CSV files with comprehensive data"""
     
     print("🚀 Starting comprehensive data generation...")
     
     # Read existing student IDs from any existing file
     student_ids = []
+    default_ids = [f"E{str(i).zfill(4)}" for i in range(1, num_students + 1)]
     
     # Try to read from existing files to get student IDs
     try:
@@ -277,76 +343,41 @@ def create_comprehensive_csv_files():
         
         if not student_ids:
             # Generate default student IDs
-            student_ids = [f"E{str(i).zfill(4)}" for i in range(1, 1001)]
+            student_ids = default_ids
             
     except Exception as e:
         print(f"⚠️  Could not read existing files: {e}")
-        student_ids = [f"E{str(i).zfill(4)}" for i in range(1, 1001)]
+        student_ids = default_ids
     
-    print(f"📊 Generating data for {len(student_ids)} students...")
+    seed = master_seed(seed)
+    print(f"📊 Generating data for {len(student_ids)} students in shards of {chunk_size} "
+          f"(seed {seed}, {workers} worker(s))...")
     
     # Define course IDs
     course_ids = ['CSET243', 'CSET240', 'CSET211', 'CSET201', 'MATH201', 'PHY101', 'CHEM101', 'ENG101']
     
-    # Generate all data
-    print("👤 Generating student basic information...")
-    students_data = generate_student_basic_info(student_ids)
-    students_df = pd.DataFrame(students_data)
-    students_df.to_csv('students_comprehensive.csv', index=False)
-    
-    print("📅 Generating attendance data...")
-    attendance_data = generate_attendance_data(student_ids, course_ids)
-    attendance_df = pd.DataFrame(attendance_data)
-    attendance_df.to_csv('attendance_comprehensive.csv', index=False)
-    
-    print("📝 Generating test scores...")
-    test_data = generate_test_scores(student_ids, course_ids)
-    test_df = pd.DataFrame(test_data)
-    test_df.to_csv('test_scores_comprehensive.csv', index=False)
-    
-    print("📚 Generating backlogs data...")
-    backlog_data = generate_backlogs(student_ids, course_ids)
-    if backlog_data:
-        backlog_df = pd.DataFrame(backlog_data)
-        backlog_df.to_csv('backlogs_comprehensive.csv', index=False)
-    
-    print("💰 Generating fee payments...")
-    fee_data = generate_fee_payments(student_ids)
-    fee_df = pd.DataFrame(fee_data)
-    fee_df.to_csv('fee_payments_comprehensive.csv', index=False)
-    
-    print("🔬 Generating projects data...")
-    project_data = generate_projects(student_ids)
-    if project_data:
-        project_df = pd.DataFrame(project_data)
-        project_df.to_csv('projects_comprehensive.csv', index=False)
-    
-    print("🎓 Generating PhD supervision data...")
-    phd_data = generate_phd_supervision(student_ids)
-    if phd_data:
-        phd_df = pd.DataFrame(phd_data)
-        phd_df.to_csv('phd_supervision_comprehensive.csv', index=False)
-    
-    print("💼 Generating fellowships data...")
-    fellowship_data = generate_fellowships(student_ids)
-    if fellowship_data:
-        fellowship_df = pd.DataFrame(fellowship_data)
-        fellowship_df.to_csv('fellowships_comprehensive.csv', index=False)
-    
-    # Create a sample JSON structure
+    # Generate shards in parallel and append them in student ID order
+    shards = [student_ids[start:start + chunk_size] for start in range(0, len(student_ids), chunk_size)]
+    build = partial(generate_shard, course_ids=course_ids, seed=seed, ndjson_shards=ndjson_shards if ndjson else 0,
+                    file_format=file_format)
+    sample_json = {}
+    ndjson_files = [open(path, 'w', encoding='utf-8') for path in shard_paths(ndjson, ndjson_shards)] if ndjson else []
+    try:
+        with TableWriters('.', OUTPUT_FILES, file_format) as writers:
+            for shard_ids, (encoded, documents, sample) in zip(shards, run_shards(build, shards, workers)):
+                print(f"👤 Generated students {shard_ids[0]}-{shard_ids[-1]}")
+                for table, chunk in encoded.items():
+                    writers.write_encoded(table, chunk)
+                for ndjson_file, text in zip(ndjson_files, documents):
+                    ndjson_file.write(text)
+                if sample is not None:
+                    sample_json = sample
+    finally:
+        for ndjson_file in ndjson_files:
+            ndjson_file.close()
+    
+    # Save the sample JSON structure of the first student
     print("📋 Creating sample JSON structure...")
-    sample_student = students_data[0] if students_data else {}
-    sample_json = {
-        **sample_student,
-        "attendance": [att for att in attendance_data if att['studentId'] == sample_student.get('studentId', '')][:3],
-        "testScores": [test for test in test_data if test['studentId'] == sample_student.get('studentId', '')][:3],
-        "backlogs": [bl for bl in backlog_data if bl['studentId'] == sample_student.get('studentId', '')][:2],
-        "feePayments": [fee for fee in fee_data if fee['studentId'] == sample_student.get('studentId', '')][:3],
-        "projects": [proj for proj in project_data if proj['studentId'] == sample_student.get('studentId', '')][:2],
-        "phdSupervision": [phd for phd in phd_data if phd['studentId'] == sample_student.get('studentId', '')][:1],
-        "fellowships": [fel for fel in fellowship_data if fel['studentId'] == sample_student.get('studentId', '')][:1]
-    }
-    
     with open('sample_student_structure.json', 'w') as f:
         json.dump(sample_json, f, indent=2)
     
@@ -354,26 +385,38 @@ def create_comprehensive_csv_files():
     print("\n" + "="*60)
     print("📊 DATA GENERATION SUMMARY")
     print("="*60)
-    print(f"✅ Students: {len(students_data)}")
-    print(f"✅ Attendance Records: {len(attendance_data)}")
-    print(f"✅ Test Scores: {len(test_data)}")
-    print(f"✅ Backlogs: {len(backlog_data)}")
-    print(f"✅ Fee Payments: {len(fee_data)}")
-    print(f"✅ Projects: {len(project_data)}")
-    print(f"✅ PhD Supervisions: {len(phd_data)}")
-    print(f"✅ Fellowships: {len(fellowship_data)}")
+    print(f"✅ Students: {writers.rows('students')}")
+    print(f"✅ Attendance Records: {writers.rows('attendance')}")
+    print(f"✅ Test Scores: {writers.rows('test_scores')}")
+    print(f"✅ Backlogs: {writers.rows('backlogs')}")
+    print(f"✅ Fee Payments: {writers.rows('fee_payments')}")
+    print(f"✅ Projects: {writers.rows('projects')}")
+    print(f"✅ PhD Supervisions: {writers.rows('phd_supervision')}")
+    print(f"✅ Fellowships: {writers.rows('fellowships')}")
     print("="*60)
     print("🎉 All comprehensive CSV files generated successfully!")
     print("\nFiles created:")
-    print("- students_comprehensive.csv")
-    print("- attendance_comprehensive.csv") 
-    print("- test_scores_comprehensive.csv")
-    print("- backlogs_comprehensive.csv")
-    print("- fee_payments_comprehensive.csv")
-    print("- projects_comprehensive.csv")
-    print("- phd_supervision_comprehensive.csv")
-    print("- fellowships_comprehensive.csv")
+    for filename in OUTPUT_FILES.values():
+        print(f"- {output_name(filename, file_format)}")
     print("- sample_student_structure.json")
+    for path in shard_paths(ndjson, ndjson_shards) if ndjson else []:
+        print(f"- {path}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the comprehensive student CSV files")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Students generated and written per chunk (shard)")
+    parser.add_argument('--students', type=int, default=1000,
+                        help="Number of default IDs (E0001...) when no student_personas.csv or grade_final.csv is found")
+    parser.add_argument('--seed', type=int, help="Master seed; the same seed gives the same files for any --workers")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Processes generating shards in parallel")
+    parser.add_argument('--ndjson', help="Also write one nested document per student to this NDJSON file")
+    parser.add_argument('--ndjson-shards', type=int, default=1, help="Spread the NDJSON documents over this many files")
+    parser.add_argument('--format', choices=FORMATS, default='csv',
+                        help="Output file format for the tables; parquet and arrow need pyarrow")
+    args = parser.parse_args()
+    create_comprehensive_csv_files(args.chunk_size, args.students, args.seed, args.workers,
+                                   args.ndjson, args.ndjson_shards, args.format)
 
 if __name__ == "__main__":
-    create_comprehensive_csv_files()
+    main()
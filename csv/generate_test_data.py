@@ -2,22 +2,34 @@
 """
 Comprehensive CSV Data Generator for EduPulse Test Data
 Generates all CSV files with student IDs starting from 10000
+
+    python generate_test_data.py
+    python generate_test_data.py --scale --students 1000000 --seed 7 --output-dir /data/load-test
+    python generate_test_data.py --scale --students 5000000 --chunk-size 20000 --workers 8
 """
 
+import argparse
 import csv
 import random
 import os
+import time
 from datetime import datetime, timedelta
+from functools import partial
 from faker import Faker
+import numpy as np
 import pandas as pd
 
+from sharding import master_seed, run_shards, shard_rng
+from table_writer import DEFAULT_CHUNK_SIZE, EXTENSIONS, FORMATS, TableWriters, chunk_ranges, encode_tables
+
 # Initialize Faker
 fake = Faker('en_IN')  # Indian locale for realistic Indian names and addresses
 
-# Create test directory if it doesn't exist
+# Output directory, created by main()
 TEST_DIR = 'test'
-if not os.path.exists(TEST_DIR):
-    os.makedirs(TEST_DIR)
+
+# csv, parquet or arrow (see table_writer.py), set by main()
+OUTPUT_FORMAT = 'csv'
 
 # Configuration
 STUDENT_ID_START = 10000
@@ -116,6 +128,60 @@ CHALLENGE_TYPES = ['Mindfulness', 'Exercise', 'Sleep', 'Social', 'Academic']
 CHALLENGE_STATUS = ['Active', 'Completed', 'Abandoned']
 COUNSELOR_NAMES = ['Dr. Priya Sharma', 'Dr. Rajesh Kumar', 'Dr. Anita Patel', 'Dr. Suresh Reddy', 'Dr. Meera Singh']
 
+ATTENDANCE_MONTHS = ['2024-01', '2024-02', '2024-03', '2024-04', '2024-05', '2024-06',
+                     '2024-07', '2024-08', '2024-09', '2024-10', '2024-11', '2024-12']
+
+# Monthly fellowship amount range by type
+FELLOWSHIP_AMOUNTS = {
+    'Full Time': (25000, 40000),
+    'Part Time': (12000, 20000),
+    'Research': (15000, 25000),
+    'Teaching Assistant': (18000, 28000)
+}
+
+CHALLENGE_TITLES = {
+    'Mindfulness': ['Daily Meditation', '10-Minute Mindfulness', 'Breathing Exercises', 'Gratitude Journal'],
+    'Exercise': ['30-Day Fitness', 'Daily Walk Challenge', 'Yoga Practice', 'Sports Activity'],
+    'Sleep': ['Sleep Schedule', 'Digital Detox Before Bed', '8-Hour Sleep Challenge', 'Relaxation Routine'],
+    'Social': ['Connect with Friends', 'Join Study Groups', 'Community Service', 'Social Activities'],
+    'Academic': ['Study Schedule', 'Time Management', 'Goal Setting', 'Skill Development']
+}
+
+TICKET_SUBJECTS = {
+    'Academic': ['Course Registration Issues', 'Grade Concerns', 'Assignment Help', 'Exam Anxiety'],
+    'Personal': ['Stress Management', 'Relationship Issues', 'Family Problems', 'Self-Esteem'],
+    'Financial': ['Fee Payment Issues', 'Scholarship Questions', 'Financial Aid', 'Emergency Funds'],
+    'Health': ['Medical Leave', 'Disability Support', 'Mental Health Resources', 'Health Insurance'],
+    'Other': ['Housing Issues', 'Transportation', 'Technology Problems', 'General Inquiry']
+}
+
+# Output file for each table
+OUTPUT_FILES = {
+    'students': 'students_comprehensive_reduced_stratified.csv',
+    'attendance': 'attendance_comprehensive_reduced_stratified.csv',
+    'test_scores': 'test_scores_comprehensive_reduced_stratified.csv',
+    'backlogs': 'backlogs_comprehensive_reduced_stratified.csv',
+    'fee_payments': 'fee_payments_comprehensive_reduced_stratified.csv',
+    'projects': 'projects_comprehensive_reduced_stratified.csv',
+    'phd_supervision': 'phd_supervision_comprehensive_reduced_stratified.csv',
+    'fellowships': 'fellowships_comprehensive_reduced_stratified.csv',
+    'mental_health_assessments': 'mental_health_assessments.csv',
+    'counseling_appointments': 'counseling_appointments.csv',
+    'wellness_challenges': 'wellness_challenges.csv',
+    'support_tickets': 'support_tickets.csv'
+}
+
+def write_records(table, records, fieldnames):
+    """Write one table's rows to its file in OUTPUT_FORMAT"""
+    if OUTPUT_FORMAT == 'csv':
+        with open(os.path.join(TEST_DIR, OUTPUT_FILES[table]), 'w', newline='', encoding='utf-8') as file:
+            writer = csv.DictWriter(file, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(records)
+    else:
+        with TableWriters(TEST_DIR, OUTPUT_FILES, OUTPUT_FORMAT) as writers:
+            writers.write(table, pd.DataFrame(records, columns=fieldnames))
+
 def generate_student_id(index):
     """Generate student ID starting from 10000"""
     return f"E{STUDENT_ID_START + index}"
@@ -162,11 +228,8 @@ def generate_students_csv():
         }
         students.append(student)
     
-    # Write to CSV
-    with open(f'{TEST_DIR}/students_comprehensive_reduced_stratified.csv', 'w', newline='', encoding='utf-8') as file:
-        writer = csv.DictWriter(file, fieldnames=students[0].keys())
-        writer.writeheader()
-        writer.writerows(students)
+    # Write in the output format
+    write_records('students', students, list(students[0].keys()))
     
     return students
 
@@ -175,8 +238,6 @@ def generate_attendance_csv(students):
     print("Generating attendance CSV...")
     
     attendance_records = []
-    months = ['2024-01', '2024-02', '2024-03', '2024-04', '2024-05', '2024-06',
-              '2024-07', '2024-08', '2024-09', '2024-10', '2024-11', '2024-12']
     
     for student in students:
         dept = student['department']
@@ -184,7 +245,7 @@ def generate_attendance_csv(students):
         
         # Generate attendance for random courses and months
         for course in random.sample(courses, random.randint(2, 4)):
-            for month in random.sample(months, random.randint(3, 8)):
+            for month in random.sample(ATTENDANCE_MONTHS, random.randint(3, 8)):
                 attendance = {
                     'studentId': student['studentId'],
                     'courseId': course,
@@ -193,11 +254,8 @@ def generate_attendance_csv(students):
                 }
                 attendance_records.append(attendance)
     
-    # Write to CSV
-    with open(f'{TEST_DIR}/attendance_comprehensive_reduced_stratified.csv', 'w', newline='', encoding='utf-8') as file:
-        writer = csv.DictWriter(file, fieldnames=['studentId', 'courseId', 'month', 'attendancePercent'])
-        writer.writeheader()
-        writer.writerows(attendance_records)
+    # Write in the output format
+    write_records('attendance', attendance_records, ['studentId', 'courseId', 'month', 'attendancePercent'])
 
 def generate_test_scores_csv(students):
     """Generate test scores CSV file"""
@@ -224,11 +282,8 @@ def generate_test_scores_csv(students):
                 }
                 test_records.append(test_record)
     
-    # Write to CSV
-    with open(f'{TEST_DIR}/test_scores_comprehensive_reduced_stratified.csv', 'w', newline='', encoding='utf-8') as file:
-        writer = csv.DictWriter(file, fieldnames=['studentId', 'courseId', 'testType', 'testDate', 'score'])
-        writer.writeheader()
-        writer.writerows(test_records)
+    # Write in the output format
+    write_records('test_scores', test_records, ['studentId', 'courseId', 'testType', 'testDate', 'score'])
 
 def generate_backlogs_csv(students):
     """Generate backlogs CSV file"""
@@ -253,11 +308,8 @@ def generate_backlogs_csv(students):
             }
             backlog_records.append(backlog)
     
-    # Write to CSV
-    with open(f'{TEST_DIR}/backlogs_comprehensive_reduced_stratified.csv', 'w', newline='', encoding='utf-8') as file:
-        writer = csv.DictWriter(file, fieldnames=['studentId', 'courseId', 'attempts', 'cleared'])
-        writer.writeheader()
-        writer.writerows(backlog_records)
+    # Write in the output format
+    write_records('backlogs', backlog_records, ['studentId', 'courseId', 'attempts', 'cleared'])
 
 def generate_fee_payments_csv(students):
     """Generate fee payments CSV file"""
@@ -290,11 +342,8 @@ def generate_fee_payments_csv(students):
             }
             fee_records.append(fee_record)
     
-    # Write to CSV
-    with open(f'{TEST_DIR}/fee_payments_comprehensive_reduced_stratified.csv', 'w', newline='', encoding='utf-8') as file:
-        writer = csv.DictWriter(file, fieldnames=['studentId', 'dueDate', 'paidDate', 'status', 'dueMonths', 'amount'])
-        writer.writeheader()
-        writer.writerows(fee_records)
+    # Write in the output format
+    write_records('fee_payments', fee_records, ['studentId', 'dueDate', 'paidDate', 'status', 'dueMonths', 'amount'])
 
 def generate_projects_csv(students):
     """Generate projects CSV file"""
@@ -325,11 +374,8 @@ def generate_projects_csv(students):
             }
             project_records.append(project)
     
-    # Write to CSV
-    with open(f'{TEST_DIR}/projects_comprehensive_reduced_stratified.csv', 'w', newline='', encoding='utf-8') as file:
-        writer = csv.DictWriter(file, fieldnames=['studentId', 'title', 'description', 'startDate', 'status', 'supervisorId'])
-        writer.writeheader()
-        writer.writerows(project_records)
+    # Write in the output format
+    write_records('projects', project_records, ['studentId', 'title', 'description', 'startDate', 'status', 'supervisorId'])
 
 def generate_phd_supervision_csv(students):
     """Generate PhD supervision CSV file"""
@@ -357,11 +403,8 @@ def generate_phd_supervision_csv(students):
         }
         phd_records.append(phd_record)
     
-    # Write to CSV
-    with open(f'{TEST_DIR}/phd_supervision_comprehensive_reduced_stratified.csv', 'w', newline='', encoding='utf-8') as file:
-        writer = csv.DictWriter(file, fieldnames=['studentId', 'title', 'researchArea', 'startDate', 'expectedEnd', 'supervisorId', 'status'])
-        writer.writeheader()
-        writer.writerows(phd_records)
+    # Write in the output format
+    write_records('phd_supervision', phd_records, ['studentId', 'title', 'researchArea', 'startDate', 'expectedEnd', 'supervisorId', 'status'])
 
 def generate_fellowships_csv(students):
     """Generate fellowships CSV file"""
@@ -378,14 +421,7 @@ def generate_fellowships_csv(students):
         start_date = fake.date_between(start_date='-2y', end_date='today')
         
         # Amount varies by type
-        if fellowship_type == 'Full Time':
-            amount = random.randint(25000, 40000)
-        elif fellowship_type == 'Part Time':
-            amount = random.randint(12000, 20000)
-        elif fellowship_type == 'Research':
-            amount = random.randint(15000, 25000)
-        else:  # Teaching Assistant
-            amount = random.randint(18000, 28000)
+        amount = random.randint(*FELLOWSHIP_AMOUNTS[fellowship_type])
         
         fellowship = {
             'studentId': student['studentId'],
@@ -397,11 +433,8 @@ def generate_fellowships_csv(students):
         }
         fellowship_records.append(fellowship)
     
-    # Write to CSV
-    with open(f'{TEST_DIR}/fellowships_comprehensive_reduced_stratified.csv', 'w', newline='', encoding='utf-8') as file:
-        writer = csv.DictWriter(file, fieldnames=['studentId', 'type', 'amount', 'duration', 'startDate', 'status'])
-        writer.writeheader()
-        writer.writerows(fellowship_records)
+    # Write in the output format
+    write_records('fellowships', fellowship_records, ['studentId', 'type', 'amount', 'duration', 'startDate', 'status'])
 
 def generate_mental_health_assessments_csv(students):
     """Generate mental health assessments CSV file"""
@@ -452,13 +485,9 @@ def generate_mental_health_assessments_csv(students):
             }
             assessment_records.append(assessment)
     
-    # Write to CSV
-    with open(f'{TEST_DIR}/mental_health_assessments.csv', 'w', newline='', encoding='utf-8') as file:
-        fieldnames = ['studentId', 'assessmentDate', 'stressLevel', 'anxietyLevel', 'depressionLevel', 
-                     'sleepQuality', 'academicPressure', 'socialSupport', 'overallWellness', 'notes', 'riskScore']
-        writer = csv.DictWriter(file, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(assessment_records)
+    # Write in the output format
+    write_records('mental_health_assessments', assessment_records, ['studentId', 'assessmentDate', 'stressLevel', 'anxietyLevel', 'depressionLevel', 
+                                        'sleepQuality', 'academicPressure', 'socialSupport', 'overallWellness', 'notes', 'riskScore'])
 
 def generate_counseling_appointments_csv(students):
     """Generate counseling appointments CSV file"""
@@ -493,12 +522,8 @@ def generate_counseling_appointments_csv(students):
             }
             appointment_records.append(appointment)
     
-    # Write to CSV
-    with open(f'{TEST_DIR}/counseling_appointments.csv', 'w', newline='', encoding='utf-8') as file:
-        fieldnames = ['studentId', 'counselorName', 'appointmentDate', 'duration', 'type', 'status', 'notes', 'followUpNeeded']
-        writer = csv.DictWriter(file, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(appointment_records)
+    # Write in the output format
+    write_records('counseling_appointments', appointment_records, ['studentId', 'counselorName', 'appointmentDate', 'duration', 'type', 'status', 'notes', 'followUpNeeded'])
 
 def generate_wellness_challenges_csv(students):
     """Generate wellness challenges CSV file"""
@@ -509,21 +534,13 @@ def generate_wellness_challenges_csv(students):
     # About 50% of students participate in wellness challenges
     students_with_challenges = random.sample(students, int(NUM_STUDENTS * 0.5))
     
-    challenge_titles = {
-        'Mindfulness': ['Daily Meditation', '10-Minute Mindfulness', 'Breathing Exercises', 'Gratitude Journal'],
-        'Exercise': ['30-Day Fitness', 'Daily Walk Challenge', 'Yoga Practice', 'Sports Activity'],
-        'Sleep': ['Sleep Schedule', 'Digital Detox Before Bed', '8-Hour Sleep Challenge', 'Relaxation Routine'],
-        'Social': ['Connect with Friends', 'Join Study Groups', 'Community Service', 'Social Activities'],
-        'Academic': ['Study Schedule', 'Time Management', 'Goal Setting', 'Skill Development']
-    }
-    
     for student in students_with_challenges:
         # Generate 1-4 challenges per student
         num_challenges = random.choices([1, 2, 3, 4], weights=[40, 30, 20, 10])[0]
         
         for i in range(num_challenges):
             challenge_type = random.choice(CHALLENGE_TYPES)
-            title = random.choice(challenge_titles[challenge_type])
+            title = random.choice(CHALLENGE_TITLES[challenge_type])
             description = f"{challenge_type} challenge: {title}"
             
             start_date = fake.date_between(start_date='-6m', end_date='today')
@@ -557,13 +574,9 @@ def generate_wellness_challenges_csv(students):
             }
             challenge_records.append(challenge)
     
-    # Write to CSV
-    with open(f'{TEST_DIR}/wellness_challenges.csv', 'w', newline='', encoding='utf-8') as file:
-        fieldnames = ['studentId', 'challengeType', 'title', 'description', 'targetValue', 
-                     'currentProgress', 'startDate', 'endDate', 'status', 'points']
-        writer = csv.DictWriter(file, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(challenge_records)
+    # Write in the output format
+    write_records('wellness_challenges', challenge_records, ['studentId', 'challengeType', 'title', 'description', 'targetValue', 
+                                        'currentProgress', 'startDate', 'endDate', 'status', 'points'])
 
 def generate_support_tickets_csv(students):
     """Generate support tickets CSV file"""
@@ -574,21 +587,13 @@ def generate_support_tickets_csv(students):
     # About 30% of students submit support tickets
     students_with_tickets = random.sample(students, int(NUM_STUDENTS * 0.3))
     
-    ticket_subjects = {
-        'Academic': ['Course Registration Issues', 'Grade Concerns', 'Assignment Help', 'Exam Anxiety'],
-        'Personal': ['Stress Management', 'Relationship Issues', 'Family Problems', 'Self-Esteem'],
-        'Financial': ['Fee Payment Issues', 'Scholarship Questions', 'Financial Aid', 'Emergency Funds'],
-        'Health': ['Medical Leave', 'Disability Support', 'Mental Health Resources', 'Health Insurance'],
-        'Other': ['Housing Issues', 'Transportation', 'Technology Problems', 'General Inquiry']
-    }
-    
     for student in students_with_tickets:
         # Generate 1-3 tickets per student
         num_tickets = random.choices([1, 2, 3], weights=[60, 30, 10])[0]
         
         for i in range(num_tickets):
             category = random.choice(MENTAL_HEALTH_CATEGORIES)
-            subject = random.choice(ticket_subjects[category])
+            subject = random.choice(TICKET_SUBJECTS[category])
             priority = random.choice(PRIORITY_LEVELS)
             status = random.choice(SUPPORT_STATUS)
             is_anonymous = random.choice([True, False])
@@ -615,21 +620,391 @@ def generate_support_tickets_csv(students):
             }
             ticket_records.append(ticket)
     
-    # Write to CSV
-    with open(f'{TEST_DIR}/support_tickets.csv', 'w', newline='', encoding='utf-8') as file:
-        fieldnames = ['studentId', 'category', 'priority', 'subject', 'description', 'status', 
-                     'isAnonymous', 'createdAt', 'resolvedAt', 'assignedTo', 'response']
-        writer = csv.DictWriter(file, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(ticket_records)
+    # Write in the output format
+    write_records('support_tickets', ticket_records, ['studentId', 'category', 'priority', 'subject', 'description', 'status', 
+                                        'isAnonymous', 'createdAt', 'resolvedAt', 'assignedTo', 'response'])
 
-def main():
-    """Main function to generate all CSV files"""
-    print("Starting CSV data generation...")
-    print(f"Generating data for {NUM_STUDENTS} students with IDs starting from E{STUDENT_ID_START}")
-    print(f"Output directory: {TEST_DIR}/")
-    print("-" * 50)
-    
+# ---------------------------------------------------------------------------
+# Scale mode (--scale)
+#
+# Same tables and distributions as the generators above, but each column is
+# drawn for a whole table with one NumPy call instead of a Python loop per
+# row, so a million students take minutes instead of hours. Faker is
+# only used up front to fill a pool of names, phones, addresses and
+# sentences; rows pick from the pool by index. Students are generated in
+# shards, each with its own Generator derived from the seed (sharding.py),
+# and every table is appended shard by shard, so memory stays flat however
+# many students are asked for and shards can run on several cores.
+# ---------------------------------------------------------------------------
+
+TODAY = np.datetime64(datetime.now().date(), 'D')
+TEXT_POOL_SIZE = 2000
+
+# Faker reads 'm' in '+6m', '+3m' and '-6m' as minutes, so those ranges in
+# the per-row generators end (or start) today; the offsets below keep that.
+
+# Columns written with a time of day, like the per-row generators do
+TIMESTAMP_COLUMNS = ['appointmentDate', 'createdAt', 'resolvedAt']
+
+COURSE_TABLE = np.array([COURSES[dept] for dept in DEPARTMENTS], dtype=object)
+CHALLENGE_TITLE_TABLE = np.array([CHALLENGE_TITLES[kind] for kind in CHALLENGE_TYPES], dtype=object)
+TICKET_SUBJECT_TABLE = np.array([TICKET_SUBJECTS[category] for category in MENTAL_HEALTH_CATEGORIES], dtype=object)
+TEACHER_IDS = np.array([generate_teacher_id(i) for i in range(NUM_TEACHERS)], dtype=object)
+
+class TextPool:
+    """Faker output generated once; rows draw from it by index"""
+
+    def __init__(self, size=TEXT_POOL_SIZE, seed=None):
+        faker = Faker('en_IN')
+        if seed is not None:
+            faker.seed_instance(seed)
+        self.first_names = self._draw(faker.first_name, size)
+        self.last_names = self._draw(faker.last_name, size)
+        self.names = self._draw(faker.name, size)
+        self.phones = self._draw(lambda: faker.phone_number()[:10], size)
+        self.emails = self._draw(faker.email, size)
+        self.addresses = self._draw(lambda: faker.address().replace('\n', ', '), size)
+        self.sentences = self._draw(faker.sentence, size)
+        self.paragraphs = self._draw(faker.paragraph, size)
+
+    @staticmethod
+    def _draw(method, size):
+        return np.array([method() for _ in range(size)], dtype=object)
+
+def pick(rng, values, size, weights=None):
+    """Draw `size` items from values, uniformly or by relative weights"""
+    values = np.asarray(values, dtype=object if isinstance(values[0], str) else None)
+    if weights is None:
+        return values[rng.integers(0, len(values), size)]
+    p = np.asarray(weights, dtype=np.float64)
+    return values[rng.choice(len(values), size, p=p / p.sum())]
+
+def date_between(rng, start_days, end_days, size):
+    """Uniform dates between two offsets from today, in days, inclusive"""
+    return TODAY + rng.integers(start_days, end_days + 1, size)
+
+def sample_each(rng, counts, population):
+    """
+    For each row i draw counts[i] distinct positions out of range(population),
+    like random.sample per row. Returns (row, position) arrays, grouped by row.
+    """
+    order = np.argsort(rng.random((len(counts), population)), axis=1)
+    taken = np.arange(population) < counts[:, None]
+    return np.repeat(np.arange(len(counts)), counts), order[taken]
+
+def members(rng, count, fraction):
+    """Sorted positions of a random subset of int(count * fraction) students"""
+    return np.sort(rng.choice(count, int(count * fraction), replace=False))
+
+def department_codes(students):
+    return pd.Categorical(students['department'], categories=DEPARTMENTS).codes
+
+def scale_students(start, count, rng, pool):
+    """Students E{STUDENT_ID_START + start} onwards"""
+    ids = np.array([generate_student_id(i) for i in range(start, start + count)], dtype=object)
+    dept = np.asarray(DEPARTMENTS, dtype=object)[rng.integers(0, len(DEPARTMENTS), count)]
+    semester = rng.integers(1, 9, count)
+    year = (2024 - semester // 2).astype(str).astype(object)  # Calculate year based on semester
+    section = pick(rng, BATCHES, count)
+    text = lambda values: values[rng.integers(0, len(values), count)]
+
+    return pd.DataFrame({
+        'studentId': ids,
+        'name': text(pool.first_names) + ' ' + text(pool.last_names),
+        'email': pd.Series(ids).str.lower() + '@university.edu',
+        'dob': date_between(rng, -25 * 365, -18 * 365, count),
+        'currentSemester': semester,
+        'department': dept,
+        'phone': text(pool.phones),
+        'batchId': dept + year + section,
+        'parentName': text(pool.names),
+        'parentEmail': text(pool.emails),
+        'parentPhone': text(pool.phones),
+        'address': text(pool.addresses)
+    })
+
+def scale_attendance(students, rng, pool):
+    ids = students['studentId'].to_numpy()
+    dept = department_codes(students)
+    owner, course = sample_each(rng, rng.integers(2, 5, len(ids)), COURSE_TABLE.shape[1])
+    pair, month = sample_each(rng, rng.integers(3, 9, len(owner)), len(ATTENDANCE_MONTHS))
+
+    return pd.DataFrame({
+        'studentId': ids[owner[pair]],
+        'courseId': COURSE_TABLE[dept[owner[pair]], course[pair]],
+        'month': np.asarray(ATTENDANCE_MONTHS, dtype=object)[month],
+        'attendancePercent': np.round(rng.uniform(45.0, 98.0, len(pair)), 1)
+    })
+
+def scale_test_scores(students, rng, pool):
+    ids = students['studentId'].to_numpy()
+    dept = department_codes(students)
+    owner, course = sample_each(rng, rng.integers(2, 5, len(ids)), COURSE_TABLE.shape[1])
+    pair, test_type = sample_each(rng, rng.integers(2, 6, len(owner)), len(TEST_TYPES))
+
+    return pd.DataFrame({
+        'studentId': ids[owner[pair]],
+        'courseId': COURSE_TABLE[dept[owner[pair]], course[pair]],
+        'testType': np.asarray(TEST_TYPES, dtype=object)[test_type],
+        'testDate': date_between(rng, -365, 0, len(pair)),
+        'score': np.round(rng.uniform(15.0, 95.0, len(pair)), 1)
+    })
+
+def scale_backlogs(students, rng, pool):
+    ids = students['studentId'].to_numpy()
+    dept = department_codes(students)
+    # Only some students have backlogs
+    chosen = members(rng, len(ids), 0.25)
+    owner, course = sample_each(rng, rng.integers(1, 4, len(chosen)), COURSE_TABLE.shape[1])
+    owner = chosen[owner]
+
+    return pd.DataFrame({
+        'studentId': ids[owner],
+        'courseId': COURSE_TABLE[dept[owner], course],
+        'attempts': rng.integers(1, 5, len(owner)),
+        'cleared': rng.random(len(owner)) < 0.5
+    })
+
+def scale_fee_payments(students, rng, pool):
+    ids = students['studentId'].to_numpy()
+    owner = np.repeat(np.arange(len(ids)), rng.integers(2, 6, len(ids)))
+    size = len(owner)
+    due_date = date_between(rng, -2 * 365, 0, size)
+
+    # 85% payments are made, some of them late
+    paid = rng.random(size) < 0.85
+    paid_date = np.where(paid, due_date + rng.integers(-5, 31, size), np.datetime64('NaT'))
+    months_since_due = np.maximum(0, (TODAY - due_date).astype(np.int64) // 30)
+
+    return pd.DataFrame({
+        'studentId': ids[owner],
+        'dueDate': due_date,
+        'paidDate': paid_date,
+        'status': np.where(paid, 'Paid', pick(rng, ['Pending', 'Overdue'], size)),
+        'dueMonths': np.where(~paid | (paid_date > due_date), months_since_due, 0),
+        'amount': pick(rng, [25000, 50000, 75000, 100000, 125000], size)
+    })
+
+def scale_projects(students, rng, pool):
+    ids = students['studentId'].to_numpy()
+    # About 60% of students have projects, some more than one
+    chosen = members(rng, len(ids), 0.6)
+    owner = np.repeat(chosen, pick(rng, [1, 2, 3], len(chosen), weights=[70, 25, 5]))
+    size = len(owner)
+
+    return pd.DataFrame({
+        'studentId': ids[owner],
+        'title': pick(rng, PROJECT_TITLES, size),
+        'description': pick(rng, PROJECT_DESCRIPTIONS, size),
+        'startDate': date_between(rng, -2 * 365, 0, size),
+        'status': pick(rng, PROJECT_STATUS, size),
+        'supervisorId': pick(rng, TEACHER_IDS, size)
+    })
+
+def scale_phd_supervision(students, rng, pool):
+    ids = students['studentId'].to_numpy()
+    # Only about 5% of students are PhD students
+    owner = members(rng, len(ids), 0.05)
+    size = len(owner)
+    research_area = pick(rng, RESEARCH_AREAS, size)
+    start_date = date_between(rng, -5 * 365, -365, size)
+
+    return pd.DataFrame({
+        'studentId': ids[owner],
+        'title': 'Research in ' + research_area,
+        'researchArea': research_area,
+        'startDate': start_date,
+        'expectedEnd': start_date + rng.integers(1095, 2191, size),  # 3-6 years
+        'supervisorId': pick(rng, TEACHER_IDS, size),
+        'status': pick(rng, PHD_STATUS, size)
+    })
+
+def scale_fellowships(students, rng, pool):
+    ids = students['studentId'].to_numpy()
+    # About 15% of students have fellowships
+    owner = members(rng, len(ids), 0.15)
+    size = len(owner)
+    kind = rng.integers(0, len(FELLOWSHIP_TYPES), size)
+    low, high = np.array([FELLOWSHIP_AMOUNTS[name] for name in FELLOWSHIP_TYPES]).T
+
+    return pd.DataFrame({
+        'studentId': ids[owner],
+        'type': np.asarray(FELLOWSHIP_TYPES, dtype=object)[kind],
+        'amount': rng.integers(low[kind], high[kind] + 1),
+        'duration': pick(rng, [6, 12, 18, 24], size),  # months
+        'startDate': date_between(rng, -2 * 365, 0, size),
+        'status': pick(rng, FELLOWSHIP_STATUS, size)
+    })
+
+def scale_mental_health_assessments(students, rng, pool):
+    ids = students['studentId'].to_numpy()
+    # About 70% of students have 1-5 assessments
+    chosen = members(rng, len(ids), 0.7)
+    owner = np.repeat(chosen, pick(rng, [1, 2, 3, 4, 5], len(chosen), weights=[30, 25, 20, 15, 10]))
+    size = len(owner)
+
+    # Anxiety and depression follow stress; sleep and wellness move against it
+    stress = rng.integers(1, 11, size)
+    anxiety = np.clip(stress + rng.integers(-2, 3, size), 1, 10)
+    depression = np.clip(stress + rng.integers(-3, 2, size), 1, 10)
+
+    return pd.DataFrame({
+        'studentId': ids[owner],
+        'assessmentDate': date_between(rng, -365, 0, size),
+        'stressLevel': stress,
+        'anxietyLevel': anxiety,
+        'depressionLevel': depression,
+        'sleepQuality': np.clip(11 - stress + rng.integers(-2, 4, size), 1, 10),
+        'academicPressure': rng.integers(3, 11, size),
+        'socialSupport': rng.integers(2, 10, size),
+        'overallWellness': np.clip(11 - stress + rng.integers(-1, 3, size), 1, 10),
+        'notes': np.where(rng.random(size) < 0.3, pick(rng, pool.sentences, size), ''),
+        'riskScore': np.round((stress + anxiety + depression) / 3, 2)
+    })
+
+def scale_counseling_appointments(students, rng, pool):
+    ids = students['studentId'].to_numpy()
+    # About 40% of students have 1-8 appointments
+    chosen = members(rng, len(ids), 0.4)
+    owner = np.repeat(chosen, pick(rng, [1, 2, 3, 4, 5, 6, 7, 8], len(chosen),
+                                   weights=[25, 20, 15, 15, 10, 8, 4, 3]))
+    size = len(owner)
+    status = pick(rng, APPOINTMENT_STATUS, size)
+
+    return pd.DataFrame({
+        'studentId': ids[owner],
+        'counselorName': pick(rng, COUNSELOR_NAMES, size),
+        'appointmentDate': date_between(rng, -365, 0, size),
+        'duration': pick(rng, [30, 45, 60, 90], size),  # minutes
+        'type': pick(rng, APPOINTMENT_TYPES, size),
+        'status': status,
+        'notes': np.where(rng.random(size) < 0.4, pick(rng, pool.sentences, size), ''),
+        'followUpNeeded': (status == 'Completed') & (rng.random(size) < 0.5)
+    })
+
+def scale_wellness_challenges(students, rng, pool):
+    ids = students['studentId'].to_numpy()
+    # About 50% of students take part in 1-4 challenges
+    chosen = members(rng, len(ids), 0.5)
+    owner = np.repeat(chosen, pick(rng, [1, 2, 3, 4], len(chosen), weights=[40, 30, 20, 10]))
+    size = len(owner)
+
+    kind = rng.integers(0, len(CHALLENGE_TYPES), size)
+    challenge_type = np.asarray(CHALLENGE_TYPES, dtype=object)[kind]
+    title = CHALLENGE_TITLE_TABLE[kind, rng.integers(0, CHALLENGE_TITLE_TABLE.shape[1], size)]
+    start_date = date_between(rng, 0, 0, size)
+    duration_days = pick(rng, [7, 14, 21, 30], size)
+    end_date = start_date + duration_days
+    # Target days to complete, and days completed so far
+    progress = rng.integers(0, duration_days + 1)
+
+    status = np.where(
+        progress >= duration_days, 'Completed',
+        np.where(TODAY > end_date, np.where(progress < duration_days * 0.5, 'Abandoned', 'Completed'), 'Active')
+    )
+
+    return pd.DataFrame({
+        'studentId': ids[owner],
+        'challengeType': challenge_type,
+        'title': title,
+        'description': challenge_type + ' challenge: ' + title,
+        'targetValue': duration_days,
+        'currentProgress': progress,
+        'startDate': start_date,
+        'endDate': end_date,
+        'status': status,
+        'points': progress * 10  # 10 points per day completed
+    })
+
+def scale_support_tickets(students, rng, pool):
+    ids = students['studentId'].to_numpy()
+    # About 30% of students submit 1-3 tickets
+    chosen = members(rng, len(ids), 0.3)
+    owner = np.repeat(chosen, pick(rng, [1, 2, 3], len(chosen), weights=[60, 30, 10]))
+    size = len(owner)
+
+    category = rng.integers(0, len(MENTAL_HEALTH_CATEGORIES), size)
+    status = pick(rng, SUPPORT_STATUS, size)
+    resolved = (status == 'Resolved') | (status == 'Closed')
+    created_date = date_between(rng, -365, 0, size)
+
+    return pd.DataFrame({
+        'studentId': ids[owner],
+        'category': np.asarray(MENTAL_HEALTH_CATEGORIES, dtype=object)[category],
+        'priority': pick(rng, PRIORITY_LEVELS, size),
+        'subject': TICKET_SUBJECT_TABLE[category, rng.integers(0, TICKET_SUBJECT_TABLE.shape[1], size)],
+        'description': pick(rng, pool.paragraphs, size),
+        'status': status,
+        'isAnonymous': rng.random(size) < 0.5,
+        'createdAt': created_date,
+        'resolvedAt': np.where(resolved, created_date + rng.integers(1, 31, size), np.datetime64('NaT')),
+        'assignedTo': np.where(status != 'Open', pick(rng, COUNSELOR_NAMES, size), ''),
+        'response': np.where(resolved, pick(rng, pool.sentences, size), '')
+    })
+
+# Tables generated from the students table, in output order
+SCALE_TABLES = {
+    'attendance': scale_attendance,
+    'test_scores': scale_test_scores,
+    'backlogs': scale_backlogs,
+    'fee_payments': scale_fee_payments,
+    'projects': scale_projects,
+    'phd_supervision': scale_phd_supervision,
+    'fellowships': scale_fellowships,
+    'mental_health_assessments': scale_mental_health_assessments,
+    'counseling_appointments': scale_counseling_appointments,
+    'wellness_challenges': scale_wellness_challenges,
+    'support_tickets': scale_support_tickets
+}
+
+def scale_shard(shard, students_range, seed, pool, file_format='csv'):
+    """
+    Build one shard of every table from its own Generator and render it for
+    writing; runs in a worker process when --workers is above one
+    """
+    start, count = students_range
+    rng = shard_rng(seed, shard)
+    students = scale_students(start, count, rng, pool)
+    tables = {'students': students}
+    # Only the columns the other tables need are passed on
+    students = students[['studentId', 'department']]
+    for table, build in SCALE_TABLES.items():
+        tables[table] = build(students, rng, pool)
+
+    # The columnar formats keep them as timestamps
+    if file_format == 'csv':
+        for frame in tables.values():
+            for column in TIMESTAMP_COLUMNS:
+                if column in frame:
+                    frame[column] = frame[column].dt.strftime('%Y-%m-%d %H:%M:%S')
+    return encode_tables(tables, file_format)
+
+def generate_scaled(seed=None, chunk_size=DEFAULT_CHUNK_SIZE, workers=1):
+    """
+    Generate every table with vectorized draws in shards of chunk_size
+    students. Shards run on up to `workers` processes and are appended to
+    the files in student order, so the output depends only on the seed and
+    chunk size.
+    """
+    seed = master_seed(seed)
+    print(f"Seed {seed}, {chunk_size:,} students per shard, {workers} worker(s)")
+    pool = TextPool(seed=seed)
+    started = time.perf_counter()
+
+    shards = list(chunk_ranges(NUM_STUDENTS, chunk_size))
+    build = partial(scale_shard, seed=seed, pool=pool, file_format=OUTPUT_FORMAT)
+    with TableWriters(TEST_DIR, OUTPUT_FILES, OUTPUT_FORMAT) as writers:
+        for (start, count), encoded in zip(shards, run_shards(build, shards, workers)):
+            for table, chunk in encoded.items():
+                writers.write_encoded(table, chunk)
+            print(f"  {start + count:,}/{NUM_STUDENTS:,} students ({time.perf_counter() - started:.1f}s)")
+
+    print(f"Generated {NUM_STUDENTS:,} students in {time.perf_counter() - started:.1f}s")
+    for table in OUTPUT_FILES:
+        print(f"  {table}: {writers.rows(table):,} rows")
+
+def generate_per_row():
+    """Generate every table one row at a time with random and Faker"""
     # Generate students first (needed for other files)
     students = generate_students_csv()
     
@@ -647,14 +1022,50 @@ def main():
     generate_counseling_appointments_csv(students)
     generate_wellness_challenges_csv(students)
     generate_support_tickets_csv(students)
+
+def main():
+    """Main function to generate all CSV files"""
+    global NUM_STUDENTS, TEST_DIR, OUTPUT_FORMAT
+
+    parser = argparse.ArgumentParser(description="Generate EduPulse test data CSVs")
+    parser.add_argument('--students', type=int, default=NUM_STUDENTS, help="Number of students to generate")
+    parser.add_argument('--scale', action='store_true',
+                        help="Vectorized NumPy generation, for large --students counts")
+    parser.add_argument('--seed', type=int, help="Seed for reproducible output")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Students generated and written per chunk (shard) with --scale")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help="Processes generating shards in parallel with --scale; output does not depend on it")
+    parser.add_argument('--output-dir', default=TEST_DIR)
+    parser.add_argument('--format', choices=FORMATS, default=OUTPUT_FORMAT,
+                        help="Output file format; parquet and arrow need pyarrow")
+    args = parser.parse_args()
+
+    NUM_STUDENTS = args.students
+    TEST_DIR = args.output_dir
+    OUTPUT_FORMAT = args.format
+    os.makedirs(TEST_DIR, exist_ok=True)
+
+    print("Starting CSV data generation...")
+    print(f"Generating data for {NUM_STUDENTS} students with IDs starting from E{STUDENT_ID_START}")
+    print(f"Output directory: {TEST_DIR}/")
+    print("-" * 50)
+    
+    if args.scale:
+        generate_scaled(args.seed, args.chunk_size, args.workers)
+    else:
+        if args.seed is not None:
+            random.seed(args.seed)
+            fake.seed_instance(args.seed)
+        generate_per_row()
     
     print("-" * 50)
-    print("CSV data generation completed successfully!")
+    print(f"{OUTPUT_FORMAT.upper()} data generation completed successfully!")
     print(f"Generated files in '{TEST_DIR}/' directory:")
     
     # List generated files
     for filename in os.listdir(TEST_DIR):
-        if filename.endswith('.csv'):
+        if filename.endswith(EXTENSIONS[OUTPUT_FORMAT]):
             filepath = os.path.join(TEST_DIR, filename)
             size = os.path.getsize(filepath)
             print(f"  - {filename} ({size:,} bytes)")
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Bulk-load generated CSVs into a local SQLite database with the app's schema.
+
+The schema is exactly the one prisma/schema.prisma describes: the Prisma
+migrations are replayed into an in-memory database and its tables and
+indexes are copied from there. The target file is then loaded the fast way:
+
+- tables are created without their secondary indexes, which are built
+  once at the end instead of being updated on every insert
+- rows go in with executemany, one transaction per chunk of rows
+- journaling and fsync are off while loading and the page cache is large;
+  the database is written to a temporary file and moved into place only
+  when complete, so an interrupted load never leaves a half-written file
+
+    python load_sqlite.py --data-dir test --database edupulse.db
+    python load_sqlite.py --data-dir final --database edupulse.db --chunk-size 200000
+
+CSV columns are mapped onto the models: renamed where a generator uses
+another name, DateTime values stored as ISO 8601 text and Booleans as 0/1.
+Columns a model does not have are dropped. Teachers, course subjects and
+batches referenced by the loaded rows are created afterwards so every
+relation resolves.
+"""
+
+import argparse
+import glob
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'prisma', 'migrations')
+DEFAULT_CHUNK_SIZE = 200000
+
+# Model table for each generated table, in load order
+SOURCES = {
+    'Student': 'students',
+    'Attendance': 'attendance',
+    'TestScore': 'test_scores',
+    'Backlog': 'backlogs',
+    'FeePayment': 'fee_payments',
+    'Project': 'projects',
+    'PhdSupervision': 'phd_supervision',
+    'Fellowship': 'fellowships',
+    'MentalHealthAssessment': 'mental_health_assessments',
+    'CounselingAppointment': 'counseling_appointments',
+    'WellnessChallenge': 'wellness_challenges',
+    'SupportTicket': 'support_tickets',
+}
+
+# File names the generators use for a table, tried in this order
+FILE_PATTERNS = ['{}_comprehensive_reduced_stratified.csv', '{}_comprehensive.csv', '{}.csv']
+
+# CSV column -> model column where the generators name them differently
+RENAMES = {
+    'Project': {'projectTitle': 'title'},
+    'PhdSupervision': {'researchTitle': 'title', 'expectedCompletion': 'expectedEnd'},
+    'Fellowship': {'fellowshipType': 'type'},
+}
+
+# Values for required columns some generators do not produce. A callable
+# gets the chunk; '' for supervisorId is filled in by link_fellowships().
+FILLS = {
+    'FeePayment': {'dueMonths': 0},
+    'Fellowship': {'supervisorId': '', 'duration': 12},
+    'SupportTicket': {'updatedAt': lambda frame: frame['createdAt']},
+}
+
+# How Prisma writes DateTime values to SQLite
+DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%S.000+00:00'
+
+BULK_PRAGMAS = [
+    'PRAGMA journal_mode = OFF',
+    'PRAGMA synchronous = OFF',
+    'PRAGMA locking_mode = EXCLUSIVE',
+    'PRAGMA temp_store = MEMORY',
+    'PRAGMA cache_size = -262144',  # 256 MB
+    'PRAGMA foreign_keys = OFF',
+]
+
+
+def schema(migrations_dir=MIGRATIONS_DIR):
+    """
+    Replay the migrations in memory and return the final CREATE TABLE and
+    CREATE INDEX statements, plus each table's columns as PRAGMA
+    table_info rows.
+    """
+    paths = sorted(glob.glob(os.path.join(migrations_dir, '*', 'migration.sql')))
+    if not paths:
+        raise FileNotFoundError(f"No Prisma migrations found in {migrations_dir}")
+    db = sqlite3.connect(':memory:')
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            db.executescript(f.read())
+
+    objects = db.execute(
+        "SELECT type, name, sql FROM sqlite_master "
+        "WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%' ORDER BY rowid"
+    ).fetchall()
+    tables = [sql for kind, _, sql in objects if kind == 'table']
+    indexes = [sql for kind, _, sql in objects if kind == 'index']
+    columns = {name: db.execute(f'PRAGMA table_info("{name}")').fetchall()
+               for kind, name, _ in objects if kind == 'table'}
+    db.close()
+    return tables, indexes, columns
+
+
+def find_source(data_dir, table):
+    for pattern in FILE_PATTERNS:
+        path = os.path.join(data_dir, pattern.format(table))
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def to_datetime_text(values):
+    """ISO 8601 text, or None for an empty field"""
+    # Dates repeat a lot, so each distinct value is parsed and formatted once
+    codes, distinct = pd.factorize(values)
+    parsed = pd.to_datetime(pd.Series(distinct, dtype=object).replace('', None), format='ISO8601', errors='coerce')
+    text = parsed.dt.strftime(DATETIME_FORMAT).to_numpy(dtype=object)
+    text[parsed.isna().to_numpy()] = None
+    return text[codes]
+
+
+def to_boolean(values):
+    flags = values.str.lower().map({'true': 1, 'false': 0, '1': 1, '0': 0})
+    return flags.to_numpy(dtype=object, na_value=None)
+
+
+def prepare(model, frame, columns):
+    """
+    The chunk's model columns, converted to what Prisma stores, as object
+    arrays: plain Python values are much faster for executemany to bind
+    than values pulled out of pandas string columns.
+    """
+    frame = frame.rename(columns=RENAMES.get(model, {}))
+    for column, fill in FILLS.get(model, {}).items():
+        if column not in frame:
+            frame[column] = fill(frame) if callable(fill) else fill
+
+    names, arrays = [], []
+    for _, name, declared, not_null, default, primary in columns:
+        if name not in frame:
+            if not_null and default is None and not primary:
+                raise ValueError(f"{model}.{name} is required but the source has no {name} column")
+            continue
+        values = frame[name].astype(str)
+        if declared == 'DATETIME':
+            array = to_datetime_text(values)
+        elif declared == 'BOOLEAN':
+            array = to_boolean(values)
+        else:
+            # INTEGER and REAL affinity store numeric text as numbers
+            array = values.to_numpy(dtype=object)
+            if not not_null:
+                array[array == ''] = None
+        names.append(name)
+        arrays.append(array)
+    return names, arrays
+
+
+def load_table(db, model, path, columns, chunk_size):
+    """Insert one CSV into its model table; returns the number of rows"""
+    rows = 0
+    for chunk in pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunk_size):
+        names, arrays = prepare(model, chunk, columns)
+        columns_sql = ', '.join('"%s"' % name for name in names)
+        statement = f'INSERT INTO "{model}" ({columns_sql}) VALUES ({", ".join("?" * len(names))})'
+        with db:
+            db.executemany(statement, zip(*arrays))
+        rows += len(chunk)
+    return rows
+
+
+def link_fellowships(db):
+    """Give fellowships without a supervisor the student's PhD or project supervisor"""
+    db.execute('''
+        UPDATE "Fellowship" SET "supervisorId" = COALESCE(
+            (SELECT "supervisorId" FROM "PhdSupervision" p WHERE p."studentId" = "Fellowship"."studentId" LIMIT 1),
+            (SELECT "supervisorId" FROM "Project" p WHERE p."studentId" = "Fellowship"."studentId" LIMIT 1),
+            (SELECT MIN("supervisorId") FROM (SELECT "supervisorId" FROM "PhdSupervision"
+                                              UNION ALL SELECT "supervisorId" FROM "Project")),
+            'T0000')
+        WHERE "supervisorId" = ''
+    ''')
+
+
+def add_referenced_rows(db, created_at):
+    """Create the teachers, course subjects and batches the loaded rows point to"""
+    db.execute('''
+        INSERT OR IGNORE INTO "Teacher" ("teacherId", "name", "email", "createdAt")
+        SELECT "supervisorId", 'Teacher ' || "supervisorId", lower("supervisorId") || '@university.edu', ?
+        FROM (SELECT "supervisorId" FROM "Project" UNION SELECT "supervisorId" FROM "PhdSupervision"
+              UNION SELECT "supervisorId" FROM "Fellowship")
+    ''', (created_at,))
+    # A course's department is that of a student taking it
+    db.execute('''
+        INSERT OR IGNORE INTO "CourseSubject" ("courseId", "name", "code", "semester", "department")
+        SELECT c."courseId", c."courseId", c."courseId", 1, COALESCE(
+            (SELECT s."department" FROM "Attendance" a JOIN "Student" s ON s."studentId" = a."studentId"
+             WHERE a."courseId" = c."courseId" LIMIT 1), '')
+        FROM (SELECT "courseId" FROM "Attendance" UNION SELECT "courseId" FROM "TestScore"
+              UNION SELECT "courseId" FROM "Backlog") c
+    ''')
+    # Batch IDs are <department><year><section>, e.g. CSE2022A
+    db.execute('''
+        INSERT OR IGNORE INTO "Batch" ("batchId", "batchNo", "courseId", "year", "department")
+        SELECT b."batchId", substr(b."batchId", -1), COALESCE(
+            (SELECT a."courseId" FROM "Student" s JOIN "Attendance" a ON a."studentId" = s."studentId"
+             WHERE s."batchId" = b."batchId" LIMIT 1),
+            (SELECT MIN("courseId") FROM "CourseSubject"), ''),
+            CAST(substr(b."batchId", -5, 4) AS INTEGER), substr(b."batchId", 1, length(b."batchId") - 5)
+        FROM (SELECT DISTINCT "batchId" FROM "Student" WHERE "batchId" IS NOT NULL) b
+    ''')
+
+
+def load(data_dir, database, chunk_size=DEFAULT_CHUNK_SIZE, migrations_dir=MIGRATIONS_DIR):
+    """Build `database` from the CSVs in data_dir; returns {model: rows}"""
+    tables, indexes, columns = schema(migrations_dir)
+    building = database + '.loading'
+    if os.path.exists(building):
+        os.remove(building)
+
+    counts = {}
+    db = sqlite3.connect(building, isolation_level='DEFERRED')
+    try:
+        for pragma in BULK_PRAGMAS:
+            db.execute(pragma)
+        with db:
+            for statement in tables:
+                db.execute(statement)
+
+        for model, table in SOURCES.items():
+            path = find_source(data_dir, table)
+            if path is None:
+                continue
+            started = time.perf_counter()
+            counts[model] = load_table(db, model, path, columns[model], chunk_size)
+            seconds = time.perf_counter() - started
+            print(f"  {model}: {counts[model]:,} rows in {seconds:.1f}s ({counts[model] / max(seconds, 1e-9):,.0f} rows/s)")
+
+        started = time.perf_counter()
+        with db:
+            for statement in indexes:
+                db.execute(statement)
+        print(f"  indexes: {len(indexes)} built in {time.perf_counter() - started:.1f}s")
+
+        created_at = datetime.now(timezone.utc).strftime(DATETIME_FORMAT)
+        with db:
+            link_fellowships(db)
+            add_referenced_rows(db, created_at)
+        for model in ['Teacher', 'CourseSubject', 'Batch']:
+            counts[model] = db.execute(f'SELECT COUNT(*) FROM "{model}"').fetchone()[0]
+        db.execute('ANALYZE')
+    finally:
+        db.close()
+
+    os.replace(building, database)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load generated CSVs into a SQLite database with the Prisma schema")
+    parser.add_argument('--data-dir', default='test', help="Directory with the generated CSV files")
+    parser.add_argument('--database', default='edupulse.db', help="SQLite file to create (replaced if it exists)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Rows read and inserted per transaction")
+    parser.add_argument('--migrations', default=MIGRATIONS_DIR, help="Prisma migrations directory")
+    args = parser.parse_args()
+
+    print(f"Loading {args.data_dir}/ into {args.database}...")
+    started = time.perf_counter()
+    counts = load(args.data_dir, args.database, args.chunk_size, args.migrations)
+    print(f"Loaded {sum(counts.values()):,} rows into {len(counts)} tables in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
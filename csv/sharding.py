@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Reproducible parallel generation for the data generators.
+
+Students are split into fixed-size shards. Each shard draws from its own
+numpy Generator (and Faker seed) derived from the master seed and the shard
+index alone, so a shard's rows do not depend on which process builds it or
+in what order. Shards run on a process pool and their output is merged in
+shard order: a given seed and shard size produce byte-identical files for
+any number of workers.
+"""
+
+import itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+def master_seed(seed=None):
+    """The seed to use for a run; a fresh one from OS entropy if none was given"""
+    return seed if seed is not None else int(np.random.SeedSequence().entropy)
+
+
+def shard_rng(seed, shard):
+    """Generator for one shard, identical for a given (seed, shard) in any process"""
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(shard,)))
+
+
+def shard_faker_seed(seed, shard):
+    """Integer seed for a shard's Faker instance, independent of its Generator stream"""
+    return int(np.random.SeedSequence(seed, spawn_key=(shard, 1)).generate_state(1)[0])
+
+
+def run_shards(build_shard, shards, workers=1):
+    """
+    Yield build_shard(index, shard) for every shard, in shard order.
+
+    With more than one worker the shards run in a process pool. At most two
+    shards per worker are in flight, so finished shards waiting to be
+    written never pile up in memory. build_shard must be picklable (a
+    module-level function or a functools.partial of one).
+    """
+    if workers <= 1:
+        for index, shard in enumerate(shards):
+            yield build_shard(index, shard)
+        return
+
+    tasks = enumerate(shards)
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque(pool.submit(build_shard, index, shard)
+                        for index, shard in itertools.islice(tasks, workers * 2))
+        while pending:
+            result = pending.popleft().result()
+            for index, shard in itertools.islice(tasks, 1):
+                pending.append(pool.submit(build_shard, index, shard))
+            yield result
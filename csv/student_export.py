@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Per-student NDJSON export of the comprehensive tables.
+
+Writes one document per student in the sample_student_structure.json shape:
+the student's row with all of their attendance, test score, backlog, fee,
+project, PhD and fellowship rows nested under it, one JSON object per line.
+
+    python student_export.py --data-dir final --output students.ndjson
+    python student_export.py --data-dir . --suffix comprehensive --output students.ndjson --shards 4
+
+Each table is read once, in chunks, and its rows are hash-partitioned by
+studentId into temporary files. A partition holds every row of its
+students and is small enough to load whole, so it is grouped by studentId
+in one pass and its documents are written out. Memory is set by the
+partition size (--partitions), not by the size of the dataset.
+
+With --shards N the documents are spread over N files by a hash of
+studentId (shard_of). generate_missing_data.py --ndjson uses the same rule,
+so a student lands in the same shard either way.
+"""
+
+import argparse
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from table_writer import TableWriters
+
+# Document key for each table nested under a student
+CHILD_TABLES = {
+    'attendance': 'attendance',
+    'test_scores': 'testScores',
+    'backlogs': 'backlogs',
+    'fee_payments': 'feePayments',
+    'projects': 'projects',
+    'phd_supervision': 'phdSupervision',
+    'fellowships': 'fellowships',
+}
+TABLES = ['students'] + list(CHILD_TABLES)
+
+# Kept as text when reading back, so IDs and phone numbers keep leading zeros
+TEXT_COLUMNS = ['studentId', 'phone', 'parentPhone', 'supervisorId']
+
+DEFAULT_PARTITIONS = 64
+READ_CHUNK_ROWS = 500000
+
+
+def shard_of(student_ids, shards):
+    """Shard index of each studentId, stable across runs and processes"""
+    return pd.util.hash_array(np.asarray(student_ids, dtype=object)) % np.uint64(shards)
+
+
+def shard_paths(output, shards):
+    """students.ndjson, or students-00000.ndjson ... for more than one shard"""
+    if shards == 1:
+        return [output]
+    root, ext = os.path.splitext(output)
+    return [f"{root}-{shard:05d}{ext}" for shard in range(shards)]
+
+
+def student_documents(tables):
+    """
+    Nest each table's rows under their student, grouping every table once.
+
+    `tables` maps table names to lists of row dicts. One document is yielded
+    per row of tables['students'], in that order; rows of students without
+    a student row are left out.
+    """
+    grouped = {}
+    for table in CHILD_TABLES:
+        rows_by_student = grouped[table] = {}
+        for row in tables.get(table, []):
+            rows_by_student.setdefault(row['studentId'], []).append(row)
+
+    for student in tables.get('students', []):
+        document = dict(student)
+        for table, key in CHILD_TABLES.items():
+            document[key] = grouped[table].get(student['studentId'], [])
+        yield document
+
+
+def encode_documents(documents, shards=1):
+    """NDJSON text of the documents for each of `shards` files"""
+    documents = list(documents)
+    lines = [[] for _ in range(shards)]
+    targets = shard_of([document['studentId'] for document in documents], shards) if documents else []
+    for document, shard in zip(documents, targets):
+        lines[shard].append(json.dumps(document) + '\n')
+    return [''.join(shard_lines) for shard_lines in lines]
+
+
+def frame_records(frame):
+    """DataFrame rows as dicts of plain Python values, with None for missing"""
+    return frame.astype(object).where(frame.notna(), None).to_dict('records')
+
+
+def table_files(suffix):
+    return {table: f"{table}_{suffix}.csv" for table in TABLES}
+
+
+def partition_tables(data_dir, filenames, workdir, partitions, chunk_size=READ_CHUNK_ROWS):
+    """Split every table into `partitions` files by a hash of studentId"""
+    for table, filename in filenames.items():
+        path = os.path.join(data_dir, filename)
+        if not os.path.exists(path):
+            continue
+        # Rows are copied as read: text in, the same text out
+        with TableWriters(workdir) as writers:
+            for chunk in pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunk_size):
+                parts = shard_of(chunk['studentId'], partitions)
+                for part, rows in chunk.groupby(parts, sort=False):
+                    writers.write(f"{table}-{part:05d}.csv", rows)
+
+
+def read_partition(workdir, table, part):
+    path = os.path.join(workdir, f"{table}-{part:05d}.csv")
+    if not os.path.exists(path):
+        return []
+    header = pd.read_csv(path, nrows=0).columns
+    # Empty fields stay '' as the generators write them (e.g. an unpaid fee's paidDate)
+    frame = pd.read_csv(path, dtype={column: str for column in TEXT_COLUMNS if column in header},
+                        keep_default_na=False)
+    return frame_records(frame)
+
+
+def export_students(data_dir, output, shards=1, suffix='comprehensive_reduced_stratified',
+                    partitions=DEFAULT_PARTITIONS, chunk_size=READ_CHUNK_ROWS):
+    """Write one NDJSON document per student of data_dir; returns the number written"""
+    filenames = table_files(suffix)
+    if not os.path.exists(os.path.join(data_dir, filenames['students'])):
+        raise FileNotFoundError(f"No {filenames['students']} in {data_dir}")
+
+    written = 0
+    with tempfile.TemporaryDirectory(prefix='student_export_') as workdir:
+        partition_tables(data_dir, filenames, workdir, partitions, chunk_size)
+
+        outputs = [open(path, 'w', encoding='utf-8') for path in shard_paths(output, shards)]
+        try:
+            for part in range(partitions):
+                tables = {table: read_partition(workdir, table, part) for table in TABLES}
+                for out, text in zip(outputs, encode_documents(student_documents(tables), shards)):
+                    out.write(text)
+                written += len(tables['students'])
+        finally:
+            for out in outputs:
+                out.close()
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export one nested JSON document per student as NDJSON")
+    parser.add_argument('--data-dir', default='final', help="Directory with the <table>_<suffix>.csv files")
+    parser.add_argument('--suffix', default='comprehensive_reduced_stratified',
+                        help="File name suffix of the tables, e.g. comprehensive for generate_missing_data.py output")
+    parser.add_argument('--output', default='students.ndjson')
+    parser.add_argument('--shards', type=int, default=1, help="Number of NDJSON files to spread students over")
+    parser.add_argument('--partitions', type=int, default=DEFAULT_PARTITIONS,
+                        help="Hash partitions; each one is loaded into memory on its own")
+    args = parser.parse_args()
+
+    count = export_students(args.data_dir, args.output, args.shards, args.suffix, args.partitions)
+    print(f"✅ Exported {count} students to {', '.join(shard_paths(args.output, args.shards))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Chunked table output shared by the data generators.
+
+Tables are written as they are produced, one DataFrame chunk at a time: the
+first chunk creates the file with its header and later chunks are appended.
+Peak memory is set by the chunk size, not by how large a table grows.
+
+Rendering a chunk (encode) is separate from appending it (write_encoded),
+so worker processes can do the formatting and the parent only writes.
+
+Besides CSV, tables can be written as Parquet or Arrow IPC files
+(file_format), with typed columns: dates and timestamps as date/timestamp
+types and low-cardinality text such as department, courseId or status
+dictionary-encoded. Rows are written in fixed-size row groups (record
+batches for Arrow) so readers can stream them. The columnar formats need
+pyarrow, which is imported only when one of them is used.
+"""
+
+import os
+from collections import namedtuple
+
+import pandas as pd
+
+# Students generated per chunk when streaming
+DEFAULT_CHUNK_SIZE = 50000
+
+FORMATS = ['csv', 'parquet', 'arrow']
+EXTENSIONS = {'csv': '.csv', 'parquet': '.parquet', 'arrow': '.arrow'}
+
+# Rows per Parquet row group / Arrow record batch
+DEFAULT_ROW_GROUP_SIZE = 256 * 1024
+
+# Column types for the columnar formats, by column name across all generators
+DATE_COLUMNS = {'dob', 'testDate', 'dueDate', 'paidDate', 'startDate', 'endDate',
+                'expectedEnd', 'expectedCompletion', 'assessmentDate'}
+DATETIME_COLUMNS = {'appointmentDate', 'createdAt', 'resolvedAt'}
+CATEGORY_COLUMNS = {'department', 'batchId', 'courseId', 'month', 'testType', 'status', 'type', 'feeType',
+                    'fellowshipType', 'title', 'projectTitle', 'researchTitle', 'researchArea', 'counselorName',
+                    'category', 'priority', 'subject', 'challengeType', 'assignedTo'}
+
+# A rendered chunk: its column names, row count and payload (CSV text
+# without header, or a pyarrow Table for the columnar formats)
+EncodedChunk = namedtuple('EncodedChunk', ['columns', 'rows', 'payload'])
+
+
+def chunk_ranges(total, chunk_size):
+    """(start, count) for consecutive chunks covering range(total)"""
+    for start in range(0, total, chunk_size):
+        yield start, min(chunk_size, total - start)
+
+
+def output_name(filename, file_format='csv'):
+    """The file name for a table in file_format: students.csv -> students.parquet"""
+    root, ext = os.path.splitext(filename)
+    return (root if ext == '.csv' else filename) + EXTENSIONS[file_format]
+
+
+def encode_frame(frame, file_format='csv'):
+    """Render one DataFrame chunk for write_encoded"""
+    return (CsvTableWriter if file_format == 'csv' else ColumnarTableWriter).encode(frame)
+
+
+def encode_tables(tables, file_format='csv'):
+    """Render {table: DataFrame} chunks for TableWriters.write_encoded"""
+    return {table: encode_frame(frame, file_format) for table, frame in tables.items()}
+
+
+def import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise SystemExit("Writing Parquet or Arrow needs pyarrow (pip install pyarrow), or use --format csv")
+    return pyarrow
+
+
+class CsvTableWriter:
+    """Appends DataFrame chunks to one CSV file and counts the rows written"""
+
+    def __init__(self, path):
+        self.path = path
+        self.rows = 0
+        self.columns = None
+        self.file = None
+
+    @staticmethod
+    def encode(frame):
+        payload = frame.to_csv(index=False, header=False) if len(frame) else ''
+        return EncodedChunk(list(frame.columns), len(frame), payload)
+
+    def write(self, frame):
+        self.write_encoded(self.encode(frame))
+
+    def write_encoded(self, chunk):
+        if self.columns is None and chunk.columns:
+            self.columns = chunk.columns
+        if not chunk.rows:
+            return
+        if self.file is None:
+            self.file = open(self.path, 'w', newline='', encoding='utf-8')
+            self.file.write(pd.DataFrame(columns=self.columns).to_csv(index=False))
+        self.file.write(chunk.payload)
+        self.rows += chunk.rows
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+        elif self.columns:
+            # Every chunk was empty: still leave a header-only file
+            pd.DataFrame(columns=self.columns).to_csv(self.path, index=False)
+
+
+class ColumnarTableWriter:
+    """
+    Appends DataFrame chunks to one Parquet or Arrow IPC file. The first
+    non-empty chunk fixes the schema; later chunks are cast to it. Rows are
+    buffered until a full row group is ready.
+    """
+
+    def __init__(self, path, file_format='parquet', row_group_size=DEFAULT_ROW_GROUP_SIZE):
+        self.pa = import_pyarrow()
+        self.path = path
+        self.file_format = file_format
+        self.row_group_size = row_group_size
+        self.rows = 0
+        self.columns = None
+        self.schema = None
+        self.writer = None
+        self.pending = []
+        self.pending_rows = 0
+
+    @staticmethod
+    def to_arrow(frame):
+        """A pyarrow Table of the frame with the column types above"""
+        pa = import_pyarrow()
+        arrays = []
+        for column in frame.columns:
+            values = frame[column]
+            if column in DATE_COLUMNS:
+                array = pa.array(pd.to_datetime(values, format='ISO8601', errors='coerce'), from_pandas=True).cast(pa.date32())
+            elif column in DATETIME_COLUMNS:
+                array = pa.array(pd.to_datetime(values, format='ISO8601', errors='coerce'), from_pandas=True).cast(pa.timestamp('s'))
+            elif column in CATEGORY_COLUMNS:
+                array = pa.array(values, type=pa.string(), from_pandas=True).dictionary_encode()
+            else:
+                array = pa.array(values, from_pandas=True)
+            arrays.append(array)
+        return pa.Table.from_arrays(arrays, names=[str(column) for column in frame.columns])
+
+    @staticmethod
+    def encode(frame):
+        return EncodedChunk(list(frame.columns), len(frame), ColumnarTableWriter.to_arrow(frame))
+
+    def write(self, frame):
+        self.write_encoded(self.encode(frame))
+
+    def write_encoded(self, chunk):
+        if self.columns is None and chunk.columns:
+            self.columns = chunk.columns
+        if not chunk.rows:
+            return
+        table = chunk.payload
+        if self.schema is None:
+            self.schema = table.schema
+        elif not table.schema.equals(self.schema):
+            # e.g. a column that was all null in the first chunk
+            table = table.cast(self.schema)
+        self.pending.append(table)
+        self.pending_rows += table.num_rows
+        self.rows += table.num_rows
+        if self.pending_rows >= self.row_group_size:
+            self.flush(final=False)
+
+    def flush(self, final=True):
+        """Write out the buffered rows in whole row groups, and the remainder when final"""
+        table = self.pa.concat_tables(self.pending).combine_chunks() if self.pending else None
+        self.pending, self.pending_rows = [], 0
+        if table is None:
+            return
+        full = table.num_rows if final else table.num_rows - table.num_rows % self.row_group_size
+        if full:
+            self._write(table.slice(0, full))
+        if full < table.num_rows:
+            self.pending, self.pending_rows = [table.slice(full)], table.num_rows - full
+
+    def _write(self, table):
+        if self.writer is None:
+            if self.file_format == 'parquet':
+                self.writer = self.pa.parquet.ParquetWriter(self.path, self.schema)
+            else:
+                self.writer = self.pa.ipc.new_file(self.path, self.schema)
+        if self.file_format == 'parquet':
+            self.writer.write_table(table, row_group_size=self.row_group_size)
+        else:
+            self.writer.write_table(table, max_chunksize=self.row_group_size)
+
+    def close(self):
+        self.flush()
+        if self.writer is None and self.schema is None and self.columns:
+            # Every chunk was empty: still leave a file with the columns
+            self.schema = self.to_arrow(pd.DataFrame(columns=self.columns)).schema
+            self._write(self.schema.empty_table())
+        if self.writer is not None:
+            self.writer.close()
+
+
+class TableWriters:
+    """
+    One writer per table, created on the table's first chunk. `filenames`
+    maps table names to files in `directory`; without it the table name is
+    used as the file name. For the columnar formats a .csv extension is
+    replaced by the format's own.
+    """
+
+    def __init__(self, directory, filenames=None, file_format='csv', row_group_size=DEFAULT_ROW_GROUP_SIZE):
+        self.directory = directory
+        self.filenames = filenames
+        self.file_format = file_format
+        self.row_group_size = row_group_size
+        self.writers = {}
+
+    def path(self, table):
+        filename = self.filenames[table] if self.filenames else table
+        if self.file_format != 'csv':
+            filename = output_name(filename, self.file_format)
+        return os.path.join(self.directory, filename)
+
+    def _writer(self, table):
+        writer = self.writers.get(table)
+        if writer is None:
+            if self.file_format == 'csv':
+                writer = CsvTableWriter(self.path(table))
+            else:
+                writer = ColumnarTableWriter(self.path(table), self.file_format, self.row_group_size)
+            self.writers[table] = writer
+        return writer
+
+    def write(self, table, frame):
+        self._writer(table).write(frame)
+
+    def write_encoded(self, table, chunk):
+        self._writer(table).write_encoded(chunk)
+
+    def rows(self, table):
+        writer = self.writers.get(table)
+        return writer.rows if writer is not None else 0
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Check a generated dataset directory before it is loaded.
+
+Every table is streamed once, in chunks, and checked for:
+
+- missing columns: a column the Prisma model requires is not in the file
+- missing values: an empty field in a required column
+- types: numbers, dates and booleans that do not parse as their model type
+- ranges: values outside RANGES, e.g. attendance over 100
+- duplicates: a repeated primary or unique key of the model
+- orphans: a studentId with no row in the students table
+
+    python validate_dataset.py --data-dir final
+    python validate_dataset.py --data-dir big --chunk-size 500000 --samples 10
+
+Required columns and column types come from the Prisma migrations, with
+columns named as in the models after load_sqlite.py's renames, so a
+dataset that passes is one load_sqlite.py can load. The students table is
+read first and its studentIds kept as a sorted array of 64-bit hashes,
+which the other tables are checked against; keys for the duplicate checks
+are kept the same way. Memory is 8 bytes per key plus one chunk, however
+large the files are. Hash collisions could hide a violation, but at about
+1e-7 for ten million keys they are not a practical concern.
+
+Keys the generators keep unique but the schema does not (WARNING_KEYS) are
+checked too; their repeats are reported as warnings, which do not fail
+validation.
+
+Each violation is reported with its count and a few sample rows (row 1
+being the first row after the header). The exit status is 1 if any
+violation other than a warning was found.
+"""
+
+import argparse
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from load_sqlite import DEFAULT_CHUNK_SIZE, FILLS, MIGRATIONS_DIR, RENAMES, SOURCES, find_source, schema
+
+DEFAULT_SAMPLES = 5
+
+MODELS = {table: model for model, table in SOURCES.items()}
+
+# Keys the generators of csv/final keep unique and python-backend/rescore.py
+# treats as natural keys, but which the schema does not enforce: e.g.
+# generate_complement_data.py repeats a backlog course in another semester
+WARNING_KEYS = {
+    'attendance': [['studentId', 'courseId', 'month']],
+    'test_scores': [['studentId', 'courseId', 'testType']],
+    'backlogs': [['studentId', 'courseId']],
+}
+
+# Inclusive bounds; None leaves that side open
+LEVEL = (1, 10)
+RANGES = {
+    'students': {'currentSemester': (1, 8)},
+    'attendance': {'attendancePercent': (0, 100)},
+    'test_scores': {'score': (0, 100)},
+    'backlogs': {'attempts': (1, None)},
+    'fee_payments': {'amount': (0, None), 'dueMonths': (0, None)},
+    'fellowships': {'amount': (0, None), 'duration': (1, None)},
+    'mental_health_assessments': {'stressLevel': LEVEL, 'anxietyLevel': LEVEL, 'depressionLevel': LEVEL,
+                                  'sleepQuality': LEVEL, 'academicPressure': LEVEL, 'socialSupport': LEVEL,
+                                  'overallWellness': LEVEL, 'riskScore': LEVEL},
+    'counseling_appointments': {'duration': (1, None)},
+    'wellness_challenges': {'targetValue': (1, None), 'currentProgress': (0, None), 'points': (0, None)},
+}
+
+BOOLEAN_TEXT = {'true', 'false', '1', '0'}
+
+
+def table_columns(migrations_dir=MIGRATIONS_DIR):
+    """
+    {table: (required columns, {column: declared type}, unique keys)} of the
+    model each table loads into. The unique keys are the primary key, unless
+    it is an autoincrement ID, and the columns of each unique index.
+    """
+    _, indexes, columns = schema(migrations_dir)
+    unique_indexes = {}
+    for statement in indexes:
+        match = re.match(r'CREATE UNIQUE INDEX "\w+" ON "(\w+)"\((.*)\)', statement)
+        if match:
+            unique_indexes.setdefault(match.group(1), []).append(re.findall(r'"(\w+)"', match.group(2)))
+
+    tables = {}
+    for model, table in SOURCES.items():
+        required, types, primary_key = [], {}, []
+        for _, name, declared, not_null, default, primary in columns[model]:
+            if primary and declared == 'INTEGER':
+                continue  # autoincrement ID, not in the files
+            types[name] = declared
+            if primary:
+                primary_key.append((primary, name))
+            if not_null and default is None and name not in FILLS.get(model, {}):
+                required.append(name)
+        keys = [[name for _, name in sorted(primary_key)]] if primary_key else []
+        tables[table] = (required, types, keys + unique_indexes.get(model, []))
+    return tables
+
+
+def key_hashes(frame, key):
+    return pd.util.hash_pandas_object(frame[key], index=False).to_numpy()
+
+
+class KeySet:
+    """A growing set of 64-bit key hashes, kept as one sorted array"""
+
+    def __init__(self):
+        self.hashes = np.empty(0, dtype=np.uint64)
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def contains(self, hashes):
+        if not len(self.hashes):
+            return np.zeros(len(hashes), dtype=bool)
+        positions = np.searchsorted(self.hashes, hashes).clip(max=len(self.hashes) - 1)
+        return self.hashes[positions] == hashes
+
+    def add_new(self, hashes):
+        """Add the hashes; True for each one already in the set or earlier in `hashes`"""
+        # Working in sorted order makes the lookups cache-friendly and the
+        # repeats within the chunk adjacent; the stable sort keeps a key's
+        # first occurrence as the one that is not a duplicate
+        order = np.argsort(hashes, kind='stable')
+        ordered = hashes[order]
+        repeated = self.contains(ordered)
+        repeated[1:] |= ordered[1:] == ordered[:-1]
+        # Two sorted runs, so the stable sort is a linear merge
+        self.hashes = np.sort(np.concatenate([self.hashes, ordered[~repeated]]), kind='stable')
+        seen = np.empty_like(repeated)
+        seen[order] = repeated
+        return seen
+
+
+class Violations:
+    """Counts and the first few rows of each (table, check)"""
+
+    def __init__(self, samples=DEFAULT_SAMPLES):
+        self.samples = samples
+        self.counts = {}
+        self.rows = {}
+        self.warnings = set()
+
+    def add(self, table, check, chunk, mask, warning=False):
+        count = int(mask.sum())
+        if not count:
+            return
+        key = (table, check)
+        if warning:
+            self.warnings.add(key)
+        self.counts[key] = self.counts.get(key, 0) + count
+        kept = self.rows.setdefault(key, [])
+        if len(kept) < self.samples:
+            for index, row in chunk[mask].head(self.samples - len(kept)).iterrows():
+                kept.append((index + 1, row.to_dict()))
+
+    def add_table(self, table, check, count):
+        """A violation of the table as a whole, such as a missing column"""
+        self.counts[(table, check)] = self.counts.get((table, check), 0) + count
+        self.rows.setdefault((table, check), [])
+
+    def total(self, warnings=False):
+        """Rows found by the failing checks, or by the warning ones"""
+        return sum(count for key, count in self.counts.items() if (key in self.warnings) == warnings)
+
+    def report(self):
+        for (table, check), count in self.counts.items():
+            print(f"{'⚠️ ' if (table, check) in self.warnings else '❌'} {table}: {check}: {count:,}")
+            for row_number, row in self.rows[(table, check)]:
+                print(f"     row {row_number}: {row}")
+
+
+def unparsed_dates(values):
+    """True where a non-empty value is not a date"""
+    # Dates repeat a lot, so each distinct value is parsed once
+    codes, distinct = pd.factorize(values)
+    parsed = pd.to_datetime(pd.Series(distinct, dtype=object), format='ISO8601', errors='coerce')
+    bad = (parsed.isna() & (pd.Series(distinct) != '')).to_numpy()
+    return bad[codes]
+
+
+def check_chunk(table, chunk, required, types, student_ids, unique_sets, violations):
+    """unique_sets maps each key to (its KeySet, whether a repeat is only a warning)"""
+    for column in required:
+        if column in chunk:
+            violations.add(table, f"missing {column}", chunk, (chunk[column] == '').to_numpy())
+
+    bounds = RANGES.get(table, {})
+    for column, declared in types.items():
+        if column not in chunk:
+            continue
+        values = chunk[column]
+        if declared in ('INTEGER', 'REAL') or column in bounds:
+            numbers = pd.to_numeric(values.replace('', None), errors='coerce').to_numpy(dtype=float)
+            filled = (values != '').to_numpy()
+            violations.add(table, f"{column} is not a number", chunk, np.isnan(numbers) & filled)
+            if declared == 'INTEGER':
+                violations.add(table, f"{column} is not an integer", chunk, filled & (numbers % 1 != 0))
+            if column in bounds:
+                low, high = bounds[column]
+                outside = np.zeros(len(chunk), dtype=bool)
+                if low is not None:
+                    outside |= numbers < low
+                if high is not None:
+                    outside |= numbers > high
+                label = f"{'' if low is None else low}..{'' if high is None else high}"
+                violations.add(table, f"{column} outside {label}", chunk, outside)
+        elif declared == 'DATETIME':
+            violations.add(table, f"{column} is not a date", chunk, unparsed_dates(values))
+        elif declared == 'BOOLEAN':
+            violations.add(table, f"{column} is not a boolean", chunk,
+                           ((values != '') & ~values.str.lower().isin(BOOLEAN_TEXT)).to_numpy())
+
+    for key, (seen, warning) in unique_sets.items():
+        if all(column in chunk for column in key):
+            violations.add(table, f"duplicate {', '.join(key)}", chunk, seen.add_new(key_hashes(chunk, list(key))),
+                           warning)
+
+    if table != 'students' and 'studentId' in chunk:
+        violations.add(table, "studentId not in students", chunk,
+                       ~student_ids.contains(key_hashes(chunk, ['studentId'])))
+
+
+def validate(data_dir, chunk_size=DEFAULT_CHUNK_SIZE, samples=DEFAULT_SAMPLES, migrations_dir=MIGRATIONS_DIR):
+    """Check every table in data_dir; returns the Violations found"""
+    columns = table_columns(migrations_dir)
+    violations = Violations(samples)
+    if find_source(data_dir, 'students') is None:
+        raise FileNotFoundError(f"No students table in {data_dir}")
+
+    student_ids = KeySet()
+    # Students first: every other table is checked against their IDs
+    for table in ['students'] + [table for table in SOURCES.values() if table != 'students']:
+        path = find_source(data_dir, table)
+        if path is None:
+            continue
+        required, types, keys = columns[table]
+        renames = RENAMES.get(MODELS[table], {})
+        header = pd.read_csv(path, nrows=0).rename(columns=renames).columns
+        for column in required:
+            if column not in header:
+                violations.add_table(table, f"no {column} column", 1)
+
+        unique_sets = {tuple(key): (KeySet(), True) for key in WARNING_KEYS.get(table, [])}
+        unique_sets.update({tuple(key): (KeySet(), False) for key in keys})
+        if table == 'students':
+            unique_sets[('studentId',)] = (student_ids, False)
+
+        started = time.perf_counter()
+        rows = 0
+        for chunk in pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunk_size):
+            chunk = chunk.rename(columns=renames)
+            check_chunk(table, chunk, required, types, student_ids, unique_sets, violations)
+            rows += len(chunk)
+        seconds = time.perf_counter() - started
+        print(f"  {table}: {rows:,} rows in {seconds:.1f}s ({rows / max(seconds, 1e-9):,.0f} rows/s)")
+    return violations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check a generated dataset for broken references, duplicates and bad values")
+    parser.add_argument('--data-dir', default='final', help="Directory with the generated CSV files")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Rows read and checked at a time")
+    parser.add_argument('--samples', type=int, default=DEFAULT_SAMPLES, help="Sample rows shown per violation")
+    parser.add_argument('--migrations', default=MIGRATIONS_DIR, help="Prisma migrations directory")
+    args = parser.parse_args()
+
+    print(f"Validating {args.data_dir}/...")
+    started = time.perf_counter()
+    violations = validate(args.data_dir, args.chunk_size, args.samples, args.migrations)
+    seconds = time.perf_counter() - started
+    violations.report()
+    warnings = f" and {violations.total(warnings=True):,} warnings" if violations.warnings else ""
+    if violations.total():
+        print(f"Found {violations.total():,} violations{warnings} in {seconds:.1f}s")
+        sys.exit(1)
+    print(f"✅ No violations found{warnings} in {seconds:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
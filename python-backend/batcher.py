@@ -0,0 +1,101 @@
+"""
+Asyncio micro-batching for single-row predictions.
+
+Concurrent /predict requests each submit one encoded feature row. A single
+background task gathers rows for up to max_wait_ms (or until max_batch_size
+rows are waiting), scores them with one vectorized call on a worker thread,
+and resolves every request's future with its own probability. Rows are
+submitted with a group (the model bundle that encoded them) and each group
+in a batch is scored separately, so a model swap never mixes versions.
+"""
+
+import asyncio
+
+import numpy as np
+
+
+class MicroBatcher:
+    """Coalesces concurrent single-row scoring calls into batches."""
+
+    def __init__(self, score, max_batch_size=256, max_wait_ms=2.0):
+        self.score = score
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.batches = 0
+        self.rows = 0
+        self._loop = None
+        self._queue = None
+        self._task = None
+
+    async def submit(self, row, group=None):
+        """Queue one feature row and wait for score(group, rows)'s result for it."""
+        loop = asyncio.get_running_loop()
+        # Started lazily on whichever loop is serving requests
+        if self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run())
+        future = loop.create_future()
+        self._queue.put_nowait((group, row, future))
+        return await future
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._loop = self._queue = self._task = None
+
+    async def _collect(self):
+        """Wait for one row, then keep gathering until the window closes or the batch is full."""
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            groups = {}
+            for group, row, future in batch:
+                groups.setdefault(id(group), (group, []))[1].append((row, future))
+
+            for group, items in groups.values():
+                rows = np.stack([row for row, _ in items])
+                try:
+                    results = await self._loop.run_in_executor(None, self.score, group, rows)
+                except Exception as e:
+                    for _, future in items:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+
+                self.batches += 1
+                self.rows += len(items)
+                for (_, future), result in zip(items, results):
+                    # The client may have gone away while we were scoring
+                    if not future.done():
+                        future.set_result(result)
+
+    def stats(self):
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000.0,
+            'batches': self.batches,
+            'rows': self.rows,
+            'mean_batch_size': round(self.rows / self.batches, 2) if self.batches else 0.0,
+        }
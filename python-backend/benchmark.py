@@ -0,0 +1,454 @@
+"""
+Latency and throughput benchmarks for the prediction service.
+
+Two modes, both fed with StudentData rows derived from csv/final:
+
+- inprocess: drives main.app directly through its ASGI interface (no
+  network, no HTTP client library), including the lifespan startup.
+- server: starts `uvicorn main:app` on a free local port and talks HTTP to
+  it, measuring cold start (with and without warm-up) as well.
+
+Each scenario reports p50/p95/p99 latency, requests/s, rows/s and peak RSS,
+and everything is written to one JSON file so runs can be diffed:
+
+    python benchmark.py --output bench-before.json
+    python benchmark.py --output bench-after.json --mode inprocess
+    python benchmark.py --compare bench-before.json bench-after.json
+
+The prediction cache is disabled unless --cache is given, since the
+inputs repeat and would otherwise mostly measure cache hits.
+"""
+
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import platform
+import resource
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from derive import derive_inputs, latest_two_scores
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BATCH_SIZES = (1, 10, 100, 1000, 10000)
+CONCURRENCY = (1, 8, 64)
+
+
+# --- Inputs ---
+def load_students(data_dir):
+    """StudentData dicts for every student in a csv/final style extract."""
+    students = pd.read_csv(os.path.join(data_dir, 'students_comprehensive_reduced_stratified.csv'),
+                           usecols=['studentId'], dtype=str)
+    test_scores = pd.read_csv(os.path.join(data_dir, 'test_scores_comprehensive_reduced_stratified.csv'),
+                              dtype={'studentId': str, 'testDate': str})
+    backlogs = pd.read_csv(os.path.join(data_dir, 'backlogs_comprehensive_reduced_stratified.csv'),
+                           dtype={'studentId': str})
+    inputs = derive_inputs(
+        students['studentId'], latest_two_scores(test_scores), backlogs['studentId'].value_counts()
+    )
+    return inputs.to_dict('records')
+
+
+class RowSource:
+    """Hands out real rows in a fixed pseudo-random order, repeating as needed."""
+
+    def __init__(self, rows, seed=0):
+        self.rows = rows
+        self.rng = np.random.default_rng(seed)
+
+    def take(self, n):
+        return [self.rows[i] for i in self.rng.integers(0, len(self.rows), size=n)]
+
+
+# --- Measurement ---
+def peak_rss_mib(pid=None):
+    """High-water RSS of this process (or another one via /proc), in MiB."""
+    if pid is None:
+        return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def summarize(scenario, latencies, elapsed, rows_per_request, **extra):
+    latencies_ms = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99]) if len(latencies_ms) else (0.0, 0.0, 0.0)
+    return {
+        'scenario': scenario,
+        'requests': len(latencies),
+        'rows_per_request': rows_per_request,
+        'p50_ms': round(float(p50), 3),
+        'p95_ms': round(float(p95), 3),
+        'p99_ms': round(float(p99), 3),
+        'mean_ms': round(float(latencies_ms.mean()), 3) if len(latencies_ms) else 0.0,
+        'requests_per_s': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'rows_per_s': round(len(latencies) * rows_per_request / elapsed, 1) if elapsed else 0.0,
+        **extra,
+    }
+
+
+def request_count(batch_size, quick):
+    """Enough repeats for stable percentiles without letting 10k-row batches run for minutes."""
+    budget = 20_000 if quick else 200_000
+    return int(max(5, min(500 if quick else 2000, budget // batch_size)))
+
+
+# --- In-process driver ---
+async def asgi_request(app, method, path, payload=None):
+    """One HTTP request through the ASGI interface; returns (status, parsed JSON body)."""
+    body = json.dumps(payload).encode() if payload is not None else b''
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': method,
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': b'',
+        'root_path': '',
+        'headers': [(b'host', b'benchmark'), (b'content-type', b'application/json'),
+                    (b'content-length', str(len(body)).encode())],
+        'client': ('127.0.0.1', 0),
+        'server': ('benchmark', 80),
+    }
+    request_sent = False
+    response_done = asyncio.Event()
+    response = {'status': None, 'body': []}
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+        await response_done.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+        elif message['type'] == 'http.response.body':
+            response['body'].append(message.get('body', b''))
+            if not message.get('more_body'):
+                response_done.set()
+
+    await app(scope, receive, send)
+    return response['status'], json.loads(b''.join(response['body']) or b'null')
+
+
+class AsgiLifespan:
+    """Runs the app's lifespan startup/shutdown the way a server would."""
+
+    def __init__(self, app):
+        self.app = app
+        self.incoming = asyncio.Queue()
+        self.outgoing = asyncio.Queue()
+        self.task = None
+
+    async def start(self):
+        scope = {'type': 'lifespan', 'asgi': {'version': '3.0'}, 'state': {}}
+        self.task = asyncio.create_task(self.app(scope, self.incoming.get, self.outgoing.put))
+        await self.incoming.put({'type': 'lifespan.startup'})
+        message = await self.outgoing.get()
+        if message['type'] != 'lifespan.startup.complete':
+            raise RuntimeError(f"Lifespan startup failed: {message}")
+
+    async def stop(self):
+        await self.incoming.put({'type': 'lifespan.shutdown'})
+        await self.outgoing.get()
+        await self.task
+
+
+async def run_concurrent(call, payloads, concurrency):
+    """Issue every payload through call() from `concurrency` client tasks; returns latencies and wall time."""
+    latencies = []
+    queue = list(reversed(payloads))
+
+    async def client():
+        while queue:
+            payload = queue.pop()
+            started = time.perf_counter()
+            status, body = await call(payload)
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                raise RuntimeError(f"Request failed with {status}: {body}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - started
+
+
+async def bench_inprocess(source, args):
+    results = []
+    started = time.perf_counter()
+    import main
+    lifespan = AsgiLifespan(main.app)
+    await lifespan.start()
+    while (await asgi_request(main.app, 'GET', '/readyz'))[0] != 200:
+        if main.load_state['status'] == 'failed':
+            raise RuntimeError(f"Model failed to load: {main.load_state['error']}")
+        await asyncio.sleep(0.01)
+    ready_seconds = time.perf_counter() - started
+
+    first = source.take(1)[0]
+    first_started = time.perf_counter()
+    await asgi_request(main.app, 'POST', '/predict', first)
+    first_latency = time.perf_counter() - first_started
+    results.append(summarize(
+        'inprocess/cold/first_predict', [first_latency], first_latency, 1,
+        startup_seconds=round(ready_seconds, 3), peak_rss_mib=peak_rss_mib(),
+    ))
+    print_result(results[-1])
+
+    async def predict(payload):
+        return await asgi_request(main.app, 'POST', '/predict', payload)
+
+    async def predict_batch(payload):
+        return await asgi_request(main.app, 'POST', '/predict/batch', payload)
+
+    # Warm the remaining paths before measuring steady state
+    await run_concurrent(predict, source.take(50), 1)
+
+    for concurrency in CONCURRENCY:
+        payloads = source.take(request_count(1, args.quick))
+        latencies, elapsed = await run_concurrent(predict, payloads, concurrency)
+        results.append(summarize(f'inprocess/predict/concurrency={concurrency}', latencies, elapsed, 1,
+                                 concurrency=concurrency, peak_rss_mib=peak_rss_mib()))
+        print_result(results[-1])
+
+    for size in args.batch_sizes:
+        payloads = [{'students': source.take(size)} for _ in range(request_count(size, args.quick))]
+        latencies, elapsed = await run_concurrent(predict_batch, payloads, 1)
+        results.append(summarize(f'inprocess/batch/size={size}', latencies, elapsed, size,
+                                 concurrency=1, peak_rss_mib=peak_rss_mib()))
+        print_result(results[-1])
+
+    await lifespan.stop()
+    return results
+
+
+# --- Out-of-process driver ---
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class UvicornServer:
+    """A `uvicorn main:app` child process on a free port."""
+
+    def __init__(self, env):
+        self.port = free_port()
+        self.env = {**os.environ, **env}
+        self.process = None
+
+    def start(self, timeout=120):
+        """Start the server and return the seconds until /readyz answered 200."""
+        started = time.perf_counter()
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'uvicorn', 'main:app', '--host', '127.0.0.1',
+             '--port', str(self.port), '--log-level', 'warning'],
+            cwd=HERE, env=self.env, stdout=subprocess.DEVNULL,
+        )
+        while time.perf_counter() - started < timeout:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with {self.process.returncode}")
+            try:
+                status, _ = self.request(http.client.HTTPConnection('127.0.0.1', self.port, timeout=5),
+                                         'GET', '/readyz')
+                if status == 200:
+                    return time.perf_counter() - started
+            except OSError:
+                pass
+            time.sleep(0.01)
+        raise RuntimeError(f"uvicorn was not ready after {timeout}s")
+
+    def stop(self):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait(timeout=30)
+
+    @staticmethod
+    def request(connection, method, path, payload=None):
+        body = json.dumps(payload) if payload is not None else None
+        connection.request(method, path, body=body, headers={'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        return response.status, json.loads(response.read() or b'null')
+
+
+def run_threads(server, path, payloads, concurrency):
+    """HTTP counterpart of run_concurrent: one keep-alive connection per client thread."""
+    latencies = []
+    errors = []
+    queue = list(reversed(payloads))
+    lock = threading.Lock()
+
+    def client():
+        connection = http.client.HTTPConnection('127.0.0.1', server.port, timeout=300)
+        while True:
+            with lock:
+                if not queue or errors:
+                    break
+                payload = queue.pop()
+            started = time.perf_counter()
+            status, body = server.request(connection, 'POST', path, payload)
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                if status != 200:
+                    errors.append(f"Request failed with {status}: {body}")
+        connection.close()
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise RuntimeError(errors[0])
+    return latencies, time.perf_counter() - started
+
+
+def bench_server(source, args, env):
+    results = []
+
+    # Cold start: time to ready and the first request, with and without warm-up
+    for warmup in ('0', '1'):
+        server = UvicornServer({**env, 'DROPOUT_WARMUP': warmup})
+        try:
+            ready_seconds = server.start()
+            latencies, _ = run_threads(server, '/predict', source.take(1), 1)
+            results.append(summarize(
+                f'server/cold/warmup={warmup}/first_predict', latencies, sum(latencies), 1,
+                startup_seconds=round(ready_seconds, 3), peak_rss_mib=peak_rss_mib(server.process.pid),
+            ))
+            print_result(results[-1])
+        finally:
+            server.stop()
+
+    server = UvicornServer(env)
+    try:
+        server.start()
+        run_threads(server, '/predict', source.take(50), 1)
+
+        for concurrency in CONCURRENCY:
+            payloads = source.take(request_count(1, args.quick))
+            latencies, elapsed = run_threads(server, '/predict', payloads, concurrency)
+            results.append(summarize(f'server/predict/concurrency={concurrency}', latencies, elapsed, 1,
+                                     concurrency=concurrency, peak_rss_mib=peak_rss_mib(server.process.pid)))
+            print_result(results[-1])
+
+        for size in args.batch_sizes:
+            payloads = [{'students': source.take(size)} for _ in range(request_count(size, args.quick))]
+            latencies, elapsed = run_threads(server, '/predict/batch', payloads, 1)
+            results.append(summarize(f'server/batch/size={size}', latencies, elapsed, size,
+                                     concurrency=1, peak_rss_mib=peak_rss_mib(server.process.pid)))
+            print_result(results[-1])
+    finally:
+        server.stop()
+    return results
+
+
+# --- Reporting ---
+def print_result(result):
+    print(f"{result['scenario']:<45} p50 {result['p50_ms']:>9.3f}ms  p95 {result['p95_ms']:>9.3f}ms  "
+          f"p99 {result['p99_ms']:>9.3f}ms  {result['requests_per_s']:>9.1f} req/s  "
+          f"{result['rows_per_s']:>10.1f} rows/s  rss {result['peak_rss_mib']} MiB")
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline_path, current_path):
+    """Print the change in p50/p99 and throughput for every scenario present in both files."""
+    with open(baseline_path) as f:
+        baseline = {result['scenario']: result for result in json.load(f)['results']}
+    with open(current_path) as f:
+        current = {result['scenario']: result for result in json.load(f)['results']}
+
+    def change(old, new):
+        return f"{(new - old) / old * 100:+7.1f}%" if old else '    n/a'
+
+    for scenario, new in current.items():
+        old = baseline.get(scenario)
+        if old is None:
+            continue
+        print(f"{scenario:<45} p50 {change(old['p50_ms'], new['p50_ms'])}  "
+              f"p99 {change(old['p99_ms'], new['p99_ms'])}  "
+              f"rows/s {change(old['rows_per_s'], new['rows_per_s'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the dropout prediction service.")
+    parser.add_argument('--mode', choices=['inprocess', 'server', 'both'], default='both')
+    parser.add_argument('--data-dir', default=os.path.join(HERE, '..', 'csv', 'final'))
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=list(BATCH_SIZES))
+    parser.add_argument('--quick', action='store_true', help="Fewer requests per scenario")
+    parser.add_argument('--cache', action='store_true', help="Leave the prediction cache enabled")
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'),
+                        help="Compare two results files instead of running")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    # Applies to the in-process app (imported after this) and the uvicorn children
+    env = {} if args.cache else {'DROPOUT_CACHE_SIZE': '0'}
+    os.environ.update(env)
+    # main.py resolves its artifacts relative to the working directory
+    output = os.path.abspath(args.output)
+    data_dir = os.path.abspath(args.data_dir)
+    os.chdir(HERE)
+
+    source = RowSource(load_students(data_dir))
+    results = []
+    if args.mode in ('server', 'both'):
+        results += bench_server(source, args, env)
+    # In-process last: importing main pins the model in this process's RSS
+    if args.mode in ('inprocess', 'both'):
+        results += asyncio.run(bench_inprocess(source, args))
+
+    report = {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(),
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'input_rows': len(source.rows),
+            'quick': args.quick,
+            'settings': {
+                key: value for key, value in sorted(os.environ.items()) if key.startswith('DROPOUT_')
+            },
+        },
+        'results': results,
+    }
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(results)} results to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Model inputs derived from raw student records.
+
+A pandas port of the per-student logic in
+app/routes/api/calculate-dropout-risk.ts, written as group-by operations so
+that a whole cohort is derived at once:
+
+- Current CGPA and score come from the student's latest two test scores
+  (by testDate, across all courses), the previous ones from the second
+  latest, with the route's defaults when a student has fewer scores.
+- Total backlogs is the number of backlog records; previous is one less.
+- Persona comes from the route's CGPA/score thresholds.
+"""
+
+import numpy as np
+import pandas as pd
+
+# csv/final extract names (the generators' *_comprehensive_reduced_stratified.csv)
+STUDENTS_FILE = 'students_comprehensive_reduced_stratified.csv'
+TEST_SCORES_FILE = 'test_scores_comprehensive_reduced_stratified.csv'
+BACKLOGS_FILE = 'backlogs_comprehensive_reduced_stratified.csv'
+ATTENDANCE_FILE = 'attendance_comprehensive_reduced_stratified.csv'
+FEE_PAYMENTS_FILE = 'fee_payments_comprehensive_reduced_stratified.csv'
+
+INPUT_COLUMNS = [
+    'studentID', 'persona', 'Current_CGPA', 'Total_Backlogs', 'Semester_Score',
+    'Previous_CGPA', 'Previous_Backlogs', 'Previous_Score',
+]
+
+# Defaults the TypeScript route uses when a student has no or one test score
+DEFAULT_CGPA = 7.0
+DEFAULT_SCORE = 75.0
+PREVIOUS_CGPA_OFFSET = 0.3
+PREVIOUS_SCORE_OFFSET = 3.0
+
+# (persona, minimum CGPA, minimum score), checked in order; otherwise 'Slow learners'
+PERSONA_THRESHOLDS = [
+    ('Fast learners', 8.5, 85),
+    ('Good', 7.5, 75),
+    ('Average', 6.5, 65),
+]
+
+
+def js_round2(values):
+    """Math.round(x * 100) / 100, which rounds halves up rather than to even."""
+    return np.floor(np.asarray(values, dtype=np.float64) * 100 + 0.5) / 100
+
+
+def latest_two_scores(test_scores):
+    """
+    Keep each student's two most recent test score rows.
+
+    Ties on testDate keep input order, so reducing a file chunk by chunk
+    (previous result first, then the next chunk) gives the same answer as
+    reducing it in one go.
+    """
+    ordered = test_scores[['studentId', 'testDate', 'score']].sort_values(
+        ['studentId', 'testDate'], ascending=[True, False], kind='stable'
+    )
+    return ordered.groupby('studentId', sort=False).head(2)
+
+
+class ScoreAccumulator:
+    """Streams test score chunks down to the latest two rows per student."""
+
+    def __init__(self):
+        self.top = pd.DataFrame({
+            'studentId': pd.Series(dtype=object),
+            'testDate': pd.Series(dtype=object),
+            'score': pd.Series(dtype=np.float64),
+        })
+        self.rows = 0
+
+    def update(self, chunk):
+        self.rows += len(chunk)
+        merged = pd.concat([self.top, chunk], ignore_index=True) if len(self.top) else chunk
+        self.top = latest_two_scores(merged)
+
+
+class BacklogCounter:
+    """Streams backlog chunks into a record count per student."""
+
+    def __init__(self):
+        self.counts = pd.Series(dtype=np.int64)
+        self.rows = 0
+
+    def update(self, chunk):
+        self.rows += len(chunk)
+        self.counts = self.counts.add(chunk['studentId'].value_counts(), fill_value=0)
+
+
+def latest_pair(top_scores, ids):
+    """Latest and second latest score for each id in ids, NaN where missing."""
+    ranked = top_scores.assign(rank=top_scores.groupby('studentId', sort=False).cumcount())
+    wide = ranked.pivot(index='studentId', columns='rank', values='score')
+    wide = wide.reindex(index=ids, columns=[0, 1])
+    return wide[0].to_numpy(dtype=np.float64), wide[1].to_numpy(dtype=np.float64)
+
+
+def derive_inputs(student_ids, top_scores, backlog_counts):
+    """
+    Build StudentData columns for the given students.
+
+    top_scores is the output of latest_two_scores (or ScoreAccumulator.top),
+    backlog_counts a Series of backlog record counts indexed by studentId.
+    """
+    ids = pd.Index(pd.Series(student_ids, dtype=object).astype(str), name='studentId')
+
+    latest, second = latest_pair(top_scores, ids)
+    has_latest = ~np.isnan(latest)
+    has_second = ~np.isnan(second)
+
+    # Same arithmetic order as the route: sum / count / 10
+    current_cgpa = np.where(
+        has_second, (latest + second) / 2 / 10, np.where(has_latest, latest / 10, DEFAULT_CGPA)
+    )
+    current_score = np.where(has_latest, latest, DEFAULT_SCORE)
+    previous_cgpa = np.where(has_second, second / 10, current_cgpa - PREVIOUS_CGPA_OFFSET)
+    previous_score = np.where(has_second, second, current_score - PREVIOUS_SCORE_OFFSET)
+
+    total_backlogs = (
+        backlog_counts.reindex(ids, fill_value=0).to_numpy().astype(np.int64)
+        if len(backlog_counts) else np.zeros(len(ids), dtype=np.int64)
+    )
+    previous_backlogs = np.maximum(0, total_backlogs - 1)
+
+    # Persona is decided on the unrounded values, as in the route
+    persona = np.select(
+        [(current_cgpa >= cgpa) & (current_score >= score) for _, cgpa, score in PERSONA_THRESHOLDS],
+        [name for name, _, _ in PERSONA_THRESHOLDS],
+        default='Slow learners',
+    )
+
+    return pd.DataFrame({
+        'studentID': ids.to_numpy(),
+        'persona': persona,
+        'Current_CGPA': js_round2(current_cgpa),
+        'Total_Backlogs': total_backlogs,
+        'Semester_Score': js_round2(current_score),
+        'Previous_CGPA': js_round2(previous_cgpa),
+        'Previous_Backlogs': previous_backlogs,
+        'Previous_Score': js_round2(previous_score),
+    }, columns=INPUT_COLUMNS)
+
+
+def route_inputs(student_id, test_scores, backlog_count):
+    """Line-by-line port of the route's loop for one student, the reference for parity checks."""
+    import math
+
+    scores = [row['score'] for row in sorted(test_scores, key=lambda row: row['testDate'], reverse=True)[:2]]
+    current_cgpa = sum(scores) / len(scores) / 10 if scores else DEFAULT_CGPA
+    current_score = scores[0] if scores else DEFAULT_SCORE
+    previous_cgpa = scores[1] / 10 if len(scores) > 1 else current_cgpa - PREVIOUS_CGPA_OFFSET
+    previous_score = scores[1] if len(scores) > 1 else current_score - PREVIOUS_SCORE_OFFSET
+
+    persona = 'Slow learners'
+    for name, cgpa, score in PERSONA_THRESHOLDS:
+        if current_cgpa >= cgpa and current_score >= score:
+            persona = name
+            break
+
+    def round2(value):
+        return math.floor(value * 100 + 0.5) / 100
+
+    return {
+        'studentID': student_id,
+        'persona': persona,
+        'Current_CGPA': round2(current_cgpa),
+        'Total_Backlogs': backlog_count,
+        'Semester_Score': round2(current_score),
+        'Previous_CGPA': round2(previous_cgpa),
+        'Previous_Backlogs': max(0, backlog_count - 1),
+        'Previous_Score': round2(previous_score),
+    }
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join('..', 'csv', 'final')
+    students = pd.read_csv(os.path.join(data_dir, STUDENTS_FILE), usecols=['studentId'], dtype=str)
+    test_scores = pd.read_csv(os.path.join(data_dir, TEST_SCORES_FILE), dtype={'studentId': str, 'testDate': str})
+    backlogs = pd.read_csv(os.path.join(data_dir, BACKLOGS_FILE), dtype={'studentId': str})
+
+    derived = derive_inputs(
+        students['studentId'], latest_two_scores(test_scores), backlogs['studentId'].value_counts()
+    )
+
+    scores_by_student = {key: group.to_dict('records') for key, group in test_scores.groupby('studentId')}
+    backlog_counts = backlogs['studentId'].value_counts().to_dict()
+    expected = pd.DataFrame([
+        route_inputs(student_id, scores_by_student.get(student_id, []), backlog_counts.get(student_id, 0))
+        for student_id in students['studentId']
+    ], columns=INPUT_COLUMNS)
+
+    for column in INPUT_COLUMNS:
+        assert (derived[column].to_numpy() == expected[column].to_numpy()).all(), f"{column} mismatch"
+    print(f"derive_inputs matches the route's per-student logic on {len(derived)} students.")
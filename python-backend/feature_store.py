@@ -0,0 +1,442 @@
+"""
+Columnar per-student feature store built from the csv/final extracts.
+
+One build step reads test scores, backlogs, attendance and fee payments and
+writes per-student aggregates as plain NumPy arrays that load memory-mapped:
+
+    feature_store/
+      manifest.json      current generation, columns, persona labels, row count, build stats
+      gen-000007/
+        student_ids.npy  studentId per row, sorted (fixed-width unicode)
+        features.npy     float64 (rows, columns) aggregates, C order
+        personas.npy     int8 code into manifest['personas']
+        digests.npy      uint64 hash of each student's source rows
+
+Every build or refresh writes a complete new generation directory and then
+switches manifest.json to it with one atomic rename, so a reader (or a
+crash) never sees arrays from two different builds. The previous
+generation is kept for readers that read the old manifest just before the
+switch; older ones are removed.
+
+The first six columns are the StudentData inputs exactly as derive.py (and
+the TypeScript route) computes them, so the store can feed the model
+directly. Later builds only recompute students whose digest changed:
+
+    python feature_store.py build --data-dir ../csv/final --store feature_store
+    python feature_store.py build --full            # ignore the existing store
+    python feature_store.py show E0001 E0002
+
+Readers open the arrays with mmap_mode='r', so forked workers share the
+pages. Lookups either go through a dict built once per process (O(1) per
+id) or a binary search over the memory-mapped sorted ids, which needs no
+per-process index at all; the prediction service uses the latter.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from derive import (
+    ATTENDANCE_FILE, BACKLOGS_FILE, FEE_PAYMENTS_FILE, INPUT_COLUMNS, PERSONA_THRESHOLDS,
+    STUDENTS_FILE, TEST_SCORES_FILE, ScoreAccumulator, derive_inputs, latest_pair,
+)
+
+MANIFEST = 'manifest.json'
+GENERATION_PREFIX = 'gen-'
+ARRAYS = ['student_ids.npy', 'features.npy', 'personas.npy', 'digests.npy']
+MODEL_INPUTS = [column for column in INPUT_COLUMNS if column not in ('studentID', 'persona')]
+COLUMNS = MODEL_INPUTS + [
+    'latest_score',
+    'previous_score',
+    'test_count',
+    'uncleared_backlogs',
+    'attendance_mean',
+    'attendance_latest_month',
+    'pending_fees',
+    'overdue_fees',
+    'overdue_amount',
+]
+PERSONAS = sorted([name for name, _, _ in PERSONA_THRESHOLDS] + ['Slow learners'])
+
+# Source files whose rows feed the aggregates; a change in any of them marks
+# the student for recomputation
+SOURCES = {
+    'test_scores': TEST_SCORES_FILE,
+    'backlogs': BACKLOGS_FILE,
+    'attendance': ATTENDANCE_FILE,
+    'fee_payments': FEE_PAYMENTS_FILE,
+}
+
+
+def read_chunks(path, chunk_size, columns=None, dtype=None):
+    return pd.read_csv(path, usecols=columns, dtype=dtype, chunksize=chunk_size)
+
+
+class GroupSums:
+    """Streams chunks into per-student sums of some columns."""
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.sums = pd.DataFrame(columns=columns, dtype=np.float64)
+
+    def update(self, frame):
+        grouped = frame.groupby('studentId')[self.columns].sum()
+        self.sums = grouped if self.sums.empty else self.sums.add(grouped, fill_value=0)
+
+    def column(self, name, ids, fill=0.0):
+        return self.sums[name].reindex(ids, fill_value=fill).to_numpy(dtype=np.float64) \
+            if not self.sums.empty else np.full(len(ids), fill)
+
+
+class LatestMonthAttendance:
+    """Streams attendance chunks down to each student's latest month (sum and count)."""
+
+    def __init__(self):
+        self.state = None
+
+    def update(self, chunk):
+        grouped = chunk.groupby(['studentId', 'month'])['attendancePercent'].agg(['sum', 'count']).reset_index()
+        merged = grouped if self.state is None else pd.concat([self.state, grouped], ignore_index=True)
+        merged = merged.groupby(['studentId', 'month'], as_index=False)[['sum', 'count']].sum()
+        latest = merged.groupby('studentId')['month'].transform('max')
+        self.state = merged[merged['month'] == latest]
+
+    def mean(self, ids):
+        if self.state is None:
+            return np.full(len(ids), np.nan)
+        means = (self.state['sum'] / self.state['count']).set_axis(self.state['studentId'])
+        return means.reindex(ids).to_numpy(dtype=np.float64)
+
+
+def student_ids(data_dir, chunk_size):
+    chunks = read_chunks(os.path.join(data_dir, STUDENTS_FILE), chunk_size, ['studentId'], {'studentId': str})
+    return np.unique(np.concatenate([chunk['studentId'].to_numpy(dtype=str) for chunk in chunks]))
+
+
+def source_digests(data_dir, ids, chunk_size):
+    """
+    Order-independent uint64 digest of each student's rows across all sources:
+    the wrapping sum of per-row hashes, salted with the source name.
+    """
+    digests = np.zeros(len(ids), dtype=np.uint64)
+    if not len(ids):
+        return digests
+    for name, filename in SOURCES.items():
+        for chunk in read_chunks(os.path.join(data_dir, filename), chunk_size, dtype=str):
+            hashes = pd.util.hash_pandas_object(chunk.assign(_source=name), index=False).to_numpy()
+            positions = np.searchsorted(ids, chunk['studentId'].to_numpy(dtype=str))
+            positions = np.minimum(positions, len(ids) - 1)
+            known = ids[positions] == chunk['studentId'].to_numpy(dtype=str)
+            np.add.at(digests, positions[known], hashes[known])
+    return digests
+
+
+def aggregate(data_dir, ids, chunk_size):
+    """Feature matrix (len(ids), len(COLUMNS)) and persona codes for the given sorted ids."""
+    wanted = pd.Index(ids, name='studentId')
+
+    def rows_for_wanted(chunk):
+        return chunk[chunk['studentId'].isin(wanted)]
+
+    scores = ScoreAccumulator()
+    test_counts = GroupSums(['test_count'])
+    for chunk in read_chunks(os.path.join(data_dir, TEST_SCORES_FILE), chunk_size,
+                             ['studentId', 'testDate', 'score'],
+                             {'studentId': str, 'testDate': str, 'score': np.float64}):
+        chunk = rows_for_wanted(chunk)
+        scores.update(chunk)
+        test_counts.update(chunk.assign(test_count=1.0))
+
+    backlogs = GroupSums(['backlogs', 'uncleared'])
+    for chunk in read_chunks(os.path.join(data_dir, BACKLOGS_FILE), chunk_size,
+                             ['studentId', 'cleared'], {'studentId': str, 'cleared': str}):
+        chunk = rows_for_wanted(chunk)
+        backlogs.update(chunk.assign(
+            backlogs=1.0, uncleared=(chunk['cleared'].str.lower() != 'true').astype(np.float64)
+        ))
+
+    attendance = GroupSums(['attendancePercent', 'attendance_rows'])
+    latest_month = LatestMonthAttendance()
+    for chunk in read_chunks(os.path.join(data_dir, ATTENDANCE_FILE), chunk_size,
+                             ['studentId', 'month', 'attendancePercent'],
+                             {'studentId': str, 'month': str, 'attendancePercent': np.float64}):
+        chunk = rows_for_wanted(chunk)
+        attendance.update(chunk.assign(attendance_rows=1.0))
+        latest_month.update(chunk)
+
+    fees = GroupSums(['pending', 'overdue', 'overdue_amount'])
+    for chunk in read_chunks(os.path.join(data_dir, FEE_PAYMENTS_FILE), chunk_size,
+                             ['studentId', 'status', 'dueMonths', 'amount'],
+                             {'studentId': str, 'status': str, 'dueMonths': np.float64, 'amount': np.float64}):
+        chunk = rows_for_wanted(chunk)
+        pending = chunk['status'] != 'Paid'
+        overdue = pending & (chunk['dueMonths'] > 0)
+        fees.update(chunk.assign(
+            pending=pending.astype(np.float64),
+            overdue=overdue.astype(np.float64),
+            overdue_amount=chunk['amount'].where(overdue, 0.0),
+        ))
+
+    backlog_counts = backlogs.sums['backlogs'] if not backlogs.sums.empty else pd.Series(dtype=np.float64)
+    inputs = derive_inputs(ids, scores.top, backlog_counts)
+    latest, second = latest_pair(scores.top, wanted)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        attendance_mean = (attendance.column('attendancePercent', wanted)
+                           / attendance.column('attendance_rows', wanted, fill=np.nan))
+
+    features = np.column_stack([
+        *(inputs[column].to_numpy(dtype=np.float64) for column in MODEL_INPUTS),
+        latest,
+        second,
+        test_counts.column('test_count', wanted),
+        backlogs.column('uncleared', wanted),
+        attendance_mean,
+        latest_month.mean(wanted),
+        fees.column('pending', wanted),
+        fees.column('overdue', wanted),
+        fees.column('overdue_amount', wanted),
+    ]) if len(ids) else np.empty((0, len(COLUMNS)))
+    personas = np.searchsorted(PERSONAS, inputs['persona'].to_numpy(dtype=str)).astype(np.int8)
+    return features, personas
+
+
+def _save(directory, name, array):
+    with open(os.path.join(directory, name), 'wb') as f:
+        np.save(f, array)
+
+
+def build(data_dir, store_dir, chunk_size=100_000, full=False):
+    """Create or incrementally refresh the store; returns the build stats."""
+    started = time.perf_counter()
+    ids = student_ids(data_dir, chunk_size)
+    digests = source_digests(data_dir, ids, chunk_size)
+
+    previous = None
+    if not full and os.path.isfile(os.path.join(store_dir, MANIFEST)):
+        previous = FeatureStore(store_dir)
+        if previous.manifest.get('columns') != COLUMNS or previous.manifest.get('personas') != PERSONAS:
+            previous = None  # layout changed, rebuild everything
+
+    if previous is None:
+        changed = np.ones(len(ids), dtype=bool)
+        positions = np.full(len(ids), -1)
+        removed = 0
+    else:
+        positions = previous.positions(ids)
+        changed = (positions < 0) | (previous.digests[np.maximum(positions, 0)] != digests)
+        removed = len(previous.ids) - int((positions >= 0).sum())
+
+    features = np.empty((len(ids), len(COLUMNS)), dtype=np.float64)
+    personas = np.empty(len(ids), dtype=np.int8)
+    if changed.any():
+        features[changed], personas[changed] = aggregate(data_dir, ids[changed], chunk_size)
+    if previous is not None:
+        kept = positions[~changed]
+        features[~changed] = previous.features[kept]
+        personas[~changed] = previous.personas[kept]
+
+    stats = {
+        'students': len(ids),
+        'recomputed': int(changed.sum()),
+        'removed': removed,
+        'incremental': previous is not None,
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+    _write(store_dir, data_dir, ids, features, personas, digests, stats)
+    return stats
+
+
+def refresh(data_dir, store_dir, student_ids, chunk_size=100_000):
+    """
+    Recompute only the given students after their source rows changed,
+    without hashing everyone else's rows. IDs not in the store are ignored
+    (a build adds new students); they are listed in the returned stats.
+    """
+    started = time.perf_counter()
+    store = FeatureStore(store_dir)
+    positions = store.positions(student_ids)
+    ids = np.unique(np.asarray([str(student_id) for student_id in student_ids], dtype=str)[positions >= 0])
+    rows = store.positions(ids)
+
+    features = np.array(store.features)
+    personas = np.array(store.personas)
+    digests = np.array(store.digests)
+    if len(ids):
+        features[rows], personas[rows] = aggregate(data_dir, ids, chunk_size)
+        digests[rows] = source_digests(data_dir, ids, chunk_size)
+
+    stats = {
+        'students': len(store),
+        'recomputed': len(ids),
+        'removed': 0,
+        'incremental': True,
+        'seconds': round(time.perf_counter() - started, 3),
+        'unknown': sorted({str(student_id) for student_id, row in zip(student_ids, positions) if row < 0}),
+    }
+    _write(store_dir, data_dir, np.asarray(store.ids), features, personas, digests, stats)
+    return stats
+
+
+def _generations(store_dir):
+    return sorted(name for name in os.listdir(store_dir)
+                  if name.startswith(GENERATION_PREFIX) and os.path.isdir(os.path.join(store_dir, name)))
+
+
+def _write(store_dir, data_dir, ids, features, personas, digests, stats):
+    os.makedirs(store_dir, exist_ok=True)
+    previous = None
+    if os.path.isfile(os.path.join(store_dir, MANIFEST)):
+        with open(os.path.join(store_dir, MANIFEST)) as f:
+            previous = json.load(f).get('generation')
+    existing = _generations(store_dir)
+    number = int(existing[-1][len(GENERATION_PREFIX):]) + 1 if existing else 1
+    generation = f"{GENERATION_PREFIX}{number:06d}"
+
+    directory = os.path.join(store_dir, generation)
+    os.makedirs(directory)
+    for name, array in zip(ARRAYS, [ids, features, personas, digests]):
+        _save(directory, name, array)
+
+    manifest = {
+        'generation': generation,
+        'columns': COLUMNS,
+        'personas': PERSONAS,
+        'rows': len(ids),
+        'data_dir': os.path.abspath(data_dir),
+        'built_at': datetime.now(timezone.utc).isoformat(),
+        'last_build': stats,
+    }
+    # The one switch from the old generation to the new one
+    with open(os.path.join(store_dir, MANIFEST + '.tmp'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(os.path.join(store_dir, MANIFEST + '.tmp'), os.path.join(store_dir, MANIFEST))
+
+    # Keep the new and the previous generation; anything else is older or
+    # left over from an interrupted write. Open memory maps of removed files
+    # stay valid until their readers close them.
+    for old in _generations(store_dir):
+        if old not in (generation, previous):
+            shutil.rmtree(os.path.join(store_dir, old), ignore_errors=True)
+    if previous is None:
+        # A store from before generations: its arrays were at the top level
+        for name in ARRAYS:
+            if os.path.isfile(os.path.join(store_dir, name)):
+                os.remove(os.path.join(store_dir, name))
+
+
+def manifest_signature(stat):
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+class FeatureStore:
+    """Read side of the store: memory-mapped arrays plus a studentId -> row dict."""
+
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        with open(os.path.join(store_dir, MANIFEST)) as f:
+            self.manifest = json.load(f)
+            # Identifies this manifest file; every write replaces it with a new one
+            self.signature = manifest_signature(os.fstat(f.fileno()))
+        self.columns = self.manifest['columns']
+        self.personas_labels = np.array(self.manifest['personas'], dtype=object)
+        # Stores written before generations existed keep their arrays at the top level
+        directory = os.path.join(store_dir, self.manifest.get('generation', ''))
+        self.ids = np.load(os.path.join(directory, 'student_ids.npy'), mmap_mode='r')
+        self.features = np.load(os.path.join(directory, 'features.npy'), mmap_mode='r')
+        self.personas = np.load(os.path.join(directory, 'personas.npy'), mmap_mode='r')
+        self.digests = np.load(os.path.join(directory, 'digests.npy'), mmap_mode='r')
+        self._index = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def is_current(self):
+        """False once a build or refresh has switched the store to another generation."""
+        try:
+            return manifest_signature(os.stat(os.path.join(self.store_dir, MANIFEST))) == self.signature
+        except FileNotFoundError:
+            return True  # nothing newer to switch to
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = {student_id: row for row, student_id in enumerate(self.ids.tolist())}
+        return self._index
+
+    def positions(self, student_ids):
+        """Row of each id, or -1 for ids not in the store."""
+        index = self.index
+        return np.fromiter((index.get(str(student_id), -1) for student_id in student_ids),
+                           dtype=np.int64, count=len(student_ids))
+
+    def search(self, student_ids):
+        """Same as positions(), by binary search over the sorted id array (zero-copy)."""
+        if not len(self.ids):
+            return np.full(len(student_ids), -1, dtype=np.int64)
+        # Not cast to the stored width, which would truncate longer ids into false matches
+        wanted = np.asarray([str(student_id) for student_id in student_ids], dtype=str)
+        positions = np.minimum(np.searchsorted(self.ids, wanted), len(self.ids) - 1)
+        return np.where(self.ids[positions] == wanted, positions, -1).astype(np.int64)
+
+    def inputs(self, student_ids, binary_search=False):
+        """
+        StudentData columns for the ids that are in the store, in request order,
+        plus the list of ids that are not.
+        """
+        positions = self.search(student_ids) if binary_search else self.positions(student_ids)
+        found = positions >= 0
+        missing = [str(student_id) for student_id, ok in zip(student_ids, found) if not ok]
+        return self.inputs_at(positions[found]), missing
+
+    def inputs_at(self, rows):
+        """StudentData columns for the given store rows."""
+        inputs = pd.DataFrame(
+            np.asarray(self.features[rows][:, :len(MODEL_INPUTS)]), columns=MODEL_INPUTS
+        )
+        for column in ('Total_Backlogs', 'Previous_Backlogs'):
+            inputs[column] = inputs[column].astype(np.int64)
+        inputs.insert(0, 'persona', self.personas_labels[self.personas[rows]])
+        inputs.insert(0, 'studentID', self.ids[rows].tolist())
+        return inputs[INPUT_COLUMNS]
+
+    def rows(self, student_ids):
+        """All stored columns for the given ids, as a DataFrame indexed by studentId."""
+        positions = self.positions(student_ids)
+        rows = positions[positions >= 0]
+        frame = pd.DataFrame(np.asarray(self.features[rows]), columns=self.columns,
+                             index=pd.Index(self.ids[rows], name='studentId'))
+        frame.insert(0, 'persona', self.personas_labels[self.personas[rows]])
+        return frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the per-student feature store.")
+    parser.add_argument('--store', default=os.environ.get('DROPOUT_FEATURE_STORE', 'feature_store'))
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = commands.add_parser('build', help="Create or incrementally refresh the store")
+    build_parser.add_argument('--data-dir', default=os.path.join('..', 'csv', 'final'))
+    build_parser.add_argument('--chunk-size', type=int, default=100_000)
+    build_parser.add_argument('--full', action='store_true', help="Recompute every student")
+
+    show = commands.add_parser('show', help="Print the stored features of some students")
+    show.add_argument('student_ids', nargs='+')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        stats = build(args.data_dir, args.store, args.chunk_size, args.full)
+        print(f"{'Updated' if stats['incremental'] else 'Built'} {args.store}: {stats['students']} students, "
+              f"{stats['recomputed']} recomputed, {stats['removed']} removed in {stats['seconds']}s")
+    else:
+        with pd.option_context('display.max_columns', None, 'display.width', 200):
+            print(FeatureStore(args.store).rows(args.student_ids).T)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+NumPy feature assembly for the dropout model.
+
+Maps validated StudentData dicts straight into a contiguous array in the
+model's training column order, without building a pandas DataFrame per call.
+Run this file directly to check it against the original DataFrame path.
+"""
+
+import numpy as np
+
+# Raw numeric inputs taken from StudentData, in a fixed order
+INPUT_FIELDS = (
+    'Current_CGPA',
+    'Total_Backlogs',
+    'Semester_Score',
+    'Previous_CGPA',
+    'Previous_Backlogs',
+    'Previous_Score',
+)
+
+# Trend features are the difference between a current and a previous input
+TREND_FEATURES = {
+    'CGPA_Trend': ('Current_CGPA', 'Previous_CGPA'),
+    'Grade_Trend': ('Semester_Score', 'Previous_Score'),
+    'Backlog_Trend': ('Total_Backlogs', 'Previous_Backlogs'),
+}
+
+
+class FeatureAssembler:
+    """Builds model input rows from the training columns and persona classes."""
+
+    def __init__(self, training_columns, persona_classes, dtype=np.float64):
+        self.columns = list(training_columns)
+        self.dtype = np.dtype(dtype)
+        # LabelEncoder codes are the positions in its sorted classes_
+        self.persona_codes = {str(name): code for code, name in enumerate(persona_classes)}
+
+        # Work out once where every training column comes from. Columns we
+        # know nothing about stay zero, like reindex(fill_value=0) did.
+        self.persona_position = None
+        self.copy_plan = []
+        self.trend_plan = []
+        for position, column in enumerate(self.columns):
+            if column == 'persona':
+                self.persona_position = position
+            elif column in INPUT_FIELDS:
+                self.copy_plan.append((position, INPUT_FIELDS.index(column)))
+            elif column in TREND_FEATURES:
+                current, previous = TREND_FEATURES[column]
+                self.trend_plan.append(
+                    (position, INPUT_FIELDS.index(current), INPUT_FIELDS.index(previous))
+                )
+
+    def encode_persona(self, persona):
+        """Same result as le_persona.transform for a single value."""
+        try:
+            return self.persona_codes[persona]
+        except KeyError:
+            raise ValueError(f"y contains previously unseen labels: {persona!r}")
+
+    def assemble(self, rows):
+        """Return an (n_rows, n_columns) C-contiguous array for the given dicts."""
+        n_rows = len(rows)
+        raw = np.array(
+            [[row[field] for field in INPUT_FIELDS] for row in rows], dtype=np.float64
+        ).reshape(n_rows, len(INPUT_FIELDS))
+
+        out = self._numeric(raw)
+        if self.persona_position is not None:
+            out[:, self.persona_position] = [self.encode_persona(row['persona']) for row in rows]
+        return out
+
+    def assemble_columns(self, data):
+        """
+        Same as assemble() for column-oriented input such as a DataFrame, so
+        bulk callers never build one dict per student. Each persona value is
+        encoded once rather than once per row.
+        """
+        raw = np.column_stack([np.asarray(data[field], dtype=np.float64) for field in INPUT_FIELDS])
+
+        out = self._numeric(raw)
+        if self.persona_position is not None:
+            labels, inverse = np.unique(np.asarray(data['persona']).astype(str), return_inverse=True)
+            codes = np.array([self.encode_persona(label) for label in labels], dtype=self.dtype)
+            out[:, self.persona_position] = codes[inverse.reshape(-1)]
+        return out
+
+    def _numeric(self, raw):
+        """Output array with the copied and trend columns filled from raw inputs."""
+        out = np.zeros((len(raw), len(self.columns)), dtype=self.dtype)
+        for position, source in self.copy_plan:
+            out[:, position] = raw[:, source]
+        for position, current, previous in self.trend_plan:
+            out[:, position] = raw[:, current] - raw[:, previous]
+        return out
+
+    def assemble_one(self, row):
+        """Convenience wrapper for a single request."""
+        return self.assemble([row])
+
+
+def dataframe_features(rows, le_persona, training_columns):
+    """The original per-request pandas path, kept as the reference for parity checks."""
+    import pandas as pd
+
+    df = pd.DataFrame(rows)
+    df['CGPA_Trend'] = df['Current_CGPA'] - df['Previous_CGPA']
+    df['Grade_Trend'] = df['Semester_Score'] - df['Previous_Score']
+    df['Backlog_Trend'] = df['Total_Backlogs'] - df['Previous_Backlogs']
+    df['persona'] = le_persona.transform(df['persona'])
+    return df.reindex(columns=training_columns, fill_value=0)
+
+
+if __name__ == "__main__":
+    import joblib
+
+    le_persona = joblib.load('label_encoder_v2.joblib')
+    training_columns = joblib.load('training_columns_v2.joblib')
+    model = joblib.load('dropout_model_v3.joblib')
+    assembler = FeatureAssembler(training_columns, le_persona.classes_)
+
+    rng = np.random.default_rng(0)
+    rows = [
+        {
+            'studentID': f"E{i:04d}",
+            'persona': str(rng.choice(le_persona.classes_)),
+            'Current_CGPA': round(float(rng.uniform(2, 10)), 2),
+            'Total_Backlogs': int(rng.integers(0, 6)),
+            'Semester_Score': round(float(rng.uniform(15, 100)), 2),
+            'Previous_CGPA': round(float(rng.uniform(2, 10)), 2),
+            'Previous_Backlogs': int(rng.integers(0, 6)),
+            'Previous_Score': round(float(rng.uniform(15, 100)), 2),
+        }
+        for i in range(5000)
+    ]
+
+    expected = dataframe_features(rows, le_persona, training_columns)
+    actual = assembler.assemble(rows)
+    assert np.array_equal(expected.to_numpy(dtype=np.float64), actual), "feature mismatch"
+    assert np.array_equal(model.predict_proba(expected), model.predict_proba(actual)), "probability mismatch"
+    columns = {key: [row[key] for row in rows] for key in rows[0]}
+    assert np.array_equal(assembler.assemble_columns(columns), actual), "column assembly mismatch"
+    print(f"FeatureAssembler matches the DataFrame path on {len(rows)} rows.")
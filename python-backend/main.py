@@ -1,10 +1,29 @@
-from fastapi import FastAPI
-from pydantic import BaseModel
+import asyncio
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any, List, Literal, Optional
+
+from fastapi import BackgroundTasks, FastAPI, Request
+from fastapi.exception_handlers import request_validation_exception_handler
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, ValidationError
+import numpy as np
 import pandas as pd
-import joblib
+
+from derive import derive_inputs, latest_two_scores
+from feature_store import FeatureStore
+from prediction_cache import PredictionCache
+from batcher import MicroBatcher
+from metrics import Metrics, RequestTimer
+from profiler import CountRequests, SamplingProfiler
+from registry import ModelRegistry
+from rescore import DEFAULT_TOLERANCE, rescore
 
 # --- 1. Setup and Model Loading ---
-app = FastAPI(title="Dropout-Risk-Detector API")
 
 # Defining the expected input data structure for validation
 class StudentData(BaseModel):
@@ -17,73 +36,735 @@ class StudentData(BaseModel):
     Previous_Backlogs: int
     Previous_Score: float
 
-# Load all necessary files
-try:
-    model = joblib.load('dropout_model_v3.joblib')
-    le_persona = joblib.load('label_encoder_v2.joblib')
-    training_columns = joblib.load('training_columns_v2.joblib')
-    print("Model and helper files loaded successfully.")
-except FileNotFoundError as e:
-    print(f"Error loading files: {e}")
-    model = None # Set model to None if loading fails
+# A batch is a list of raw records so that each row can be validated on its own
+class BatchRequest(BaseModel):
+    students: List[Any]
+
+# Raw per-student records, shaped like csv/final/sample_student_structure.json.
+# Only the fields the derivation reads are declared; anything else is ignored.
+class TestScoreRecord(BaseModel):
+    testDate: str
+    score: float
+
+class BacklogRecord(BaseModel):
+    courseId: Optional[str] = None
+
+class AttendanceRecord(BaseModel):
+    month: str
+    attendancePercent: float
+
+class StudentRecords(BaseModel):
+    studentId: str
+    testScores: List[TestScoreRecord] = []
+    backlogs: List[BacklogRecord] = []
+    attendance: List[AttendanceRecord] = []
+
+# Only IDs; their inputs come from the feature store
+class StudentIdsRequest(BaseModel):
+    student_ids: List[str]
+
+class RecordFeedRequest(BaseModel):
+    # Changed source records, each tagged with its table (see rescore.py)
+    records: List[dict]
+
+# How prediction endpoints return probabilities: 'string' is the original
+# two-decimal string, 'float' the unrounded model output. ?calibrated=true
+# adds calibrated_probability from the version's calibration table.
+ProbabilityFormat = Literal['string', 'float']
+
+VALID_PERSONAS = ['Average', 'Fast learners', 'Good', 'Slow learners']
+
+# 'lightgbm' scores everything through model.predict_proba; 'compiled' uses the
+# flattened tree engine for inputs of up to COMPILED_MAX_ROWS rows, where it is
+# much faster, and hands larger batches to LightGBM's multi-threaded predictor
+INFERENCE_ENGINE = os.environ.get('DROPOUT_INFERENCE_ENGINE', 'lightgbm')
+COMPILED_MAX_ROWS = int(os.environ.get('DROPOUT_COMPILED_MAX_ROWS', '256'))
+
+# Versioned artifact bundles; falls back to the v3 files next to this module
+registry = ModelRegistry(os.environ.get('DROPOUT_MODEL_REGISTRY', 'models'))
+
+# Run a few synthetic predictions after loading so the first real request is warm
+WARMUP_ENABLED = os.environ.get('DROPOUT_WARMUP', '1') != '0'
+
+# Repeat scoring of unchanged students is served from here; size 0 disables it
+cache = PredictionCache(
+    max_size=int(os.environ.get('DROPOUT_CACHE_SIZE', '100000')),
+    ttl_seconds=float(os.environ.get('DROPOUT_CACHE_TTL', str(6 * 60 * 60))),
+)
+
+# Stage timings and counters for /metrics; DROPOUT_METRICS=0 turns them into no-ops
+metrics = Metrics(enabled=os.environ.get('DROPOUT_METRICS', '1') != '0')
+metrics.histogram('dropout_request_seconds', "Request latency by route, method and status, including validation")
+metrics.histogram('dropout_stage_seconds', "Time spent in each stage of a prediction endpoint")
+metrics.histogram('dropout_model_seconds', "Time spent in one model scoring call, by model version")
+metrics.counter('dropout_predictions_total', "Scored students by endpoint and risk flag")
+metrics.counter('dropout_scored_rows_total', "Rows sent to the model (cache misses), by model version")
+metrics.counter('dropout_validation_failures_total', "Requests or batch rows rejected by input validation")
+metrics.counter('dropout_persona_errors_total', "Rows with a persona that is invalid or cannot be encoded")
+
+# The bundle serving responses, and optionally a second one scored alongside it
+# for comparison. Each is swapped with a single assignment, and requests read
+# the global once, so a request never mixes two versions.
+active = None
+shadow = None
+shadow_stats = {}
+
+# Precomputed per-student inputs for /predict/by-id, built by feature_store.py.
+# Optional: without one that endpoint answers 503 and everything else works.
+# A rebuilt or refreshed store is picked up on the next request that uses it,
+# in every worker, since a new generation always comes with a new manifest.
+FEATURE_STORE_DIR = os.environ.get('DROPOUT_FEATURE_STORE', 'feature_store')
+feature_store = None
+
+# Extracts the store is built from; /admin/rescore writes changed records
+# here. It rewrites the files, so it is only enabled when this points at a
+# working copy, never by default at the tracked ../csv/final.
+DATA_DIR = os.environ.get('DROPOUT_DATA_DIR')
+rescore_lock = threading.Lock()
+
+# Everything /readyz reports about startup
+load_state = {
+    'status': 'not_loaded',  # not_loaded -> loading -> ready | failed
+    'error': None,
+    'load_seconds': None,
+    'model_version': None,
+    'artifacts': {},
+    'warmup': 'enabled' if WARMUP_ENABLED else 'disabled',  # -> running -> done | failed
+    'warmup_seconds': None,
+    'feature_store': None,
+}
+
+# Set once the lifespan hook has finished loading and warming up (or failed)
+startup_complete = threading.Event()
+
+# Background loads started through the admin endpoints, by version
+model_jobs = {}
+model_jobs_lock = threading.Lock()
+
+def load_bundle(version):
+    return registry.load(
+        version, compiled=INFERENCE_ENGINE == 'compiled', compiled_max_rows=COMPILED_MAX_ROWS
+    )
+
+def activate(bundle):
+    """Make a loaded bundle the one serving responses."""
+    global active
+    # Cached results are tied to the exact artifacts they came from
+    cache.bind(bundle.fingerprint)
+    active = bundle
+    description = bundle.describe()
+    load_state.update(
+        model_version=bundle.version,
+        load_seconds=bundle.load_seconds,
+        artifacts=description['artifacts'],
+    )
+
+def set_shadow(bundle):
+    global shadow, shadow_stats
+    shadow_stats = {
+        'version': bundle.version if bundle is not None else None,
+        'rows': 0,
+        'flag_disagreements': 0,
+        'sum_abs_difference': 0.0,
+        'max_abs_difference': 0.0,
+    }
+    shadow = bundle
+
+def load_artifacts():
+    """Load the default model version. Safe to call more than once."""
+    if load_state['status'] == 'ready':
+        return True
+
+    load_state['status'] = 'loading'
+    try:
+        bundle = load_bundle(registry.default_version())
+    except Exception as e:
+        print(f"Error loading files: {e}")
+        load_state.update(status='failed', error=str(e))
+        return False
+
+    activate(bundle)
+    load_state.update(status='ready', error=None)
+    print(f"Model {bundle.version} loaded successfully in {bundle.load_seconds}s.")
+    open_feature_store()
+    return True
+
+def open_feature_store():
+    """(Re)open the feature store if one has been built. Opening only maps the files."""
+    global feature_store
+    if not os.path.isfile(os.path.join(FEATURE_STORE_DIR, 'manifest.json')):
+        return False
+    try:
+        store = FeatureStore(FEATURE_STORE_DIR)
+    except Exception as e:
+        print(f"Error opening feature store {FEATURE_STORE_DIR}: {e}")
+        return False
+    feature_store = store
+    load_state['feature_store'] = {
+        'path': FEATURE_STORE_DIR,
+        'students': len(store),
+        'built_at': store.manifest.get('built_at'),
+    }
+    return True
+
+def current_feature_store():
+    """
+    The open feature store, reopened first if its manifest was replaced since,
+    e.g. by /admin/rescore in another worker. Costs one stat() per call.
+    """
+    store = feature_store
+    if store is None or not store.is_current():
+        open_feature_store()
+        store = feature_store
+    return store
+
+def warm_up(bundle=None):
+    """Score synthetic students through every prediction path once."""
+    bundle = bundle or active
+    rows = [
+        {
+            'studentID': f"warmup-{i}",
+            'persona': VALID_PERSONAS[i % len(VALID_PERSONAS)],
+            'Current_CGPA': 5.0 + (i % 50) / 10,
+            'Total_Backlogs': i % 4,
+            'Semester_Score': 40.0 + i % 60,
+            'Previous_CGPA': 6.0,
+            'Previous_Backlogs': i % 3,
+            'Previous_Score': 65.0,
+        }
+        for i in range(COMPILED_MAX_ROWS + 1)
+    ]
+    # Single row, small batch and one batch past the compiled engine's cut-over
+    for size in (1, 8, len(rows)):
+        bundle.score(bundle.assembler.assemble(rows[:size]))
+
+def warm_up_active():
+    load_state['warmup'] = 'running'
+    started = time.perf_counter()
+    try:
+        warm_up()
+    except Exception as e:
+        print(f"Warm-up failed: {e}")
+        load_state['warmup'] = 'failed'
+        return
+    load_state['warmup'] = 'done'
+    load_state['warmup_seconds'] = round(time.perf_counter() - started, 4)
+
+def is_ready():
+    return load_state['status'] == 'ready' and load_state['warmup'] in ('done', 'disabled')
+
+def not_loaded_response():
+    return JSONResponse(
+        status_code=503,
+        content={"error": "Model is not loaded. Please check server logs.", "status": load_state['status']},
+    )
+
+@asynccontextmanager
+async def lifespan(app):
+    """Load and warm the model in the background so the server starts answering at once."""
+    async def start():
+        try:
+            # serve.py loads and warms up before forking; then this finds both done
+            if await asyncio.to_thread(load_artifacts) and WARMUP_ENABLED and load_state['warmup'] != 'done':
+                await asyncio.to_thread(warm_up_active)
+        finally:
+            startup_complete.set()
+
+    startup = asyncio.create_task(start())
+    yield
+    if not startup.done():
+        startup.cancel()
+    if batcher is not None:
+        await batcher.stop()
+
+app = FastAPI(title="Dropout-Risk-Detector API", lifespan=lifespan)
+
+if metrics.enabled:
+    app.add_middleware(RequestTimer, metrics=metrics)
+
+# Sampling profiler, idle until started through /admin/profile. Profiles are
+# written to DROPOUT_PROFILE_DIR and can be capped by /predict* request count.
+PROFILE_DIR = os.environ.get('DROPOUT_PROFILE_DIR', 'profiles')
+PROFILE_MAX_SECONDS = float(os.environ.get('DROPOUT_PROFILE_MAX_SECONDS', '600'))
+profiler = SamplingProfiler()
+app.add_middleware(CountRequests, profiler=profiler)
+
+@app.exception_handler(RequestValidationError)
+async def count_validation_errors(request: Request, exc: RequestValidationError):
+    """Count rejected request bodies, then answer with FastAPI's usual 422."""
+    route = request.scope.get('route')
+    metrics.inc('dropout_validation_failures_total', endpoint=getattr(route, 'path', request.url.path))
+    return await request_validation_exception_handler(request, exc)
+
+# Concurrent /predict calls are coalesced into one scoring call per window;
+# a window of 0 ms scores every request on its own as before
+MICROBATCH_WINDOW_MS = float(os.environ.get('DROPOUT_MICROBATCH_WINDOW_MS', '2'))
+MICROBATCH_MAX_SIZE = int(os.environ.get('DROPOUT_MICROBATCH_MAX_SIZE', str(COMPILED_MAX_ROWS)))
+
+batcher = None
+if MICROBATCH_WINDOW_MS > 0:
+    batcher = MicroBatcher(
+        lambda bundle, rows: predict_probabilities(bundle, rows),
+        max_batch_size=MICROBATCH_MAX_SIZE,
+        max_wait_ms=MICROBATCH_WINDOW_MS,
+    )
 
 # --- 2. Define the API Endpoint ---
 @app.post("/predict")
-def predict(student_data: StudentData):
+async def predict(student_data: StudentData, probability_format: ProbabilityFormat = 'string',
+                  calibrated: bool = False):
     """
     Receives student data, processes it, makes a prediction, and returns the risk.
     """
-    if model is None:
-        return {"error": "Model is not loaded. Please check server logs."}
+    bundle = active
+    if bundle is None:
+        return not_loaded_response()
 
     # --- a. Data Preprocessing ---
     # Validate persona value
-    valid_personas = ['Average', 'Fast learners', 'Good', 'Slow learners']
-    if student_data.persona not in valid_personas:
+    if student_data.persona not in VALID_PERSONAS:
+        metrics.inc('dropout_persona_errors_total', endpoint='/predict')
         return {
-            "error": f"Invalid persona '{student_data.persona}'. Must be one of: {valid_personas}"
+            "error": f"Invalid persona '{student_data.persona}'. Must be one of: {VALID_PERSONAS}"
         }
-    
-    # Convert incoming data to a DataFrame
-    df = pd.DataFrame(student_data.dict(), index=[0])
-
-    # Calculate Trend Features
-    df['CGPA_Trend'] = df['Current_CGPA'] - df['Previous_CGPA']
-    df['Grade_Trend'] = df['Semester_Score'] - df['Previous_Score']
-    df['Backlog_Trend'] = df['Total_Backlogs'] - df['Previous_Backlogs']
 
-    # Encode the 'persona' feature using the loaded encoder
     try:
-        df['persona'] = le_persona.transform(df['persona'])
+        with metrics.time('dropout_stage_seconds', endpoint='/predict', stage='assemble'):
+            features = bundle.assembler.assemble_one(student_data.dict())
     except ValueError as e:
+        metrics.inc('dropout_persona_errors_total', endpoint='/predict')
         return {"error": f"Persona encoding error: {str(e)}"}
-    
-    # Ensure DataFrame columns match the model's training order
-    df_final = df.reindex(columns=training_columns, fill_value=0)
 
     # --- b. Make Prediction ---
-    # Get the probability for class 1 (dropout)
-    probability = model.predict_proba(df_final)[0][1]
+    # Get the probability for class 1 (dropout), batched with concurrent requests.
+    # This stage includes the wait for the batching window and a worker thread.
+    with metrics.time('dropout_stage_seconds', endpoint='/predict', stage='score'):
+        if batcher is not None:
+            probability = await batcher.submit(features[0], bundle)
+        else:
+            probability = (await run_in_threadpool(predict_probabilities, bundle, features))[0]
+
+    # --- c. Return the Final Result ---
+    fields = scored_fields(bundle, np.array([probability]), '/predict', probability_format, calibrated)[0]
+    return {
+        'studentID': student_data.studentID,
+        **fields,
+        'model_version': bundle.version
+    }
+
+@app.post("/predict/batch")
+def predict_batch(batch: BatchRequest, probability_format: ProbabilityFormat = 'string',
+                  calibrated: bool = False):
+    """
+    Scores many students with a single model call. Rows that fail validation
+    are reported inline at their position instead of failing the whole batch.
+    """
+    bundle = active
+    if bundle is None:
+        return not_loaded_response()
+
+    results = [None] * len(batch.students)
+    valid_rows = []
+    valid_positions = []
+
+    # --- a. Validate each record independently ---
+    with metrics.time('dropout_stage_seconds', endpoint='/predict/batch', stage='validate'):
+        for i, record in enumerate(batch.students):
+            if not isinstance(record, dict):
+                results[i] = {'index': i, 'error': "Each student must be a JSON object"}
+                metrics.inc('dropout_validation_failures_total', endpoint='/predict/batch')
+                continue
+            try:
+                student = StudentData(**record)
+            except ValidationError as e:
+                results[i] = {
+                    'index': i,
+                    'studentID': record.get('studentID'),
+                    'error': f"Validation error: {format_validation_error(e)}"
+                }
+                metrics.inc('dropout_validation_failures_total', endpoint='/predict/batch')
+                continue
+            if student.persona not in VALID_PERSONAS:
+                metrics.inc('dropout_persona_errors_total', endpoint='/predict/batch')
+                results[i] = {
+                    'index': i,
+                    'studentID': student.studentID,
+                    'error': f"Invalid persona '{student.persona}'. Must be one of: {VALID_PERSONAS}"
+                }
+                continue
+            valid_rows.append(student.dict())
+            valid_positions.append(i)
+
+    # --- b. Build one feature matrix and make one prediction call ---
+    if valid_rows:
+        with metrics.time('dropout_stage_seconds', endpoint='/predict/batch', stage='assemble'):
+            features = bundle.assembler.assemble(valid_rows)
+        with metrics.time('dropout_stage_seconds', endpoint='/predict/batch', stage='score'):
+            probabilities = predict_probabilities(bundle, features)
+
+        fields = scored_fields(bundle, probabilities, '/predict/batch', probability_format, calibrated)
+        for i, row, scored in zip(valid_positions, valid_rows, fields):
+            results[i] = {'index': i, 'studentID': row['studentID'], **scored}
+
+    return {
+        'model_version': bundle.version,
+        'count': len(results),
+        'scored': len(valid_rows),
+        'errors': len(results) - len(valid_rows),
+        'results': results
+    }
+
+@app.post("/predict/records")
+def predict_records(batch: BatchRequest, probability_format: ProbabilityFormat = 'string',
+                    calibrated: bool = False):
+    """
+    Scores many students from their raw test score, backlog and attendance
+    records. The StudentData inputs are derived server-side for the whole
+    batch at once (see derive.py) and returned alongside each prediction.
+    """
+    bundle = active
+    if bundle is None:
+        return not_loaded_response()
+
+    results = [None] * len(batch.students)
+    valid_ids = []
+    valid_positions = []
+    seen = set()
+    score_rows = []
+    backlog_ids = []
+
+    # --- a. Validate each student's records independently ---
+    with metrics.time('dropout_stage_seconds', endpoint='/predict/records', stage='validate'):
+        for i, record in enumerate(batch.students):
+            if not isinstance(record, dict):
+                results[i] = {'index': i, 'error': "Each student must be a JSON object"}
+                metrics.inc('dropout_validation_failures_total', endpoint='/predict/records')
+                continue
+            try:
+                student = StudentRecords(**record)
+            except ValidationError as e:
+                results[i] = {
+                    'index': i,
+                    'studentId': record.get('studentId'),
+                    'error': f"Validation error: {format_validation_error(e)}"
+                }
+                metrics.inc('dropout_validation_failures_total', endpoint='/predict/records')
+                continue
+            if student.studentId in seen:
+                results[i] = {
+                    'index': i,
+                    'studentId': student.studentId,
+                    'error': "Duplicate studentId in this batch"
+                }
+                metrics.inc('dropout_validation_failures_total', endpoint='/predict/records')
+                continue
+            seen.add(student.studentId)
+            valid_ids.append(student.studentId)
+            valid_positions.append(i)
+            # Records are attributed to the enclosing student, whatever they say
+            score_rows.extend((student.studentId, s.testDate, s.score) for s in student.testScores)
+            backlog_ids.extend(student.studentId for _ in student.backlogs)
+
+    # --- b. Derive every student's inputs, then make one prediction call ---
+    if valid_ids:
+        with metrics.time('dropout_stage_seconds', endpoint='/predict/records', stage='derive'):
+            test_scores = pd.DataFrame(score_rows, columns=['studentId', 'testDate', 'score'])
+            inputs = derive_inputs(
+                valid_ids, latest_two_scores(test_scores), pd.Series(backlog_ids, dtype=object).value_counts()
+            )
+        with metrics.time('dropout_stage_seconds', endpoint='/predict/records', stage='assemble'):
+            features = bundle.assembler.assemble_columns(inputs)
+        with metrics.time('dropout_stage_seconds', endpoint='/predict/records', stage='score'):
+            probabilities = predict_probabilities(bundle, features)
+
+        fields = scored_fields(bundle, probabilities, '/predict/records', probability_format, calibrated)
+        for i, derived, scored in zip(valid_positions, inputs.to_dict('records'), fields):
+            results[i] = {'index': i, 'studentId': derived['studentID'], **scored, 'inputs': derived}
+
+    return {
+        'model_version': bundle.version,
+        'count': len(results),
+        'scored': len(valid_ids),
+        'errors': len(results) - len(valid_ids),
+        'results': results
+    }
+
+@app.post("/predict/by-id")
+def predict_by_id(request: StudentIdsRequest, probability_format: ProbabilityFormat = 'string',
+                  calibrated: bool = False):
+    """
+    Scores students by ID alone, reading their inputs from the memory-mapped
+    feature store. Unknown IDs are reported inline like invalid batch rows.
+    """
+    bundle = active
+    store = current_feature_store()
+    if bundle is None:
+        return not_loaded_response()
+    if store is None:
+        return JSONResponse(
+            status_code=503,
+            content={"error": f"No feature store at '{FEATURE_STORE_DIR}'. Build one with feature_store.py build."},
+        )
+
+    student_ids = request.student_ids
+    results = [None] * len(student_ids)
+
+    # --- a. Binary search over the shared, sorted ID array ---
+    with metrics.time('dropout_stage_seconds', endpoint='/predict/by-id', stage='lookup'):
+        positions = store.search(student_ids)
+        found = np.flatnonzero(positions >= 0)
+        inputs = store.inputs_at(positions[found])
+    for i in np.flatnonzero(positions < 0):
+        results[i] = {'index': int(i), 'studentID': student_ids[i], 'error': "Student not found in feature store"}
 
-    # --- c. Assign RGY Flag ---
-    RED_THRESHOLD = 0.70
-    YELLOW_THRESHOLD = 0.35
+    # --- b. One prediction call for every student found ---
+    if len(found):
+        with metrics.time('dropout_stage_seconds', endpoint='/predict/by-id', stage='assemble'):
+            features = bundle.assembler.assemble_columns(inputs)
+        with metrics.time('dropout_stage_seconds', endpoint='/predict/by-id', stage='score'):
+            probabilities = predict_probabilities(bundle, features)
 
-    if probability > RED_THRESHOLD:
-        flag = 'Red'
-    elif probability > YELLOW_THRESHOLD:
-        flag = 'Yellow'
+        fields = scored_fields(bundle, probabilities, '/predict/by-id', probability_format, calibrated)
+        for i, scored in zip(found.tolist(), fields):
+            results[i] = {'index': i, 'studentID': student_ids[i], **scored}
+
+    return {
+        'model_version': bundle.version,
+        'count': len(results),
+        'scored': len(found),
+        'errors': len(results) - len(found),
+        'results': results
+    }
+
+# --- 3. Shared Helpers ---
+def predict_probabilities(bundle, features):
+    """Dropout probability for each feature row, using cached results where possible."""
+    if not cache.enabled:
+        probabilities = score_features(bundle, features)
     else:
-        flag = 'Green'
+        probabilities = np.empty(len(features))
+        uncached = []
+        for i, row in enumerate(features):
+            cached = cache.get(bundle.fingerprint, row)
+            if cached is None:
+                uncached.append(i)
+            else:
+                probabilities[i] = cached
+
+        if uncached:
+            fresh = score_features(bundle, features[uncached])
+            probabilities[uncached] = fresh
+            for i, probability in zip(uncached, fresh):
+                cache.put(bundle.fingerprint, features[i], float(probability))
+
+    candidate = shadow
+    if candidate is not None and candidate is not bundle:
+        compare_with_shadow(candidate, bundle, features, probabilities)
+    return probabilities
+
+def score_features(bundle, features):
+    """One model call, timed for /metrics."""
+    with metrics.time('dropout_model_seconds', version=bundle.version):
+        probabilities = bundle.score(features)
+    metrics.inc('dropout_scored_rows_total', len(features), version=bundle.version)
+    return probabilities
+
+def compare_with_shadow(candidate, bundle, features, probabilities):
+    """Score the same rows with the shadow version and record how far it disagrees."""
+    # Feature layouts can differ between versions, so only compare like with like
+    if list(candidate.training_columns) != list(bundle.training_columns):
+        return
+    try:
+        shadow_probabilities = candidate.score(features)
+    except Exception as e:
+        print(f"Shadow scoring with {candidate.version} failed: {e}")
+        return
+
+    stats = shadow_stats
+    difference = np.abs(shadow_probabilities - probabilities)
+    stats['rows'] += len(features)
+    stats['sum_abs_difference'] += float(difference.sum())
+    stats['max_abs_difference'] = max(stats['max_abs_difference'], float(difference.max(initial=0.0)))
+    # Each version flags with its own thresholds
+    stats['flag_disagreements'] += int(np.count_nonzero(
+        bundle.bands.flags(probabilities) != candidate.bands.flags(shadow_probabilities)
+    ))
+
+def scored_fields(bundle, probabilities, endpoint, probability_format='string', calibrated=False):
+    """
+    Response fields for each scored row. Flags come from the bundle's own
+    thresholds in one vectorized lookup; probabilities stay floats unless the
+    caller asked for the original two-decimal strings.
+    """
+    flags = bundle.bands.flags(probabilities)
+    count_flags(endpoint, flags)
+
+    columns = {
+        'dropout_risk_probability': (
+            probabilities.tolist() if probability_format == 'float'
+            else [f"{probability:.2f}" for probability in probabilities]
+        ),
+        'risk_flag': flags.tolist(),
+    }
+    if calibrated:
+        columns['calibrated_probability'] = (
+            bundle.calibration.apply(probabilities).tolist() if bundle.calibration is not None
+            else [None] * len(probabilities)
+        )
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+def count_flags(endpoint, flags):
+    """Add a batch's flags to the predictions counter, one increment per flag value."""
+    if metrics.enabled:
+        for flag, count in zip(*np.unique(flags, return_counts=True)):
+            metrics.inc('dropout_predictions_total', int(count), endpoint=endpoint, risk_flag=flag)
 
-    # --- d. Return the Final Result ---
+def format_validation_error(error):
+    """Flatten a pydantic ValidationError into a short, JSON-safe message."""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in error.errors()
+    )
+
+# --- 4. Model Administration ---
+# These act on this process only; with serve.py each worker keeps its own
+# active/shadow pair, so roll a fleet by restarting with DROPOUT_MODEL_VERSION.
+def run_model_job(version, mode):
+    """Load and warm a version off the request path, then swap it in."""
+    try:
+        bundle = load_bundle(version)
+        warm_up(bundle)
+    except Exception as e:
+        print(f"Loading model {version} failed: {e}")
+        model_jobs[version].update(status='failed', error=str(e))
+        return
+
+    if mode == 'shadow':
+        set_shadow(bundle)
+    else:
+        activate(bundle)
+        if shadow is not None and shadow.version == version:
+            set_shadow(None)
+    model_jobs[version].update(status='done', finished_at=time.time())
+    print(f"Model {version} is now {'shadowing' if mode == 'shadow' else 'active'}.")
+
+@app.get("/admin/models")
+def list_models():
+    """Versions in the registry, what is resident, and background load jobs."""
+    stats = dict(shadow_stats)
+    if stats.get('rows'):
+        stats['mean_abs_difference'] = stats['sum_abs_difference'] / stats['rows']
     return {
-        'studentID': student_data.studentID,
-        'dropout_risk_probability': f"{probability:.2f}",
-        'risk_flag': flag
+        'available': registry.versions(),
+        'active': active.describe() if active is not None else None,
+        'shadow': shadow.describe() if shadow is not None else None,
+        'shadow_stats': stats,
+        'jobs': model_jobs,
     }
 
-# --- 3. Helper Endpoints ---
+@app.post("/admin/models/shadow/promote")
+def promote_shadow():
+    """Swap the resident shadow version in as the active one."""
+    candidate = shadow
+    if candidate is None:
+        return JSONResponse(status_code=409, content={"error": "No shadow model is loaded"})
+    activate(candidate)
+    set_shadow(None)
+    return {'active': candidate.version}
+
+@app.delete("/admin/models/shadow")
+def drop_shadow():
+    """Stop shadow scoring and release the shadow version."""
+    set_shadow(None)
+    return {'shadow': None}
+
+@app.post("/admin/models/{version}/load", status_code=202)
+def load_model(version: str, background_tasks: BackgroundTasks, mode: str = 'activate'):
+    """Load a version in the background, then make it active or the shadow (mode=shadow)."""
+    if mode not in ('activate', 'shadow'):
+        return JSONResponse(status_code=400, content={"error": "mode must be 'activate' or 'shadow'"})
+    try:
+        registry.manifest(version)
+    except KeyError as e:
+        return JSONResponse(status_code=404, content={"error": str(e.args[0])})
+
+    with model_jobs_lock:
+        if model_jobs.get(version, {}).get('status') == 'loading':
+            return JSONResponse(status_code=409, content={"error": f"Model {version} is already loading"})
+        model_jobs[version] = {'status': 'loading', 'mode': mode, 'error': None, 'started_at': time.time()}
+    background_tasks.add_task(run_model_job, version, mode)
+    return {'version': version, 'mode': mode, 'status': 'loading'}
+
+@app.post("/admin/feature-store/reload")
+def reload_feature_store():
+    """Pick up a rebuilt feature store without restarting."""
+    if not open_feature_store():
+        return JSONResponse(status_code=404, content={"error": f"No feature store at '{FEATURE_STORE_DIR}'"})
+    return load_state['feature_store']
+
+@app.post("/admin/rescore")
+def rescore_changed(request: RecordFeedRequest, tolerance: float = DEFAULT_TOLERANCE):
+    """
+    Apply a batch of changed records: refresh only the students they touch in
+    the feature store, re-score them and return the flags that changed.
+    """
+    bundle = active
+    if bundle is None:
+        return not_loaded_response()
+    if DATA_DIR is None:
+        return JSONResponse(status_code=503, content={
+            "error": "Rescoring is disabled. Set DROPOUT_DATA_DIR to a working copy of the extracts it may rewrite."
+        })
+    if current_feature_store() is None:
+        return JSONResponse(status_code=404, content={"error": f"No feature store at '{FEATURE_STORE_DIR}'"})
+    if tolerance < 0:
+        return JSONResponse(status_code=400, content={"error": "tolerance must be >= 0"})
+
+    # Rewrites the extracts and the store, so one batch at a time (rescore()
+    # also locks the store against other workers)
+    with rescore_lock:
+        result = rescore(bundle, DATA_DIR, FEATURE_STORE_DIR, request.records, tolerance)
+        open_feature_store()
+    if not result['applied']:
+        metrics.inc('dropout_validation_failures_total', endpoint='/admin/rescore')
+        return JSONResponse(status_code=422, content={'model_version': bundle.version, **result})
+    return {'model_version': bundle.version, **result}
+
+@app.post("/admin/profile", status_code=202)
+def start_profile(seconds: float = 30.0, requests: int = 0, interval_ms: float = 5.0):
+    """
+    Sample this worker's stacks for up to `seconds`, or until `requests`
+    /predict* requests have finished if that comes first.
+    """
+    if not 0 < seconds <= PROFILE_MAX_SECONDS:
+        return JSONResponse(status_code=400, content={"error": f"seconds must be in (0, {PROFILE_MAX_SECONDS}]"})
+    if requests < 0 or interval_ms < 1:
+        return JSONResponse(status_code=400, content={"error": "requests must be >= 0 and interval_ms >= 1"})
+
+    output = os.path.join(PROFILE_DIR, f"profile-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.collapsed")
+    try:
+        profiler.start(seconds=seconds, max_requests=requests or None, output=output,
+                       interval=interval_ms / 1000)
+    except RuntimeError as e:
+        return JSONResponse(status_code=409, content={"error": str(e)})
+    return profiler.status()
+
+@app.get("/admin/profile")
+def profile_status():
+    """Whether a profile is running, how many samples it has, and where it is written."""
+    return profiler.status()
+
+@app.delete("/admin/profile")
+def stop_profile():
+    """Stop the running profile early and write it out."""
+    profiler.stop()
+    return profiler.status()
+
+@app.get("/admin/profile/collapsed")
+def profile_collapsed():
+    """The current or last profile as collapsed stacks, ready for flamegraph.pl or speedscope."""
+    return PlainTextResponse(profiler.collapsed())
+
+# --- 5. Helper Endpoints ---
 @app.get("/")
 def root():
     """Root endpoint with API information."""
@@ -92,17 +773,75 @@ def root():
         "version": "1.0",
         "endpoints": {
             "/predict": "POST - Make dropout risk prediction",
+            "/predict/batch": "POST - Score a list of students in one call",
+            "/predict/records": "POST - Derive inputs from raw student records and score them",
+            "/predict/by-id": "POST - Score students by ID from the feature store",
             "/persona-options": "GET - Get valid persona values",
+            "/healthz": "GET - Liveness probe",
+            "/readyz": "GET - Readiness probe with model load state",
+            "/cache/stats": "GET - Prediction cache statistics",
+            "/batcher/stats": "GET - Micro-batching statistics",
+            "/metrics": "GET - Prometheus metrics: stage timings and prediction counters",
+            "/admin/models": "GET - Model versions, active/shadow bundles and load jobs",
+            "/admin/models/{version}/load": "POST - Load a version in the background and swap it in",
+            "/admin/feature-store/reload": "POST - Reopen the feature store after a rebuild",
+            "/admin/rescore": "POST - Apply changed records and return only the flags that changed",
+            "/admin/profile": "POST - Start a bounded sampling profile; GET status; DELETE stop",
+            "/admin/profile/collapsed": "GET - Last profile as collapsed stacks",
             "/docs": "GET - API documentation"
         }
     }
 
+@app.get("/healthz")
+def healthz():
+    """Liveness: the process is up and serving HTTP."""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+def readyz():
+    """Readiness: model loaded (and warmed up, if enabled). 503 until then."""
+    body = {"ready": is_ready(), **load_state}
+    return JSONResponse(status_code=200 if body['ready'] else 503, content=body)
+
+@app.get("/cache/stats")
+def get_cache_stats():
+    """Hit/miss counters and size of the prediction cache."""
+    return cache.stats()
+
+@app.get("/batcher/stats")
+def get_batcher_stats():
+    """How many /predict calls were coalesced and into how many batches."""
+    if batcher is None:
+        return {'enabled': False}
+    return {'enabled': True, **batcher.stats()}
+
+def runtime_series():
+    """Cache and micro-batcher counters, read from their own stats at scrape time."""
+    stats = cache.stats()
+    yield 'dropout_cache_hits_total', 'counter', "Prediction cache hits", stats['hits']
+    yield 'dropout_cache_misses_total', 'counter', "Prediction cache misses", stats['misses']
+    yield 'dropout_cache_entries', 'gauge', "Entries in the prediction cache", stats['size']
+    if batcher is not None:
+        yield 'dropout_microbatches_total', 'counter', "Micro-batches scored for /predict", batcher.batches
+        yield 'dropout_microbatch_rows_total', 'counter', "Rows scored through micro-batches", batcher.rows
+    yield 'dropout_model_ready', 'gauge', "1 once the model is loaded and warmed up", int(is_ready())
+
+metrics.collector(runtime_series)
+
+@app.get("/metrics")
+def get_metrics():
+    """Stage timings and counters in the Prometheus text exposition format."""
+    if not metrics.enabled:
+        return PlainTextResponse("# metrics are disabled (DROPOUT_METRICS=0)\n", status_code=404)
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/persona-options")
 def get_persona_options():
     """Get the valid persona options for the model."""
     return {
-        "valid_personas": ['Average', 'Fast learners', 'Good', 'Slow learners'],
+        "valid_personas": VALID_PERSONAS,
         "description": "Use one of these persona values when making predictions"
     }
 
-# To run this app, save it as main.py and run: uvicorn main:app --reload
\ No newline at end of file
+# To run this app, save it as main.py and run: uvicorn main:app --reload
+# For multi-worker production serving with shared model memory run: python serve.py --workers N
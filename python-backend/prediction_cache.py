@@ -0,0 +1,95 @@
+"""
+In-process LRU cache of dropout probabilities.
+
+Entries are keyed on the model version plus the raw bytes of the encoded
+feature row, so a student whose inputs have not changed is answered with a
+dictionary lookup, and a new model version never sees old results.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+def artifact_version(*paths):
+    """Short content hash of the given artifact files, used as the model version."""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+class PredictionCache:
+    """Thread-safe LRU with a size bound, per-entry TTL and hit/miss counters."""
+
+    def __init__(self, max_size=100_000, ttl_seconds=6 * 60 * 60, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.model_version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.max_size > 0
+
+    def bind(self, model_version):
+        """Point the cache at a model version, dropping everything if it changed."""
+        with self._lock:
+            if model_version != self.model_version:
+                self._entries.clear()
+                self.model_version = model_version
+
+    def get(self, model_version, row):
+        """Cached probability for an encoded feature row, or None."""
+        if not self.enabled:
+            return None
+        key = (model_version, row.tobytes())
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > self.clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, model_version, row, value):
+        if not self.enabled:
+            return
+        key = (model_version, row.tobytes())
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'model_version': self.model_version,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
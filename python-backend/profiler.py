@@ -0,0 +1,190 @@
+"""
+Sampling profiler producing collapsed stacks.
+
+A background thread snapshots every thread's Python stack at a fixed
+interval with sys._current_frames() and counts identical stacks. The result
+is written in the collapsed format used by flamegraph.pl, speedscope and
+inferno ("root;caller;callee count" per line). Nothing runs unless a profile
+is started.
+
+In the service it is driven through /admin/profile (see main.py). Offline
+jobs can be run under it like cProfile:
+
+    python profiler.py -o score.collapsed score_csv.py --output risk.csv
+    python profiler.py -o gen.collapsed ../csv/generate_test_data.py
+
+Time spent inside C extensions (LightGBM, NumPy) is attributed to the Python
+frame that called into them.
+"""
+
+import argparse
+import os
+import runpy
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+# Leaf frames of threads that are parked waiting for work; skipped by default
+# so idle event loop and thread pool workers do not swamp the profile
+IDLE_LEAVES = {
+    ('selectors.py', 'select'),
+    ('threading.py', 'wait'),
+    ('queue.py', 'get'),
+    ('thread.py', '_worker'),
+}
+
+
+def frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Samples all threads' stacks until stopped, a time limit or a request limit."""
+
+    def __init__(self, interval=0.005, include_idle=False):
+        self.interval = interval
+        self.include_idle = include_idle
+        self.stacks = Counter()
+        self.samples = 0
+        self.requests = 0
+        self.max_requests = None
+        self.deadline = None
+        self.output = None
+        self.started_at = None
+        self.finished_at = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds=None, max_requests=None, output=None, interval=None):
+        """Begin sampling in the background; it stops by itself once either limit is hit."""
+        with self._lock:
+            if self.running:
+                raise RuntimeError("A profile is already running")
+            if interval is not None:
+                self.interval = interval
+            self.stacks = Counter()
+            self.samples = 0
+            self.requests = 0
+            self.max_requests = max_requests
+            self.deadline = time.monotonic() + seconds if seconds else None
+            self.output = output
+            self.started_at = datetime.now(timezone.utc).isoformat()
+            self.finished_at = None
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop sampling, write the output file if one was given and return its path."""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        return self.output
+
+    def request_finished(self):
+        """Count one profiled request; stops the profile once max_requests is reached."""
+        if not self.running:
+            return
+        self.requests += 1
+        if self.max_requests and self.requests >= self.max_requests:
+            self._stop.set()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self._sample(own_id)
+            if self.deadline is not None and time.monotonic() >= self.deadline:
+                break
+        self.finished_at = datetime.now(timezone.utc).isoformat()
+        if self.output:
+            self.write(self.output)
+
+    def _sample(self, own_id):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            code = frame.f_code
+            if not self.include_idle and (os.path.basename(code.co_filename), code.co_name) in IDLE_LEAVES:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(frame_label(frame.f_code))
+                frame = frame.f_back
+            stack.append(names.get(thread_id, f"thread-{thread_id}"))
+            self.stacks[';'.join(reversed(stack))] += 1
+        self.samples += 1
+
+    def collapsed(self):
+        """Profile so far in collapsed-stack format, heaviest stacks first."""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def write(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(self.collapsed())
+
+    def status(self):
+        return {
+            'running': self.running,
+            'interval_ms': self.interval * 1000,
+            'samples': self.samples,
+            'distinct_stacks': len(self.stacks),
+            'requests': self.requests,
+            'max_requests': self.max_requests,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'output': self.output,
+        }
+
+
+class CountRequests:
+    """ASGI middleware telling the profiler when a request under a path prefix has finished."""
+
+    def __init__(self, app, profiler, prefix='/predict'):
+        self.app = app
+        self.profiler = profiler
+        self.prefix = prefix
+
+    async def __call__(self, scope, receive, send):
+        await self.app(scope, receive, send)
+        if scope['type'] == 'http' and scope['path'].startswith(self.prefix):
+            self.profiler.request_finished()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run a Python script under the sampling profiler and write collapsed stacks."
+    )
+    parser.add_argument('-o', '--output', default='profile.collapsed')
+    parser.add_argument('--interval-ms', type=float, default=5.0)
+    parser.add_argument('--include-idle', action='store_true', help="Keep samples of threads waiting for work")
+    parser.add_argument('script')
+    parser.add_argument('args', nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+
+    # Make the script see its own argv and import path, as if run directly
+    sys.argv = [args.script, *args.args]
+    sys.path.insert(0, os.path.dirname(os.path.abspath(args.script)))
+
+    profiler = SamplingProfiler(interval=args.interval_ms / 1000, include_idle=args.include_idle)
+    profiler.start(output=args.output)
+    try:
+        runpy.run_path(args.script, run_name='__main__')
+    finally:
+        profiler.stop()
+        print(f"Wrote {profiler.samples} samples ({len(profiler.stacks)} distinct stacks) to {args.output}",
+              file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Versioned model registry for the dropout prediction service.
+
+Every version is a directory under the registry root holding the three
+artifacts next to a manifest.json that names them:
+
+    models/
+      v4/
+        manifest.json   {"version": "v4", "model": "model.joblib", ...}
+        model.joblib
+        label_encoder.joblib
+        training_columns.joblib
+
+The manifest may also carry risk flag thresholds and a calibration table
+for the version (see risk_bands.py).
+
+The original files next to main.py are always listed as version "v3" (unless
+a bundle of that name is published), so existing deployments keep working
+and an upgrade can be rolled back to them.
+
+Publishing and listing from the command line (run from python-backend/):
+    python registry.py publish v4 --model m.joblib --encoder e.joblib --columns c.joblib
+    python registry.py list
+    python registry.py set-thresholds v4 --yellow 0.3 --red 0.65
+"""
+
+import argparse
+import json
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+
+import joblib
+
+from features import FeatureAssembler
+from prediction_cache import artifact_version
+from risk_bands import Calibration, RiskBands
+from tree_engine import CompiledTreeEnsemble
+
+MANIFEST = 'manifest.json'
+ROLES = ('model', 'label_encoder', 'training_columns')
+
+# The artifacts main.py has always loaded, listed as version v3
+LEGACY_VERSION = 'v3'
+LEGACY_FILES = {
+    'model': 'dropout_model_v3.joblib',
+    'label_encoder': 'label_encoder_v2.joblib',
+    'training_columns': 'training_columns_v2.joblib',
+}
+
+
+class ModelBundle:
+    """One loaded model version: estimator, encoder, columns and feature assembler."""
+
+    def __init__(self, version, model, le_persona, training_columns, files, manifest,
+                 load_seconds, compiled=False, compiled_max_rows=256):
+        self.version = version
+        self.model = model
+        self.le_persona = le_persona
+        self.training_columns = training_columns
+        self.files = files
+        self.manifest = manifest
+        self.load_seconds = load_seconds
+        self.loaded_at = datetime.now(timezone.utc).isoformat()
+        self.compiled_max_rows = compiled_max_rows
+        # Content hash of the artifacts; cache keys use this rather than the name
+        self.fingerprint = artifact_version(*files.values())
+        self.assembler = FeatureAssembler(training_columns, le_persona.classes_)
+        self.bands = RiskBands.from_manifest(self.manifest)
+        self.calibration = Calibration.from_manifest(self.manifest)
+
+        self.engine = None
+        if compiled:
+            try:
+                self.engine = CompiledTreeEnsemble.from_lightgbm(model)
+            except ValueError as e:
+                print(f"Compiled engine unavailable for {version}, using LightGBM: {e}")
+
+    @classmethod
+    def load(cls, version, files, manifest=None, **kwargs):
+        started = time.perf_counter()
+        model = joblib.load(files['model'])
+        le_persona = joblib.load(files['label_encoder'])
+        training_columns = joblib.load(files['training_columns'])
+        return cls(
+            version, model, le_persona, training_columns, files, manifest or {},
+            load_seconds=round(time.perf_counter() - started, 4), **kwargs
+        )
+
+    def score(self, features):
+        """Dropout probability (class 1) for each feature row straight from the model."""
+        if self.engine is not None and len(features) <= self.compiled_max_rows:
+            return self.engine.predict_proba(features)[:, 1]
+        return self.model.predict_proba(features)[:, 1]
+
+    def describe(self):
+        return {
+            'version': self.version,
+            'fingerprint': self.fingerprint,
+            'engine': 'compiled' if self.engine is not None else 'lightgbm',
+            'loaded_at': self.loaded_at,
+            'thresholds': self.bands.describe(),
+            'calibration': self.calibration.describe() if self.calibration is not None else None,
+            'load_seconds': self.load_seconds,
+            'artifacts': {
+                os.path.basename(path): {'sha256': artifact_version(path), 'bytes': os.path.getsize(path)}
+                for path in self.files.values()
+            },
+        }
+
+
+class ModelRegistry:
+    """Finds model versions on disk and loads them as ModelBundles."""
+
+    def __init__(self, root='models', legacy_dir='.'):
+        self.root = root
+        self.legacy_dir = legacy_dir
+
+    def manifests(self):
+        """Manifests of all published versions, oldest first."""
+        found = []
+        if os.path.isdir(self.root):
+            for name in sorted(os.listdir(self.root)):
+                path = os.path.join(self.root, name, MANIFEST)
+                if os.path.isfile(path):
+                    with open(path) as f:
+                        found.append(json.load(f))
+        legacy_present = all(
+            os.path.isfile(os.path.join(self.legacy_dir, name)) for name in LEGACY_FILES.values()
+        )
+        if legacy_present and LEGACY_VERSION not in {manifest['version'] for manifest in found}:
+            found.append({'version': LEGACY_VERSION, **LEGACY_FILES, 'legacy': True})
+        # The legacy bundle has no 'created' stamp, so it sorts before anything published
+        return sorted(found, key=lambda manifest: manifest.get('created', ''))
+
+    def versions(self):
+        return [manifest['version'] for manifest in self.manifests()]
+
+    def manifest(self, version):
+        for manifest in self.manifests():
+            if manifest['version'] == version:
+                return manifest
+        raise KeyError(f"Unknown model version '{version}'. Available: {self.versions()}")
+
+    def default_version(self):
+        """DROPOUT_MODEL_VERSION if set, else the most recently published version."""
+        return os.environ.get('DROPOUT_MODEL_VERSION') or self.manifests()[-1]['version']
+
+    def files(self, version):
+        manifest = self.manifest(version)
+        base = self.legacy_dir if manifest.get('legacy') else os.path.join(self.root, version)
+        return {role: os.path.join(base, manifest[role]) for role in ROLES}
+
+    def load(self, version, **kwargs):
+        return ModelBundle.load(version, self.files(version), self.manifest(version), **kwargs)
+
+    def publish(self, version, model, label_encoder, training_columns, extra=None):
+        """Copy artifacts into a new version directory and write its manifest."""
+        target = os.path.join(self.root, version)
+        if os.path.exists(target):
+            raise FileExistsError(f"Model version '{version}' already exists at {target}")
+        os.makedirs(target)
+
+        manifest = {'version': version, 'created': datetime.now(timezone.utc).isoformat()}
+        for role, source in zip(ROLES, (model, label_encoder, training_columns)):
+            name = f"{role}.joblib"
+            shutil.copyfile(source, os.path.join(target, name))
+            manifest[role] = name
+            manifest[f"{role}_sha256"] = artifact_version(source)
+        manifest.update(extra or {})
+
+        # Write the manifest last so a half-copied bundle is never listed
+        self._write_manifest(target, manifest)
+        return manifest
+
+    def update(self, version, **fields):
+        """Change fields such as thresholds in a published manifest; takes effect on next load."""
+        manifest = self.manifest(version)
+        if manifest.get('legacy'):
+            raise ValueError(f"'{version}' is the legacy bundle; publish it as a version to change its manifest")
+        manifest.update(fields)
+        # Fail here rather than when a server next loads the version
+        RiskBands.from_manifest(manifest)
+        Calibration.from_manifest(manifest)
+        self._write_manifest(os.path.join(self.root, version), manifest)
+        return manifest
+
+    @staticmethod
+    def _write_manifest(target, manifest):
+        with open(os.path.join(target, MANIFEST + '.tmp'), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(os.path.join(target, MANIFEST + '.tmp'), os.path.join(target, MANIFEST))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage versioned dropout model bundles.")
+    parser.add_argument('--root', default=os.environ.get('DROPOUT_MODEL_REGISTRY', 'models'))
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    publish = commands.add_parser('publish', help="Add a new version from artifact files")
+    publish.add_argument('version')
+    publish.add_argument('--model', default=LEGACY_FILES['model'])
+    publish.add_argument('--encoder', default=LEGACY_FILES['label_encoder'])
+    publish.add_argument('--columns', default=LEGACY_FILES['training_columns'])
+    publish.add_argument('--yellow', type=float, help="Yellow flag threshold for this version")
+    publish.add_argument('--red', type=float, help="Red flag threshold for this version")
+    publish.add_argument('--calibration', help="JSON file with 'raw' and 'calibrated' point lists")
+
+    thresholds = commands.add_parser('set-thresholds', help="Change a published version's flag thresholds")
+    thresholds.add_argument('version')
+    thresholds.add_argument('--yellow', type=float, required=True)
+    thresholds.add_argument('--red', type=float, required=True)
+
+    commands.add_parser('list', help="List published versions")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.root)
+    if args.command == 'publish':
+        extra = {}
+        if args.yellow is not None or args.red is not None:
+            bands = RiskBands(
+                args.yellow if args.yellow is not None else RiskBands().yellow,
+                args.red if args.red is not None else RiskBands().red,
+            )
+            extra['thresholds'] = bands.describe()
+        if args.calibration:
+            with open(args.calibration) as f:
+                table = json.load(f)
+            Calibration(table['raw'], table['calibrated'])
+            extra['calibration'] = {'raw': table['raw'], 'calibrated': table['calibrated']}
+        manifest = registry.publish(args.version, args.model, args.encoder, args.columns, extra)
+        print(f"Published {manifest['version']} to {os.path.join(args.root, args.version)}")
+    elif args.command == 'set-thresholds':
+        registry.update(args.version, thresholds=RiskBands(args.yellow, args.red).describe())
+        print(f"Thresholds for {args.version} set to yellow={args.yellow} red={args.red}; reload it to apply")
+    else:
+        for manifest in registry.manifests():
+            origin = 'legacy files' if manifest.get('legacy') else manifest.get('created', '')
+            print(f"{manifest['version']}\t{origin}")
+
+
+if __name__ == "__main__":
+    main()
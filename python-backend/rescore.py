@@ -0,0 +1,513 @@
+"""
+Incremental re-scoring from a feed of changed records.
+
+A feed is NDJSON, one new or corrected source record per line, tagged with
+the table it belongs to:
+
+    {"table": "test_scores", "studentId": "E0008", "courseId": "CSET240", "testType": "Quiz_4", "testDate": "2025-06-01", "score": 81.5}
+    {"table": "backlogs", "studentId": "E0011", "courseId": "MATH201", "attempts": 1, "cleared": false}
+
+Every record is checked first: its table's required fields must be present
+and of the right type (numbers for score and attendancePercent, a boolean
+for cleared, dates as YYYY-MM-DD and months as YYYY-MM). If any record
+fails, or a feed line is not JSON, the whole batch is rejected with an
+error per record index and nothing is written.
+
+Applying a feed upserts the records into the matching extract by each
+table's natural key (a correction replaces its row, a new record is
+appended), recomputes the feature store rows of just the students they
+touch, scores those students in one call and emits only the flags whose
+level changed, or whose probability moved by more than the tolerance,
+since they were last emitted. The last emitted flag per student lives in
+the store directory (published_flags.npz); `baseline` seeds it from a
+full pass so the first incremental run only reports real changes.
+
+    python rescore.py baseline
+    python rescore.py apply --data-dir work --feed changes.ndjson --output flag_changes.ndjson
+    cat batch.ndjson | python rescore.py apply --data-dir work --feed -
+    python rescore.py check                   # corrections replace rows, on a copy of the data
+
+Applying rewrites the extracts in --data-dir, so point it (or
+DROPOUT_DATA_DIR) at a working copy rather than the tracked csv/final.
+The feature store switches generations atomically; servers pick the new
+one up on their next /predict/by-id request.
+
+A feed file is treated as append-only: the byte offset reached is kept in
+<feed>.offset and the next run starts from there.
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the server's in-process lock applies
+    fcntl = None
+
+import numpy as np
+import pandas as pd
+
+from derive import ATTENDANCE_FILE, BACKLOGS_FILE, FEE_PAYMENTS_FILE, TEST_SCORES_FILE
+from feature_store import FeatureStore, build, refresh
+from registry import ModelRegistry
+from score_csv import score_chunk
+
+TABLES = {
+    'test_scores': TEST_SCORES_FILE,
+    'attendance': ATTENDANCE_FILE,
+    'backlogs': BACKLOGS_FILE,
+    'fee_payments': FEE_PAYMENTS_FILE,
+}
+# Natural key of each table's rows: a record with the key of an existing row
+# is a correction and replaces it. Fee payments have no true key; rows that
+# share this one are corrected together.
+KEYS = {
+    'test_scores': ['studentId', 'courseId', 'testType'],
+    'attendance': ['studentId', 'courseId', 'month'],
+    'backlogs': ['studentId', 'courseId'],
+    'fee_payments': ['studentId', 'dueDate', 'amount'],
+}
+# Fields a record of each table must carry and their types. Values are
+# written to the extract in its own text form, so keys and dates compare
+# and sort like the existing rows.
+FIELDS = {
+    'test_scores': {'studentId': 'text', 'courseId': 'text', 'testType': 'text', 'testDate': 'date',
+                    'score': 'number'},
+    'attendance': {'studentId': 'text', 'courseId': 'text', 'month': 'month', 'attendancePercent': 'number'},
+    'backlogs': {'studentId': 'text', 'courseId': 'text', 'attempts': 'integer', 'cleared': 'boolean'},
+    'fee_payments': {'studentId': 'text', 'dueDate': 'date', 'status': 'text', 'dueMonths': 'integer',
+                     'amount': 'integer'},
+}
+# Fields that may be missing or empty (an unpaid fee has no paidDate)
+OPTIONAL_FIELDS = {
+    'fee_payments': {'paidDate': 'date'},
+}
+DATE_FORMATS = {'date': ('%Y-%m-%d', '2025-06-01'), 'month': ('%Y-%m', '2025-06')}
+PUBLISHED = 'published_flags.npz'
+LOCK = 'rescore.lock'
+DEFAULT_TOLERANCE = 0.01
+
+
+# --- Feed ---
+# A feed line that is not JSON; validate_records reports it like any other
+# invalid record, so the batch is rejected and the offset stays put
+UnparsedLine = namedtuple('UnparsedLine', ['error'])
+
+
+def parse_line(line):
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError as e:
+        return UnparsedLine(str(e))
+
+
+def read_feed(path):
+    """Records appended to a feed file since the last run, and the offset to save once applied."""
+    offset_path = path + '.offset'
+    offset = 0
+    if os.path.isfile(offset_path):
+        with open(offset_path) as f:
+            offset = int(f.read().strip() or 0)
+    if offset > os.path.getsize(path):
+        offset = 0  # the feed was truncated or rotated
+
+    records = []
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        for line in f:
+            # A line without its newline is still being written; take it next time
+            if not line.endswith(b'\n'):
+                break
+            if line.strip():
+                records.append(parse_line(line))
+            offset += len(line)
+    return records, offset
+
+
+def save_offset(path, offset):
+    with open(path + '.offset.tmp', 'w') as f:
+        f.write(str(offset))
+    os.replace(path + '.offset.tmp', path + '.offset')
+
+
+def field_text(kind, value):
+    """A record value as the extracts write it; raises ValueError if it is not of the kind."""
+    if kind == 'boolean':
+        if isinstance(value, bool):
+            return str(value)
+        if isinstance(value, str) and value.lower() in ('true', 'false'):
+            return value.capitalize()
+        raise ValueError("must be true or false")
+    if kind in ('number', 'integer'):
+        # bool is an int in Python, but true is not a score
+        if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+            raise ValueError("must be a number")
+        try:
+            number = float(value)
+        except ValueError:
+            raise ValueError("must be a number")
+        if not math.isfinite(number):
+            raise ValueError("must be a finite number")
+        if kind == 'integer':
+            if not number.is_integer():
+                raise ValueError("must be a whole number")
+            return str(int(number))
+        return repr(number)
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError("must be a non-empty string")
+    if kind in DATE_FORMATS:
+        date_format, example = DATE_FORMATS[kind]
+        try:
+            datetime.strptime(value, date_format)
+        except ValueError:
+            raise ValueError(f"must be a date like {example}")
+    return value
+
+
+def validate_records(records):
+    """
+    Check every record against its table's fields. Returns the records with
+    their values in extract text form, and one error per invalid record;
+    callers apply nothing unless the error list is empty.
+    """
+    valid, errors = [], []
+    for i, record in enumerate(records):
+        if isinstance(record, UnparsedLine):
+            errors.append({'index': i, 'error': f"Not valid JSON: {record.error}"})
+            continue
+        if not isinstance(record, dict):
+            errors.append({'index': i, 'error': "Each record must be a JSON object"})
+            continue
+        table = record.get('table')
+        if table not in TABLES:
+            errors.append({'index': i, 'error': f"Unknown table {table!r}. Expected one of {list(TABLES)}"})
+            continue
+
+        problems = []
+        converted = {'table': table}
+        fields = [(name, kind, True) for name, kind in FIELDS[table].items()]
+        fields += [(name, kind, False) for name, kind in OPTIONAL_FIELDS.get(table, {}).items()]
+        for name, kind, required in fields:
+            value = record.get(name)
+            if value is None or value == '':
+                if required:
+                    problems.append(f"{name} is required")
+                continue
+            try:
+                converted[name] = field_text(kind, value)
+            except ValueError as e:
+                problems.append(f"{name} {e}")
+        if problems:
+            errors.append({'index': i, 'error': f"Invalid {table} record: {'; '.join(problems)}"})
+        else:
+            valid.append(converted)
+    return valid, errors
+
+
+def upsert_records(data_dir, records, chunk_size=100_000):
+    """
+    Write records into their extracts; returns the touched studentIds.
+
+    A record whose natural key (KEYS) matches existing rows replaces them in
+    place; any other record is appended. Within the batch the last record
+    for a key wins. Each touched extract is streamed into a temporary file
+    that is renamed over it, so a failed run leaves the original intact.
+    """
+    by_table = {}
+    for record in records:
+        by_table.setdefault(record['table'], []).append(record)
+
+    for table, rows in by_table.items():
+        path = os.path.join(data_dir, TABLES[table])
+        key = KEYS[table]
+        with open(path, newline='') as f:
+            header = next(csv.reader(f))
+        fresh = pd.DataFrame(rows).reindex(columns=header).fillna('').drop_duplicates(key, keep='last')
+        fresh_keys = pd.MultiIndex.from_frame(fresh[key])
+        replaced = np.zeros(len(fresh), dtype=bool)
+
+        with open(path + '.tmp', 'w', newline='') as out:
+            out.write(pd.DataFrame(columns=header).to_csv(index=False))
+            for chunk in pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunk_size):
+                positions = fresh_keys.get_indexer(pd.MultiIndex.from_frame(chunk[key]))
+                matched = positions >= 0
+                if matched.any():
+                    chunk.loc[matched, header] = fresh[header].to_numpy()[positions[matched]]
+                    replaced[positions[matched]] = True
+                chunk.to_csv(out, header=False, index=False)
+            fresh[~replaced].to_csv(out, header=False, index=False)
+        os.replace(path + '.tmp', path)
+    return sorted({str(record['studentId']) for record in records})
+
+
+@contextmanager
+def store_lock(store_dir):
+    """Exclusive lock on the store directory, across pre-forked workers and the CLI."""
+    with open(os.path.join(store_dir, LOCK), 'w') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+# --- Last emitted flags ---
+class PublishedFlags:
+    """The flag and probability last emitted for each student, kept sorted by studentId."""
+
+    def __init__(self, store_dir):
+        self.path = os.path.join(store_dir, PUBLISHED)
+        if os.path.isfile(self.path):
+            with np.load(self.path, allow_pickle=False) as data:
+                self.ids = data['ids']
+                self.probabilities = data['probabilities']
+                self.flags = data['flags']
+        else:
+            self.ids = np.array([], dtype=str)
+            self.probabilities = np.array([], dtype=np.float64)
+            self.flags = np.array([], dtype=str)
+
+    def lookup(self, student_ids):
+        """(probabilities, flags) for the ids; NaN and '' where nothing was emitted yet."""
+        wanted = np.asarray(student_ids, dtype=str)
+        probabilities = np.full(len(wanted), np.nan)
+        flags = np.full(len(wanted), '', dtype=object)
+        if len(self.ids) and len(wanted):
+            positions = np.minimum(np.searchsorted(self.ids, wanted), len(self.ids) - 1)
+            known = self.ids[positions] == wanted
+            probabilities[known] = self.probabilities[positions[known]]
+            flags[known] = self.flags[positions[known]]
+        return probabilities, flags
+
+    def update(self, student_ids, probabilities, flags):
+        merged = pd.DataFrame(
+            {'probability': self.probabilities, 'flag': self.flags.astype(object)}, index=self.ids
+        )
+        fresh = pd.DataFrame(
+            {'probability': np.asarray(probabilities, dtype=np.float64), 'flag': np.asarray(flags, dtype=object)},
+            index=np.asarray(student_ids, dtype=str),
+        )
+        merged = pd.concat([merged[~merged.index.isin(fresh.index)], fresh]).sort_index()
+        self.ids = merged.index.to_numpy(dtype=str)
+        self.probabilities = merged['probability'].to_numpy(dtype=np.float64)
+        self.flags = merged['flag'].to_numpy(dtype=str)
+
+    def save(self):
+        with open(self.path + '.tmp', 'wb') as f:
+            np.savez(f, ids=self.ids, probabilities=self.probabilities, flags=self.flags)
+        os.replace(self.path + '.tmp', self.path)
+
+
+# --- Scoring ---
+def baseline(bundle, store_dir, chunk_size=100_000):
+    """Score every student in the store and record the results as already emitted."""
+    store = FeatureStore(store_dir)
+    published = PublishedFlags(store_dir)
+    for start in range(0, len(store), chunk_size):
+        rows = np.arange(start, min(start + chunk_size, len(store)))
+        results = score_chunk(bundle, store.inputs_at(rows))
+        published.update(results['studentId'], results['dropout_risk_probability'], results['risk_flag'])
+    published.save()
+    return len(store)
+
+
+def rescore(bundle, data_dir, store_dir, records, tolerance=DEFAULT_TOLERANCE, chunk_size=100_000):
+    """
+    Apply changed records and return the flag changes they cause.
+
+    A change is emitted when the student's flag differs from the last one
+    emitted, the probability moved by more than `tolerance`, or nothing was
+    emitted for the student before. Only emitted changes are recorded, so
+    small drifts still add up to a change eventually.
+    """
+    started = time.perf_counter()
+    records, errors = validate_records(records)
+    if errors:
+        # One bad record rejects the batch, so nothing is half applied
+        return {
+            'applied': False,
+            'records': 0,
+            'invalid': errors,
+            'students_affected': 0,
+            'unknown_students': [],
+            'rescored': 0,
+            'changed': 0,
+            'seconds': round(time.perf_counter() - started, 3),
+            'changes': [],
+        }
+    # Extracts, store and published flags change together, one writer at a time
+    with store_lock(store_dir):
+        affected = upsert_records(data_dir, records) if records else []
+        refreshed = refresh(data_dir, store_dir, affected, chunk_size) if affected else {'unknown': []}
+
+        store = FeatureStore(store_dir)
+        inputs, _ = store.inputs(affected)
+        results = score_chunk(bundle, inputs)
+        probabilities = results['dropout_risk_probability'].to_numpy()
+        flags = results['risk_flag'].to_numpy()
+
+        published = PublishedFlags(store_dir)
+        previous_probabilities, previous_flags = published.lookup(results['studentId'].tolist())
+        emit = (
+            np.isnan(previous_probabilities)
+            | (flags != previous_flags)
+            | (np.abs(probabilities - previous_probabilities) > tolerance)
+        )
+
+        changes = [
+            {
+                'studentId': student_id,
+                'previous_flag': previous_flag or None,
+                'risk_flag': flag,
+                'previous_probability': None if np.isnan(previous) else float(previous),
+                'dropout_risk_probability': float(probability),
+                'model_version': bundle.version,
+            }
+            for student_id, previous_flag, flag, previous, probability, emitted in zip(
+                results['studentId'], previous_flags, flags, previous_probabilities, probabilities, emit
+            )
+            if emitted
+        ]
+        if changes:
+            published.update(
+                [change['studentId'] for change in changes],
+                [change['dropout_risk_probability'] for change in changes],
+                [change['risk_flag'] for change in changes],
+            )
+            published.save()
+
+    return {
+        'applied': True,
+        'records': len(records),
+        'invalid': errors,
+        'students_affected': len(affected),
+        'unknown_students': refreshed['unknown'],
+        'rescored': len(inputs),
+        'changed': len(changes),
+        'seconds': round(time.perf_counter() - started, 3),
+        'changes': changes,
+    }
+
+
+def row_counts(data_dir):
+    return {table: sum(len(chunk) for chunk in pd.read_csv(os.path.join(data_dir, filename), usecols=['studentId'],
+                                                             chunksize=100_000))
+            for table, filename in TABLES.items()}
+
+
+def check(bundle, data_dir):
+    """
+    On a copy of data_dir: a correction must replace its row, so posting it
+    (twice) leaves every row count and the student's backlog count as they
+    were, while a record with a new key adds exactly one row.
+    """
+    with tempfile.TemporaryDirectory(prefix='rescore_check_') as workdir:
+        work_data = os.path.join(workdir, 'data')
+        store_dir = os.path.join(workdir, 'store')
+        shutil.copytree(data_dir, work_data)
+        build(work_data, store_dir)
+        baseline(bundle, store_dir)
+
+        row = pd.read_csv(os.path.join(work_data, BACKLOGS_FILE), dtype=str, keep_default_na=False).iloc[0]
+        correction = {
+            'table': 'backlogs', 'studentId': row['studentId'], 'courseId': row['courseId'],
+            'attempts': int(row['attempts']) + 1, 'cleared': row['cleared'].lower() != 'true',
+        }
+        counts = row_counts(work_data)
+        backlogs = FeatureStore(store_dir).rows([row['studentId']])['Total_Backlogs'].iloc[0]
+        for attempt in range(2):
+            result = rescore(bundle, work_data, store_dir, [correction])
+            assert result['applied'], result['invalid']
+            assert row_counts(work_data) == counts, f"correction {attempt + 1} changed row counts"
+            stored = FeatureStore(store_dir).rows([row['studentId']])['Total_Backlogs'].iloc[0]
+            assert stored == backlogs, f"Total_Backlogs went from {backlogs} to {stored}"
+        assert result['changed'] == 0, "re-posting a correction emitted a flag change"
+
+        corrected = pd.read_csv(os.path.join(work_data, BACKLOGS_FILE), dtype=str, keep_default_na=False).iloc[0]
+        assert corrected['attempts'] == str(correction['attempts']) and corrected['cleared'] == str(correction['cleared'])
+
+        rescore(bundle, work_data, store_dir, [{**correction, 'courseId': correction['courseId'] + '-NEW'}])
+        assert row_counts(work_data) == {**counts, 'backlogs': counts['backlogs'] + 1}, "new record was not added once"
+    print(f"Corrections replace rows and re-posting them changes nothing ({sum(counts.values())} rows checked).")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score only the students touched by changed records.")
+    parser.add_argument('--store', default=os.environ.get('DROPOUT_FEATURE_STORE', 'feature_store'))
+    parser.add_argument('--registry', default=os.environ.get('DROPOUT_MODEL_REGISTRY', 'models'))
+    parser.add_argument('--model-version', help="Registry version to score with (default: latest)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('baseline', help="Score everyone and record the flags as emitted")
+
+    check_parser = commands.add_parser('check', help="Check on a copy of the data that corrections replace rows")
+    check_parser.add_argument('--data-dir', default=os.path.join('..', 'csv', 'final'))
+
+    apply = commands.add_parser('apply', help="Apply a feed of changed records")
+    apply.add_argument('--feed', required=True, help="NDJSON feed file, or - for stdin")
+    apply.add_argument('--data-dir', default=os.environ.get('DROPOUT_DATA_DIR'),
+                       help="Working copy of the extracts to write the records into (rewritten in place)")
+    apply.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                       help="Minimum probability change worth emitting when the flag is unchanged")
+    apply.add_argument('--output', help="Write flag changes here as NDJSON (default: stdout)")
+    args = parser.parse_args()
+
+    if args.command == 'apply' and not args.data_dir:
+        parser.error("apply needs --data-dir (or DROPOUT_DATA_DIR): a working copy of the extracts, "
+                     "not the tracked ../csv/final")
+
+    registry = ModelRegistry(args.registry)
+    bundle = registry.load(args.model_version or registry.default_version())
+
+    if args.command == 'baseline':
+        count = baseline(bundle, args.store)
+        print(f"Recorded flags for {count} students with model {bundle.version}", file=sys.stderr)
+        return
+    if args.command == 'check':
+        check(bundle, args.data_dir)
+        return
+
+    if args.feed == '-':
+        records, offset = [parse_line(line) for line in sys.stdin if line.strip()], None
+    else:
+        records, offset = read_feed(args.feed)
+
+    result = rescore(bundle, args.data_dir, args.store, records, args.tolerance)
+    if not result['applied']:
+        # The offset stays put, so the batch is retried once the feed is fixed
+        for error in result['invalid']:
+            print(f"Feed record {error['index']}: {error['error']}", file=sys.stderr)
+        print(f"Rejected all {len(records)} records; nothing was applied", file=sys.stderr)
+        sys.exit(1)
+    if offset is not None:
+        save_offset(args.feed, offset)
+
+    output = open(args.output, 'a') if args.output else sys.stdout
+    try:
+        for change in result['changes']:
+            output.write(json.dumps(change) + '\n')
+    finally:
+        if args.output:
+            output.close()
+
+    if result['unknown_students']:
+        print(f"Not in the feature store (run feature_store.py build): {result['unknown_students']}",
+              file=sys.stderr)
+    print(f"{result['records']} records, {result['students_affected']} students affected, "
+          f"{result['changed']} flag changes in {result['seconds']}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Risk flag thresholds and probability calibration, per model version.
+
+Both come from the version's manifest.json and are built once when the
+bundle is loaded:
+
+    {
+      "version": "v4",
+      ...
+      "thresholds": {"yellow": 0.35, "red": 0.70},
+      "calibration": {"raw": [0.0, 0.5, 1.0], "calibrated": [0.0, 0.41, 1.0]}
+    }
+
+A probability above "red" is Red, above "yellow" Yellow, otherwise Green.
+Versions without thresholds (including the legacy v3 files) use 0.35/0.70,
+which DROPOUT_YELLOW_THRESHOLD / DROPOUT_RED_THRESHOLD can override.
+Calibration is a monotone piecewise-linear table applied with np.interp.
+Flags are always assigned from the raw model probability.
+"""
+
+import os
+
+import numpy as np
+
+FLAGS = ('Green', 'Yellow', 'Red')
+DEFAULT_YELLOW = 0.35
+DEFAULT_RED = 0.70
+
+
+class RiskBands:
+    """Maps probabilities onto Green/Yellow/Red with one searchsorted per batch."""
+
+    def __init__(self, yellow=DEFAULT_YELLOW, red=DEFAULT_RED):
+        if not 0.0 <= yellow <= red <= 1.0:
+            raise ValueError(f"Thresholds must satisfy 0 <= yellow <= red <= 1, got yellow={yellow} red={red}")
+        self.yellow = float(yellow)
+        self.red = float(red)
+        self.edges = np.array([self.yellow, self.red])
+        self.labels = np.array(FLAGS, dtype=object)
+
+    @classmethod
+    def from_manifest(cls, manifest):
+        thresholds = manifest.get('thresholds') or {}
+        return cls(
+            yellow=float(thresholds.get('yellow', os.environ.get('DROPOUT_YELLOW_THRESHOLD', DEFAULT_YELLOW))),
+            red=float(thresholds.get('red', os.environ.get('DROPOUT_RED_THRESHOLD', DEFAULT_RED))),
+        )
+
+    def flag(self, probability):
+        """Flag for one probability; a value equal to a threshold stays in the lower band."""
+        if probability > self.red:
+            return 'Red'
+        elif probability > self.yellow:
+            return 'Yellow'
+        return 'Green'
+
+    def flags(self, probabilities):
+        """Flags for an array of probabilities, as an object array of strings."""
+        # side='left' counts the edges strictly below each value, matching flag()
+        return self.labels[np.searchsorted(self.edges, probabilities, side='left')]
+
+    def describe(self):
+        return {'yellow': self.yellow, 'red': self.red}
+
+
+class Calibration:
+    """Piecewise-linear map from raw model probability to a calibrated one."""
+
+    def __init__(self, raw, calibrated):
+        self.raw = np.asarray(raw, dtype=np.float64)
+        self.calibrated = np.asarray(calibrated, dtype=np.float64)
+        if self.raw.ndim != 1 or self.raw.shape != self.calibrated.shape or len(self.raw) < 2:
+            raise ValueError("Calibration needs matching 'raw' and 'calibrated' lists of at least two points")
+        if np.any(np.diff(self.raw) <= 0):
+            raise ValueError("Calibration 'raw' points must be strictly increasing")
+
+    @classmethod
+    def from_manifest(cls, manifest):
+        table = manifest.get('calibration')
+        if not table:
+            return None
+        return cls(table['raw'], table['calibrated'])
+
+    def apply(self, probabilities):
+        return np.interp(probabilities, self.raw, self.calibrated)
+
+    def describe(self):
+        return {'points': len(self.raw)}
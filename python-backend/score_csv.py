@@ -0,0 +1,160 @@
+"""
+Offline bulk scoring of the csv/final extracts.
+
+Derives the same StudentData inputs as calculate-dropout-risk.ts for every
+student and scores them without going through HTTP:
+
+    python score_csv.py --data-dir ../csv/final --output risk.csv
+    python score_csv.py --output risk.parquet --model-version v4
+
+Test scores and backlogs are streamed in chunks and reduced to two scores
+and one count per student, then students are streamed in chunks; each chunk
+is derived, scored with one vectorized model call and appended to the
+output. Memory depends on the number of students, not the number of rows.
+Writing Parquet needs pyarrow.
+
+With --feature-store the inputs are read from a store built by
+feature_store.py instead, skipping the test score and backlog pass;
+students missing from the store are reported and skipped.
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from derive import (
+    BACKLOGS_FILE, STUDENTS_FILE, TEST_SCORES_FILE, BacklogCounter, ScoreAccumulator, derive_inputs,
+)
+from feature_store import FeatureStore
+from registry import ModelRegistry
+
+
+def read_chunks(path, columns, chunk_size, dtype=None):
+    return pd.read_csv(path, usecols=columns, dtype=dtype, chunksize=chunk_size)
+
+
+class CsvSink:
+    def __init__(self, path):
+        self.path = path
+        self.header = True
+
+    def write(self, frame):
+        frame.to_csv(self.path, mode='w' if self.header else 'a', header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        pass
+
+
+class ParquetSink:
+    def __init__(self, path):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise SystemExit("Writing Parquet needs pyarrow (pip install pyarrow), or use a .csv output")
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.path = path
+        self.writer = None
+
+    def write(self, frame):
+        table = self.pa.Table.from_pandas(frame, preserve_index=False)
+        if self.writer is None:
+            self.writer = self.pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def open_sink(path, output_format):
+    if output_format == 'auto':
+        output_format = 'parquet' if path.endswith('.parquet') else 'csv'
+    return ParquetSink(path) if output_format == 'parquet' else CsvSink(path)
+
+
+def score_chunk(bundle, inputs):
+    """Scores derived inputs with one model call and returns the output rows."""
+    features = bundle.assembler.assemble_columns(inputs)
+    probabilities = bundle.score(features) if len(features) else np.empty(0)
+    results = inputs.rename(columns={'studentID': 'studentId'})
+    results['dropout_risk_probability'] = probabilities
+    results['risk_flag'] = bundle.bands.flags(probabilities)
+    results['model_version'] = bundle.version
+    return results
+
+
+def rate(rows, seconds):
+    return f"{rows:,} rows in {seconds:.2f}s ({rows / seconds if seconds else 0:,.0f} rows/s)"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score every student in a csv/final style extract.")
+    parser.add_argument('--data-dir', default=os.path.join('..', 'csv', 'final'))
+    parser.add_argument('--output', default='dropout_risk_scores.csv')
+    parser.add_argument('--format', choices=['auto', 'csv', 'parquet'], default='auto')
+    parser.add_argument('--chunk-size', type=int, default=100_000, help="Rows read per chunk")
+    parser.add_argument('--model-version', help="Registry version to score with (default: latest)")
+    parser.add_argument('--registry', default=os.environ.get('DROPOUT_MODEL_REGISTRY', 'models'))
+    parser.add_argument('--feature-store', help="Read inputs from this feature store directory")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.registry)
+    bundle = registry.load(args.model_version or registry.default_version())
+    print(f"Scoring with model {bundle.version} ({bundle.fingerprint})")
+    started = time.perf_counter()
+
+    # 1. Reduce test scores and backlogs to per-student state, unless a store has it
+    if args.feature_store:
+        store = FeatureStore(args.feature_store)
+        print(f"Reading inputs from feature store {args.feature_store} ({len(store)} students)")
+    else:
+        store = None
+        scores = ScoreAccumulator()
+        for chunk in read_chunks(os.path.join(args.data_dir, TEST_SCORES_FILE),
+                                 ['studentId', 'testDate', 'score'], args.chunk_size,
+                                 dtype={'studentId': str, 'testDate': str, 'score': np.float64}):
+            scores.update(chunk)
+        backlogs = BacklogCounter()
+        for chunk in read_chunks(os.path.join(args.data_dir, BACKLOGS_FILE),
+                                 ['studentId'], args.chunk_size, dtype={'studentId': str}):
+            backlogs.update(chunk)
+        print(f"Read test scores and backlogs: {rate(scores.rows + backlogs.rows, time.perf_counter() - started)}")
+    reduced_at = time.perf_counter()
+
+    # 2. Derive, score and write one chunk of students at a time
+    sink = open_sink(args.output, args.format)
+    scored = 0
+    missing = 0
+    flags = {}
+    try:
+        for chunk in read_chunks(os.path.join(args.data_dir, STUDENTS_FILE),
+                                 ['studentId'], args.chunk_size, dtype={'studentId': str}):
+            if store is not None:
+                inputs, not_stored = store.inputs(chunk['studentId'].tolist())
+                missing += len(not_stored)
+            else:
+                inputs = derive_inputs(chunk['studentId'], scores.top, backlogs.counts)
+            results = score_chunk(bundle, inputs)
+            sink.write(results)
+            scored += len(results)
+            for flag, count in results['risk_flag'].value_counts().items():
+                flags[flag] = flags.get(flag, 0) + int(count)
+    finally:
+        sink.close()
+
+    finished = time.perf_counter()
+    print(f"Scored students: {rate(scored, finished - reduced_at)}")
+    print(f"Total: {rate(scored, finished - started)}; flags {flags}")
+    if missing:
+        print(f"Skipped {missing} students not in the feature store")
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Production launcher for the Dropout-Risk-Detector API.
+
+The model artifacts are loaded once in this parent process, then N worker
+processes are forked and all accept connections on one shared socket. Each
+worker inherits the loaded model, encoder and compiled tree arrays through
+copy-on-write memory instead of paying its own joblib.load, so memory use
+and cold start stay flat as the worker count grows. The feature store used
+by /predict/by-id is memory-mapped in the parent too, so its pages are
+shared through the page cache. When the store is rebuilt, or refreshed by
+/admin/rescore in one of the workers, every worker reopens it on its next
+request that reads it, since each new store generation comes with a new
+manifest.
+
+Usage (from python-backend/):
+    python serve.py --workers 16 --host 0.0.0.0 --port 8000
+
+The parent also runs the warm-up predictions before forking, so whatever
+the first predictions allocate is shared too and workers start warm. It
+runs them on a single OpenMP thread: LightGBM's thread pool does not
+survive fork(), so the parent must not start one. Each worker's lifespan
+hook then finds the model loaded and warmed, and a worker's own pool is
+created by its first multi-threaded prediction.
+
+Each worker prints its resident memory once its startup has finished,
+split into the part shared with the other workers and the part private
+to it. Linux only, since it relies on fork() and /proc.
+"""
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import uvicorn
+
+
+def memory_report():
+    """Resident memory of this process in MiB, from /proc/self/smaps_rollup."""
+    fields = {}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == 'kB':
+                    fields[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    except OSError:
+        return {}
+    return {
+        'rss_mib': round(fields.get('Rss', 0.0), 1),
+        'pss_mib': round(fields.get('Pss', 0.0), 1),
+        'shared_mib': round(fields.get('Shared_Clean', 0.0) + fields.get('Shared_Dirty', 0.0), 1),
+        'private_mib': round(fields.get('Private_Clean', 0.0) + fields.get('Private_Dirty', 0.0), 1),
+    }
+
+
+def bind_socket(host, port, backlog):
+    sock = socket.socket(socket.AF_INET6 if ':' in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def report_when_started(index, service, timeout=300.0):
+    """Print this worker's memory once the app's lifespan startup has finished."""
+    if not service.startup_complete.wait(timeout):
+        print(f"Worker {index} (pid {os.getpid()}) still starting after {timeout:.0f}s", flush=True)
+        return
+    report = memory_report()
+    print(
+        f"Worker {index} (pid {os.getpid()}) ready: "
+        f"rss {report.get('rss_mib', '?')} MiB, shared {report.get('shared_mib', '?')} MiB, "
+        f"private {report.get('private_mib', '?')} MiB, pss {report.get('pss_mib', '?')} MiB",
+        flush=True,
+    )
+
+
+def run_worker(index, service, sock, args):
+    """Body of a forked worker: serve on the shared socket, reporting memory once started."""
+    config = uvicorn.Config(service.app, log_level=args.log_level, access_log=args.access_log)
+    server = uvicorn.Server(config)
+    threading.Thread(target=report_when_started, args=(index, service), daemon=True).start()
+    server.run(sockets=[sock])
+
+
+@contextmanager
+def single_threaded(bundle):
+    """Score with one OpenMP thread, so LightGBM starts no thread pool before fork()."""
+    n_jobs = bundle.model.get_params().get('n_jobs')
+    bundle.model.set_params(n_jobs=1)
+    try:
+        yield
+    finally:
+        bundle.model.set_params(n_jobs=n_jobs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the dropout API from pre-forked workers.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--backlog', type=int, default=2048)
+    parser.add_argument('--log-level', default='warning')
+    parser.add_argument('--access-log', action='store_true')
+    args = parser.parse_args()
+
+    # --- 1. Load everything once in the parent ---
+    started = time.perf_counter()
+    import main as service
+    if not service.load_artifacts():
+        print("Model failed to load; not starting workers.", file=sys.stderr)
+        sys.exit(1)
+    load_seconds = time.perf_counter() - started
+    if service.WARMUP_ENABLED:
+        with single_threaded(service.active):
+            service.warm_up_active()
+    report = memory_report()
+    print(f"Loaded model in {load_seconds:.2f}s, warm-up {service.load_state['warmup']} "
+          f"in {service.load_state['warmup_seconds']}s, parent rss {report.get('rss_mib', '?')} MiB", flush=True)
+
+    # Move everything allocated so far out of the collector's reach, so that
+    # garbage collection in the workers does not write to (and un-share) it
+    gc.collect()
+    gc.freeze()
+
+    sock = bind_socket(args.host, args.port, args.backlog)
+    print(f"Serving on http://{args.host}:{args.port} with {args.workers} workers", flush=True)
+
+    # --- 2. Fork the workers and keep them running ---
+    workers = {}
+    stopping = False
+
+    def spawn(index):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            try:
+                run_worker(index, service, sock, args)
+            finally:
+                os._exit(0)
+        workers[pid] = index
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    for index in range(args.workers):
+        spawn(index)
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        index = workers.pop(pid, None)
+        if index is not None and not stopping:
+            print(f"Worker {index} (pid {pid}) exited with status {status}; restarting", flush=True)
+            spawn(index)
+
+    sock.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Flattened tree-ensemble inference for the LightGBM dropout model.
+
+At startup the booster is dumped once into flat NumPy arrays (one entry per
+node across all trees) and batches are then scored by walking every tree
+for every row at the same time, one depth level per step. This skips the
+generic LightGBM/sklearn predict_proba dispatch on each call.
+Run this file directly to check it against model.predict_proba, on the
+csv/final students (derived with derive.py, assembled with FeatureAssembler)
+and on synthetic edge cases:
+
+    python tree_engine.py [data_dir]
+"""
+
+import numpy as np
+
+# LightGBM's missing value handling per split
+MISSING_NONE = 0
+MISSING_ZERO = 1
+MISSING_NAN = 2
+MISSING_TYPES = {'None': MISSING_NONE, 'Zero': MISSING_ZERO, 'NaN': MISSING_NAN}
+
+# LightGBM reads inputs this close to zero as exactly zero (kZeroThreshold is a float)
+K_ZERO_THRESHOLD = float(np.float32(1e-35))
+
+
+class CompiledTreeEnsemble:
+    """A binary LightGBM model as flat node arrays with vectorized traversal."""
+
+    def __init__(self, feature, threshold, left, right, value, default_left,
+                 missing_type, roots, max_depth, sigmoid=1.0):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.default_left = default_left
+        self.missing_type = missing_type
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.sigmoid = float(sigmoid)
+        self._prepare()
+
+    @classmethod
+    def from_lightgbm(cls, model):
+        """Flatten a fitted LGBMClassifier (or its Booster) into node arrays."""
+        booster = getattr(model, 'booster_', model)
+        dump = booster.dump_model()
+
+        objective = dump['objective'].split()
+        if objective[0] != 'binary' or dump['num_tree_per_iteration'] != 1:
+            raise ValueError(f"Only binary models are supported, got '{dump['objective']}'")
+        sigmoid = 1.0
+        for part in objective[1:]:
+            if part.startswith('sigmoid:'):
+                sigmoid = float(part.split(':', 1)[1])
+
+        feature, threshold, left, right, value = [], [], [], [], []
+        default_left, missing_type, roots = [], [], []
+        max_depth = 0
+
+        def add_node(node, depth):
+            nonlocal max_depth
+            index = len(feature)
+            feature.append(-1)
+            threshold.append(0.0)
+            left.append(index)
+            right.append(index)
+            value.append(0.0)
+            default_left.append(False)
+            missing_type.append(MISSING_NONE)
+
+            if 'leaf_value' in node:
+                value[index] = node['leaf_value']
+                max_depth = max(max_depth, depth)
+                return index
+
+            if node['decision_type'] != '<=':
+                raise ValueError("Categorical splits are not supported by the compiled engine")
+            feature[index] = node['split_feature']
+            threshold[index] = node['threshold']
+            default_left[index] = node['default_left']
+            missing_type[index] = MISSING_TYPES[node['missing_type']]
+            left[index] = add_node(node['left_child'], depth + 1)
+            right[index] = add_node(node['right_child'], depth + 1)
+            return index
+
+        for tree in dump['tree_info']:
+            roots.append(add_node(tree['tree_structure'], 0))
+
+        return cls(
+            feature=np.asarray(feature, dtype=np.int32),
+            threshold=np.asarray(threshold, dtype=np.float64),
+            left=np.asarray(left, dtype=np.int32),
+            right=np.asarray(right, dtype=np.int32),
+            value=np.asarray(value, dtype=np.float64),
+            default_left=np.asarray(default_left, dtype=bool),
+            missing_type=np.asarray(missing_type, dtype=np.int8),
+            roots=np.asarray(roots, dtype=np.int32),
+            max_depth=max_depth,
+            sigmoid=sigmoid,
+        )
+
+    @property
+    def num_trees(self):
+        return len(self.roots)
+
+    def _prepare(self):
+        """Derive the lookup tables used by the traversal loop (once per engine)."""
+        is_leaf = self.feature < 0
+        # Leaves send rows to themselves whichever way they go, so the loop
+        # never needs a leaf mask: feature 0 against +inf always goes left
+        self._split_feature = np.where(is_leaf, 0, self.feature).astype(np.intp)
+        self._split_threshold = np.where(is_leaf, np.inf, self.threshold)
+        self._children = np.column_stack([self.left, self.right]).astype(np.intp).ravel()
+        # Only splits that route missing values need the slower per-node checks
+        self._plain_splits = bool(np.all(self.missing_type[~is_leaf] == MISSING_NONE))
+
+    def predict_raw(self, X):
+        """Sum of leaf values over all trees for each row (the margin)."""
+        X = np.array(X, dtype=np.float64, order='C', ndmin=2)
+        n_rows, n_features = X.shape
+
+        # LightGBM reads NaN as zero unless a split routes NaN itself, and
+        # treats anything within K_ZERO_THRESHOLD of zero as zero
+        is_nan = np.isnan(X)
+        is_zero = np.abs(X) <= K_ZERO_THRESHOLD
+        flat = np.where(is_zero | is_nan, 0.0, X).ravel()
+        row_offset = (np.arange(n_rows) * n_features)[:, None]
+        node = np.repeat(self.roots[None, :].astype(np.intp), n_rows, axis=0)
+
+        # Every level moves each (row, tree) pair one step down
+        for _ in range(self.max_depth):
+            cell = row_offset + self._split_feature[node]
+            go_right = flat[cell] > self._split_threshold[node]
+            if not self._plain_splits:
+                missing_type = self.missing_type[node]
+                is_missing = (
+                    ((missing_type == MISSING_ZERO) & (is_zero.ravel()[cell] | is_nan.ravel()[cell]))
+                    | ((missing_type == MISSING_NAN) & is_nan.ravel()[cell])
+                )
+                go_right = np.where(is_missing, ~self.default_left[node], go_right)
+            node = self._children[2 * node + go_right]
+
+        # cumsum adds trees in order, matching LightGBM's own accumulation
+        return np.cumsum(self.value[node], axis=1)[:, -1]
+
+    def predict_proba(self, X):
+        """Same layout as LGBMClassifier.predict_proba: columns for class 0 and 1."""
+        positive = 1.0 / (1.0 + np.exp(-self.sigmoid * self.predict_raw(X)))
+        return np.column_stack([1.0 - positive, positive])
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+
+    import joblib
+    import pandas as pd
+
+    from derive import BACKLOGS_FILE, STUDENTS_FILE, TEST_SCORES_FILE, derive_inputs, latest_two_scores
+    from features import FeatureAssembler
+
+    model = joblib.load('dropout_model_v3.joblib')
+    engine = CompiledTreeEnsemble.from_lightgbm(model)
+
+    def check(name, X):
+        expected = model.predict_proba(X)
+        actual = engine.predict_proba(X)
+        max_diff = np.abs(expected - actual).max()
+        assert np.allclose(expected, actual, rtol=0, atol=1e-12), f"{name}: max difference {max_diff}"
+        print(f"Compiled engine ({engine.num_trees} trees, depth {engine.max_depth}) "
+              f"matches predict_proba on {len(X)} {name} rows, max difference {max_diff:.2e}.")
+
+    # The real cohort: inputs derived from the extracts, as the service builds them
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join('..', 'csv', 'final')
+    students = pd.read_csv(os.path.join(data_dir, STUDENTS_FILE), usecols=['studentId'], dtype=str)
+    test_scores = pd.read_csv(os.path.join(data_dir, TEST_SCORES_FILE), dtype={'studentId': str, 'testDate': str})
+    backlogs = pd.read_csv(os.path.join(data_dir, BACKLOGS_FILE), dtype={'studentId': str})
+    derived = derive_inputs(
+        students['studentId'], latest_two_scores(test_scores), backlogs['studentId'].value_counts()
+    )
+    assembler = FeatureAssembler(
+        joblib.load('training_columns_v2.joblib'), joblib.load('label_encoder_v2.joblib').classes_
+    )
+    check(os.path.basename(os.path.normpath(data_dir)), assembler.assemble_columns(derived))
+
+    # Random rows plus rows sitting exactly on split thresholds and missing values
+    rng = np.random.default_rng(0)
+    n_features = model.n_features_in_
+    X = np.column_stack([
+        rng.integers(0, 4, 20000),
+        rng.uniform(0, 10, 20000),
+        rng.integers(0, 8, 20000),
+        rng.uniform(0, 100, 20000),
+        rng.uniform(-3, 3, 20000),
+        rng.uniform(-30, 30, 20000),
+        rng.integers(-3, 4, 20000),
+    ]).astype(np.float64)[:, :n_features]
+    on_threshold = X[:len(engine.feature)].copy()
+    splits = engine.feature >= 0
+    on_threshold[np.flatnonzero(splits), engine.feature[splits]] = engine.threshold[splits]
+    check('synthetic', np.vstack([X, on_threshold, np.full((3, n_features), np.nan)]))